@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class SeappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'SEapp'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import signals  # noqa: F401
+        from .metrics import install_query_recorder
+        from .querycheck import install_query_check
+        connection_created.connect(install_query_recorder)
+        connection_created.connect(install_query_check)
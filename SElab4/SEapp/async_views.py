@@ -0,0 +1,163 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import router
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import AsyncCachedReadMixin
+from .dbrouters import ReplicaReadMixin
+from . import events
+from .fieldsets import SparseFieldsetMixin
+from .filters import ProductSearchFilter, OrderFilterBackend
+from .models import Product, Customer, Order
+from .pagination import ProductPagination, CustomerPagination, OrderPagination
+from .renderers import EventStreamRenderer, format_event
+from .serializers import ProductSerializer, CustomerSerializer, OrderSerializer
+
+
+class AsyncReadAPIView(ReplicaReadMixin, SparseFieldsetMixin, APIView):
+    """
+    Read-only list and retrieve on the async ORM, for running under ASGI.
+
+    Authentication, throttling and permission checks are DRF's own and run in
+    a thread through sync_to_async, since they may query the database. The
+    page and the object are then fetched with aiterator() and aget(), so the
+    event loop is free while the database works.
+    """
+    queryset = None
+    serializer_class = None
+    pagination_class = None
+    filter_backends = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        super().http_method_not_allowed(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+    async def get(self, request, pk=None):
+        if pk is None:
+            return await self.list(request)
+        return await self.retrieve(request, pk)
+
+    def get_queryset(self):
+        return self.narrow_queryset(self.queryset.all())
+
+    def get_serializer_context(self):
+        fields, expand = self.get_fieldset()
+        return {'request': self.request, 'format': self.format_kwarg, 'view': self, 'fields': fields, 'expand': expand}
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        return self.serializer_class(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def list(self, request):
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(self.filter_queryset(self.get_queryset()), request, self)
+        return paginator.get_paginated_response(self.get_serializer(rows, many=True).data)
+
+    async def retrieve(self, request, pk):
+        try:
+            instance = await self.get_queryset().aget(pk=pk)
+        except (self.queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        await sync_to_async(self.check_object_permissions)(request, instance)
+        return Response(self.get_serializer(instance).data)
+
+
+class AsyncProductView(AsyncCachedReadMixin, AsyncReadAPIView):
+    queryset = Product.objects.defer('search_vector')
+    serializer_class = ProductSerializer
+    pagination_class = ProductPagination
+    filter_backends = (ProductSearchFilter,)
+    search_fields = ['name']
+    permission_classes = [IsAuthenticated]
+
+
+class AsyncCustomerView(AsyncCachedReadMixin, AsyncReadAPIView):
+    queryset = Customer.objects.all()
+    serializer_class = CustomerSerializer
+    pagination_class = CustomerPagination
+
+
+class AsyncOrderView(AsyncReadAPIView):
+    queryset = Order.objects.all()
+    serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+    filter_backends = (OrderFilterBackend,)
+
+
+class OrderEventsView(AsyncReadAPIView):
+    """
+    Server-sent events with the status of an order: a "status" event with
+    the current status first, then one for each change, pushed by the hub
+    of SEapp.events instead of being polled for. Authenticated like the rest
+    of the API, with the JWT in the Authorization header.
+    """
+    queryset = Order.objects.all()
+    renderer_classes = [EventStreamRenderer]
+
+    async def get(self, request, pk):
+        # Subscribed before the status is read, so no change falls in between.
+        subscription = events.get_hub().subscribe([pk])
+        try:
+            # From the primary: a lagging replica could return a status older
+            # than a change that was already published.
+            status = await self.queryset.using(router.db_for_write(Order)).values_list(
+                'status', flat=True,
+            ).aget(pk=pk)
+        except Order.DoesNotExist:
+            subscription.close()
+            raise Http404
+        response = StreamingHttpResponse(self.stream(pk, status, subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Tells nginx not to buffer the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, order_id, status, subscription):
+        try:
+            yield format_event('status', events.status_event(order_id, status))
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), events.KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                # Saves that leave the status alone may still publish it.
+                if event['status'] != status:
+                    status = event['status']
+                    yield format_event('status', event)
+        finally:
+            subscription.close()
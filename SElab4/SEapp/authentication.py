@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt import serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import timed
+
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60
+
+
+class UserCache:
+    """
+    Thread-safe LRU of resolved users whose entries expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, max_size=USER_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return user
+
+    def set(self, key, user, ttl):
+        with self.lock:
+            self.entries[key] = (user, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(getattr(settings, 'AUTH_USER_CACHE_SIZE', USER_CACHE_SIZE))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps resolved users in a per-process LRU for
+    AUTH_USER_CACHE_TTL seconds, keyed by user id and the token's password hash
+    claim (CHECK_REVOKE_TOKEN), so most requests skip the user query.
+
+    Saving or deleting a user evicts it from the cache of the process that made
+    the change; other processes pick the change up when the entry expires.
+
+    With AUTH_STATELESS_TOKENS, tokens carrying an ``is_staff`` claim (see
+    TokenObtainPairSerializer) resolve to a TokenUser without any lookup, and
+    changes to the user only take effect once the token expires.
+
+    With AUTH_LEGACY_TOKENS, tokens without the password hash claim (issued
+    before CHECK_REVOKE_TOKEN was on) are still accepted.
+    """
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if getattr(settings, 'AUTH_STATELESS_TOKENS', False) and 'is_staff' in validated_token:
+            if api_settings.USER_ID_CLAIM in validated_token:
+                return TokenUser(validated_token)
+
+        key = (
+            str(validated_token.get(api_settings.USER_ID_CLAIM)),
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM),
+        )
+        user = user_cache.get(key)
+        if user is None:
+            user = self.load_user(validated_token)
+            user_cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TTL', USER_CACHE_TTL))
+        return user
+
+    def load_user(self, validated_token):
+        try:
+            return super().get_user(validated_token)
+        except AuthenticationFailed as exc:
+            legacy = (getattr(settings, 'AUTH_LEGACY_TOKENS', False)
+                      and api_settings.REVOKE_TOKEN_CLAIM not in validated_token)
+            if not legacy or exc.detail.get('code') != 'password_changed':
+                raise
+            # The user was found and is active; there is just no password hash to compare.
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Copied onto the access tokens issued from this refresh token.
+        token = super().get_token(user)
+        token['is_staff'] = user.is_staff
+        return token
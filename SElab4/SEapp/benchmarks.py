@@ -0,0 +1,244 @@
+import asyncio
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+
+import django
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Requests per scenario that run with query capture and tracemalloc; they are
+# kept out of the timed requests because both slow the request down.
+PROFILED_REQUESTS = 10
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def failed_statuses(result):
+    # Numbers measured on error responses would pass for a speedup.
+    return [code for code in result['statuses'] if not 200 <= code < 300]
+
+
+class Scenario:
+    def __init__(self, name, method, url, payload=None):
+        self.name = name
+        self.method = method
+        # Callables taking the request number, so requests can rotate over rows.
+        self.url = url
+        self.payload = payload or (lambda number: None)
+
+    def request(self, client, number, **extra):
+        send = getattr(client, self.method)
+        payload = self.payload(number)
+        if payload is None:
+            return send(self.url(number), **extra)
+        return send(self.url(number), payload, content_type='application/json', **extra)
+
+
+def build_scenarios(product_ids, customer_ids, order_ids):
+    def detail(name, ids):
+        cycle = itertools.cycle(ids)
+        return lambda number: reverse(f'{name}-detail', kwargs={'pk': next(cycle)})
+
+    def product(number):
+        return json.dumps({'name': f'Benchmark product {number}', 'price': 9.99, 'available': True})
+
+    def customer(number):
+        return json.dumps({'name': f'Benchmark customer {number}', 'address': '1 Benchmark St'})
+
+    def order(number):
+        return json.dumps([{'customer': customer_ids[number % len(customer_ids)], 'status': 'New',
+                            'products': product_ids[number % len(product_ids):][:3]}])
+
+    return [
+        Scenario('products-list', 'get', lambda number: reverse('product-list')),
+        Scenario('products-detail', 'get', detail('product', product_ids)),
+        Scenario('products-list-sparse', 'get', lambda number: reverse('product-list') + '?fields=id,name,price'),
+        Scenario('products-search', 'get', lambda number: reverse('product-list') + '?search=shampoo'),
+        Scenario('products-create', 'post', lambda number: reverse('product-list'), product),
+        Scenario('products-patch', 'patch', detail('product', product_ids),
+                 lambda number: json.dumps({'price': round(1 + number % 50 * 0.5, 2)})),
+        Scenario('customers-list', 'get', lambda number: reverse('customer-list')),
+        Scenario('customers-detail', 'get', detail('customer', customer_ids)),
+        Scenario('customers-create', 'post', lambda number: reverse('customer-list'), customer),
+        Scenario('customers-patch', 'patch', detail('customer', customer_ids),
+                 lambda number: json.dumps({'address': f'{number} Benchmark St'})),
+        Scenario('orders-list', 'get', lambda number: reverse('order-list')),
+        Scenario('orders-list-sparse', 'get',
+                 lambda number: reverse('order-list') + '?fields=id,status,total_order_price'),
+        Scenario('orders-detail', 'get', detail('order', order_ids)),
+        Scenario('orders-create', 'post', lambda number: reverse('order-bulk'), order),
+        Scenario('orders-patch', 'patch', detail('order', order_ids),
+                 lambda number: json.dumps({'status': 'In Process'})),
+        Scenario('async-products-list', 'get', lambda number: reverse('async-product-list')),
+        Scenario('async-products-detail', 'get', detail('async-product', product_ids)),
+        Scenario('async-customers-list', 'get', lambda number: reverse('async-customer-list')),
+        Scenario('async-orders-list', 'get', lambda number: reverse('async-order-list')),
+        Scenario('async-orders-detail', 'get', detail('async-order', order_ids)),
+    ]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_scenario(client, scenario, iterations, warmup=5, cold_cache=False):
+    statuses = set()
+    for number in range(warmup):
+        statuses.add(scenario.request(client, number).status_code)
+
+    latencies = []
+    started = time.perf_counter()
+    for number in range(warmup, warmup + iterations):
+        if cold_cache:
+            cache.clear()
+        request_started = time.perf_counter()
+        response = scenario.request(client, number)
+        latencies.append(time.perf_counter() - request_started)
+        statuses.add(response.status_code)
+    elapsed = time.perf_counter() - started
+
+    query_counts, query_times, peak_memory = [], [], 0
+    for number in range(warmup + iterations, warmup + iterations + min(iterations, PROFILED_REQUESTS)):
+        if cold_cache:
+            cache.clear()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as context:
+            response = scenario.request(client, number)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        statuses.add(response.status_code)
+        query_counts.append(len(context.captured_queries))
+        query_times.append(sum(float(query['time']) for query in context.captured_queries))
+
+    return {
+        'iterations': iterations,
+        'statuses': sorted(statuses),
+        'throughput_rps': iterations / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'mean': sum(latencies) / len(latencies) * 1000,
+        },
+        'queries': max(query_counts, default=0),
+        'query_time_ms': sum(query_times) / len(query_times) * 1000 if query_times else 0.0,
+        'peak_memory_kb': peak_memory / 1024,
+    }
+
+
+def slow_queries(delay):
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+async def run_concurrent(scenario, iterations, concurrency, headers=None, db_latency=0.0):
+    """
+    Sends ``iterations`` requests, ``concurrency`` at a time, through the ASGI
+    request path. Each request gets its own thread for sync code like the
+    ASGI handler does, and ``db_latency`` seconds are added to every query to
+    stand in for a remote database.
+    """
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    wrapper = slow_queries(db_latency)
+
+    def install():
+        if db_latency:
+            connection.execute_wrappers.append(wrapper)
+
+    def uninstall():
+        if wrapper in connection.execute_wrappers:
+            connection.execute_wrappers.remove(wrapper)
+
+    async def send(number):
+        async with semaphore, ThreadSensitiveContext():
+            await sync_to_async(install)()
+            try:
+                started = time.perf_counter()
+                response = await scenario.request(client, number, headers=headers)
+                return time.perf_counter() - started, response.status_code
+            finally:
+                await sync_to_async(uninstall)()
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(send(number) for number in range(iterations)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in outcomes]
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'db_latency_ms': db_latency * 1000,
+        'statuses': sorted({code for _, code in outcomes}),
+        'throughput_rps': iterations / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'mean': sum(latencies) / len(latencies) * 1000,
+        },
+    }
+
+
+def run_benchmarks(client, scenarios, iterations, warmup=5, cold_cache=False, progress=None):
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = run_scenario(client, scenario, iterations, warmup, cold_cache)
+        if progress:
+            progress(scenario.name, results[scenario.name])
+        failed = failed_statuses(results[scenario.name])
+        if failed:
+            raise BenchmarkError(f'{scenario.name}: responses with status {", ".join(map(str, failed))}')
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': iterations,
+            'cold_cache': cold_cache,
+        },
+        'scenarios': results,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Lists the scenarios of ``current`` that regressed against ``baseline``: p95
+    latency or peak memory up by more than ``threshold`` (a fraction), more
+    SQL queries per request, or any response outside 2xx.
+    """
+    regressions = []
+    for name, result in current['scenarios'].items():
+        failed = failed_statuses(result)
+        if failed:
+            regressions.append(f'{name}: responses with status {", ".join(map(str, failed))}')
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        p95, previous_p95 = result['latency_ms']['p95'], before['latency_ms']['p95']
+        if previous_p95 and p95 > previous_p95 * (1 + threshold):
+            regressions.append(f'{name}: p95 latency {previous_p95:.2f}ms -> {p95:.2f}ms')
+        if result['queries'] > before['queries']:
+            regressions.append(f'{name}: queries {before["queries"]} -> {result["queries"]}')
+        memory, previous_memory = result['peak_memory_kb'], before['peak_memory_kb']
+        if previous_memory and memory > previous_memory * (1 + threshold):
+            regressions.append(f'{name}: peak memory {previous_memory:.0f}KB -> {memory:.0f}KB')
+    return regressions
@@ -0,0 +1,261 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .cache import invalidate_model
+from .events import publish_order_status
+from .models import Product, Customer, Order, link_order_products, order_totals, refresh_order_totals
+from .rollups import RollupDelta, manual_rollups
+from .serializers import INVALID_PK_MESSAGE, UNAVAILABLE_PK_MESSAGE, ProductSerializer, OrderBulkItemSerializer
+
+BULK_BATCH_SIZE = 1000
+DUPLICATE_PK_MESSAGE = 'Id "{}" appears more than once in the batch.'
+
+
+def stamp(instances):
+    # bulk_update() does not fill auto_now fields.
+    now = timezone.now()
+    for instance in instances:
+        instance.updated_at = now
+
+
+class BulkModelMixin:
+    """
+    Adds POST/PATCH/DELETE /<resource>/bulk/ taking a list payload.
+
+    The whole batch is validated first, with errors reported per item index.
+    Valid items are written with bulk queries unless ?atomic=true is given and
+    some item failed, in which case nothing is written.
+    """
+    bulk_batch_size = BULK_BATCH_SIZE
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        atomic = request.query_params.get('atomic', '').lower() in ('1', 'true', 'yes')
+
+        method = request.method.lower()
+        if method == 'delete':
+            validated, errors = self.validate_bulk_delete(items)
+        else:
+            validated, errors = self.validate_bulk_write(items, partial=method == 'patch')
+
+        if errors and (atomic or not validated):
+            return Response({'results': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if method == 'post':
+                results = self.perform_bulk_create(validated)
+            elif method == 'patch':
+                results = self.perform_bulk_update(validated)
+            else:
+                results = self.perform_bulk_destroy(validated)
+
+        if method == 'delete':
+            return Response({'deleted': results, 'errors': errors})
+        serializer = self.get_serializer(results, many=True)
+        response_status = status.HTTP_201_CREATED if method == 'post' else status.HTTP_200_OK
+        return Response({'results': serializer.data, 'errors': errors}, status=response_status)
+
+    def validate_bulk_delete(self, items):
+        ids, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                ids.append((index, serializers.IntegerField().to_internal_value(item)))
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': {'id': exc.detail}})
+        existing = set(self.queryset.model.objects.filter(
+            pk__in=[pk for _, pk in ids]
+        ).values_list('pk', flat=True))
+        for index, pk in ids:
+            if pk not in existing:
+                errors.append({'index': index, 'errors': {'id': [INVALID_PK_MESSAGE.format(pk)]}})
+        return sorted(existing), sorted(errors, key=lambda error: error['index'])
+
+    def fetch_bulk_instances(self, items, errors):
+        # Resolves the ids of a PATCH payload with a single query.
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        instances = self.queryset.model.objects.in_bulk([pk for pk in ids if isinstance(pk, int)])
+        pending, seen = [], set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+            elif not isinstance(item.get('id'), int) or item['id'] not in instances:
+                errors.append({'index': index, 'errors': {'id': [INVALID_PK_MESSAGE.format(item.get('id'))]}})
+            elif item['id'] in seen:
+                # Two writes to one row in a batch: which one wins would be arbitrary.
+                errors.append({'index': index, 'errors': {'id': [DUPLICATE_PK_MESSAGE.format(item['id'])]}})
+            else:
+                seen.add(item['id'])
+                pending.append((index, instances[item['id']], item))
+        return pending
+
+
+class ProductBulkMixin(BulkModelMixin):
+    def validate_bulk_write(self, items, partial):
+        errors = []
+        if partial:
+            pending = self.fetch_bulk_instances(items, errors)
+        else:
+            pending = [(index, None, item) for index, item in enumerate(items)]
+
+        validated = []
+        for index, instance, item in pending:
+            serializer = ProductSerializer(instance, data=item, partial=partial)
+            if serializer.is_valid():
+                validated.append((instance, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        return validated, sorted(errors, key=lambda error: error['index'])
+
+    def perform_bulk_create(self, validated):
+        products = [Product(**data) for _, data in validated]
+        for product in products:
+            product.price = round(product.price, 2)
+        Product.objects.bulk_create(products, batch_size=self.bulk_batch_size)
+        invalidate_model(Product)
+        return products
+
+    def perform_bulk_update(self, validated):
+        products, fields, changed, repriced = [], set(), [], []
+        for product, data in validated:
+            for name, value in data.items():
+                setattr(product, name, value)
+            product.price = round(product.price, 2)
+            fields.update(data)
+            changed_fields = product.changed_tracked_fields()
+            if changed_fields:
+                changed.append(product.pk)
+            if 'price' in changed_fields:
+                repriced.append(product.pk)
+            products.append(product)
+        repriced_orders = list(
+            Order.objects.filter(products__in=repriced).values_list('pk', flat=True).distinct()
+        )
+        rollups = RollupDelta().subtract(repriced_orders)
+        if fields:
+            stamp(products)
+            Product.objects.bulk_update(products, sorted(fields | {'updated_at'}), batch_size=self.bulk_batch_size)
+        if changed:
+            refresh_order_totals(
+                Order.objects.filter(products__in=changed).values_list('pk', flat=True).distinct()
+            )
+        rollups.add(repriced_orders).apply()
+        invalidate_model(Product)
+        return products
+
+    def perform_bulk_destroy(self, ids):
+        # Dropping the links first lets the orders be refreshed in one pass
+        # instead of once per deleted product.
+        links = Order.products.through.objects.filter(product_id__in=ids)
+        order_ids = list(links.values_list('order_id', flat=True).distinct())
+        rollups = RollupDelta().subtract(order_ids)
+        links.delete()
+        refresh_order_totals(order_ids)
+        rollups.add(order_ids).apply()
+        with manual_rollups():
+            Product.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+
+class OrderBulkMixin(BulkModelMixin):
+    def validate_bulk_write(self, items, partial):
+        errors = []
+        if partial:
+            pending = self.fetch_bulk_instances(items, errors)
+        else:
+            pending = [(index, None, item) for index, item in enumerate(items)]
+
+        checked = []
+        for index, instance, item in pending:
+            serializer = OrderBulkItemSerializer(data=item, partial=partial)
+            if serializer.is_valid():
+                checked.append((index, instance, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        # One query each for every product and customer referenced by the batch.
+        products = Product.objects.in_bulk(
+            {pk for _, _, data in checked for pk in data.get('products', [])}
+        )
+        customers = set(Customer.objects.filter(
+            pk__in={data['customer'] for _, _, data in checked if 'customer' in data}
+        ).values_list('pk', flat=True))
+        # As in OrderSerializer, unavailable products may only stay in the orders that hold them.
+        linked = set(Order.products.through.objects.filter(
+            order_id__in=[instance.pk for _, instance, data in checked if instance is not None and 'products' in data]
+        ).values_list('order_id', 'product_id'))
+
+        validated = []
+        for index, instance, data in checked:
+            item_errors = {}
+            if 'customer' in data and data['customer'] not in customers:
+                item_errors['customer'] = [INVALID_PK_MESSAGE.format(data['customer'])]
+            product_errors = []
+            for pk in dict.fromkeys(data.get('products', [])):
+                if pk not in products:
+                    product_errors.append(INVALID_PK_MESSAGE.format(pk))
+                elif not products[pk].available and (getattr(instance, 'pk', None), pk) not in linked:
+                    product_errors.append(UNAVAILABLE_PK_MESSAGE.format(pk))
+            if product_errors:
+                item_errors['products'] = product_errors
+            if item_errors:
+                errors.append({'index': index, 'errors': item_errors})
+                continue
+            if 'products' in data:
+                data['products'] = [products[pk] for pk in dict.fromkeys(data['products'])]
+            validated.append((instance, data))
+        return validated, sorted(errors, key=lambda error: error['index'])
+
+    def perform_bulk_create(self, validated):
+        orders = [
+            Order(customer_id=data['customer'], status=data['status'], **order_totals(data['products']))
+            for _, data in validated
+        ]
+        Order.objects.bulk_create(orders, batch_size=self.bulk_batch_size)
+        link_order_products(orders, [data['products'] for _, data in validated], self.bulk_batch_size)
+        RollupDelta().add([order.pk for order in orders]).apply()
+        return orders
+
+    def perform_bulk_update(self, validated):
+        orders, fields, relinked, product_lists = [], set(), [], []
+        for order, data in validated:
+            if 'customer' in data:
+                order.customer_id = data['customer']
+                fields.add('customer')
+            if 'status' in data:
+                order.status = data['status']
+                fields.add('status')
+            if 'products' in data:
+                for name, value in order_totals(data['products']).items():
+                    setattr(order, name, value)
+                fields.update(['total_price', 'fulfilled'])
+                relinked.append(order)
+                product_lists.append(data['products'])
+            orders.append(order)
+        rollups = RollupDelta().subtract([order.pk for order in orders])
+        if fields:
+            stamp(orders)
+            Order.objects.bulk_update(orders, sorted(fields | {'updated_at'}), batch_size=self.bulk_batch_size)
+            publish_order_status([(order.pk, order.status) for order in orders if order.status_changed()])
+        Order.products.through.objects.filter(order__in=relinked).delete()
+        link_order_products(relinked, product_lists, self.bulk_batch_size)
+        rollups.add([order.pk for order in orders]).apply()
+
+        # Orders whose products were not replaced are serialized from one prefetch.
+        relinked_ids = {order.pk for order in relinked}
+        prefetch_related_objects([order for order in orders if order.pk not in relinked_ids], 'products')
+        return orders
+
+    def perform_bulk_destroy(self, ids):
+        rollups = RollupDelta().subtract(ids)
+        with manual_rollups():
+            Order.objects.filter(pk__in=ids).delete()
+        rollups.apply()
+        return len(ids)
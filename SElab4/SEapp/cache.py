@@ -0,0 +1,128 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.response import Response
+
+from .dbrouters import reading_from_replicas
+
+VERSION_KEY = 'seapp:version:{}'
+RESPONSE_KEY = 'seapp:response:{}:{}'
+RESPONSE_CACHE_TIMEOUT = 300
+
+
+def get_model_version(model):
+    key = VERSION_KEY.format(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        # Versions are nanosecond timestamps, so a counter lost by eviction
+        # restarts above every version that responses were cached under.
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_model_version(model):
+    key = VERSION_KEY.format(model._meta.label_lower)
+    version = max(time.time_ns(), (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def invalidate_model(model):
+    bump_model_version(model)
+    # Bump again once the write is visible to other connections, otherwise a
+    # concurrent read could cache the pre-commit rows under the new version.
+    transaction.on_commit(lambda: bump_model_version(model))
+
+
+class ResponseCacheMixin:
+    """
+    Caches serialized list and retrieve responses under the model's version, so
+    every write makes the old entries unreachable without scanning keys.
+    Responses carry ETag and Last-Modified, and matching conditional requests
+    get a 304 before anything is queried or serialized.
+    """
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def cached_read(self, request, handler, *args, **kwargs):
+        key, etag, last_modified = self.get_validators(request)
+        if self.is_not_modified(request, etag, last_modified):
+            return self.add_validators(HttpResponseNotModified(), etag, last_modified)
+
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200 and self.can_store(last_modified):
+                cache.set(key, response.data, self.cache_timeout)
+        return self.add_validators(response, etag, last_modified)
+
+    async def acached_read(self, request, handler, *args, **kwargs):
+        key, etag, last_modified = await sync_to_async(self.get_validators)(request)
+        if self.is_not_modified(request, etag, last_modified):
+            return self.add_validators(HttpResponseNotModified(), etag, last_modified)
+
+        data = await cache.aget(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code == 200 and self.can_store(last_modified):
+                await cache.aset(key, response.data, self.cache_timeout)
+        return self.add_validators(response, etag, last_modified)
+
+    def get_validators(self, request):
+        # The absolute URI: the cached next/previous links carry the scheme and host.
+        model = self.queryset.model
+        version = get_model_version(model)
+        digest = hashlib.md5(
+            f'{version}|{request.accepted_media_type}|{request.build_absolute_uri()}'.encode()
+        ).hexdigest()
+        key = RESPONSE_KEY.format(model._meta.label_lower, digest)
+        return key, f'"{digest}"', version // 1_000_000_000
+
+    def can_store(self, last_modified):
+        # A replica may not have replayed the write that set this version yet.
+        if not reading_from_replicas():
+            return True
+        return time.time() - last_modified > settings.DATABASE_REPLICA_STICKY_SECONDS
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Weak comparison: CompressionMiddleware turns the ETag of gzipped responses into W/"...".
+            etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+            return '*' in etags or etag in etags
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and last_modified <= if_modified_since
+
+    def add_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class CachedReadMixin(ResponseCacheMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_read(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_read(request, super().retrieve, *args, **kwargs)
+
+
+class AsyncCachedReadMixin(ResponseCacheMixin):
+    async def list(self, request):
+        return await self.acached_read(request, super().list)
+
+    async def retrieve(self, request, pk):
+        return await self.acached_read(request, super().retrieve, pk)
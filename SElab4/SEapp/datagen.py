@@ -0,0 +1,136 @@
+import bisect
+import itertools
+import math
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+# Imports nothing from Django: the functions run in worker processes, which
+# may be spawned without Django set up.
+
+ADJECTIVES = [
+    'Organic', 'Classic', 'Gentle', 'Daily', 'Herbal', 'Travel', 'Deluxe', 'Natural',
+    'Fresh', 'Soft', 'Volume', 'Repair', 'Silk', 'Ultra', 'Mini', 'Family',
+]
+NOUNS = [
+    'Shampoo', 'Conditioner', 'Hair Brush', 'Comb', 'Hair Oil', 'Hair Mask', 'Hair Spray',
+    'Hair Gel', 'Dryer', 'Straightener', 'Curler', 'Scrunchie', 'Hair Clip', 'Serum',
+]
+FIRST_NAMES = [
+    'Jane', 'John', 'Alice', 'Bob', 'Maria', 'Piotr', 'Anna', 'Tomasz', 'Emma', 'Liam',
+    'Olivia', 'Noah', 'Zofia', 'Jakub', 'Julia', 'Adam', 'Ewa', 'Marek', 'Sofia', 'Lucas',
+]
+LAST_NAMES = [
+    'Doe', 'Smith', 'Johnson', 'Nowak', 'Kowalski', 'Brown', 'Wiśniewska', 'Garcia',
+    'Lewandowski', 'Miller', 'Davis', 'Wójcik', 'Wilson', 'Kamińska', 'Taylor', 'Moore',
+]
+STREETS = ['Main St', 'Oak St', 'Maple Ave', 'Pine Rd', 'Cedar Ln', 'Elm St', 'Lake Dr', 'Hill Rd']
+CITIES = ['Springfield', 'Shelbyville', 'Capital City', 'Ogdenville', 'North Haverbrook', 'Brockway']
+
+# Share of orders on each weekday, Monday first.
+WEEKDAY_WEIGHTS = [1.0, 1.05, 1.05, 1.1, 1.2, 0.8, 0.6]
+
+
+def batch_rng(seed, kind, index):
+    # Every batch has its own generator, so the output does not depend on how
+    # batches are spread over worker processes.
+    return random.Random(f'{seed}:{kind}:{index}')
+
+
+@lru_cache(maxsize=4)
+def zipf_cumulative_weights(count, exponent):
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+@lru_cache(maxsize=4)
+def day_cumulative_weights(days, end_weekday):
+    # Order volume grows towards the end of the range and follows the weekday pattern.
+    weights = []
+    for age in range(days):
+        weekday = (end_weekday - age) % 7
+        weights.append(WEEKDAY_WEIGHTS[weekday] * (1.0 + 1.5 * (days - age) / days))
+    return list(itertools.accumulate(weights))
+
+
+def pick(rng, cumulative):
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+def status_for_age(rng, age_days, statuses):
+    # Recent orders are still moving through the flow, older ones are mostly
+    # done. statuses: the four order statuses, in flow order.
+    if age_days < 1:
+        weights = [0.7, 0.3, 0.0, 0.0]
+    elif age_days < 3:
+        weights = [0.15, 0.5, 0.35, 0.0]
+    elif age_days < 14:
+        weights = [0.02, 0.1, 0.38, 0.5]
+    else:
+        weights = [0.0, 0.01, 0.04, 0.95]
+    return rng.choices(statuses, weights)[0]
+
+
+def poisson(rng, mean):
+    limit, k, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        k += 1
+        product *= rng.random()
+    return k
+
+
+def generate_products(seed, index, count):
+    rng = batch_rng(seed, 'products', index)
+    products = []
+    for _ in range(count):
+        price = round(max(0.5, rng.lognormvariate(math.log(15), 0.8)), 2)
+        products.append({
+            'id': None,
+            'name': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.randint(1, 999)}',
+            'price': price,
+            'available': rng.random() < 0.92,
+        })
+    return products
+
+
+def generate_customers(seed, index, count):
+    rng = batch_rng(seed, 'customers', index)
+    return [
+        {
+            'id': None,
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'address': f'{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}',
+        }
+        for _ in range(count)
+    ]
+
+
+def generate_orders(seed, index, count, product_count, customer_count, avg_lines, days, end, statuses):
+    """
+    Returns order records whose ``customer`` and ``products`` are positions in
+    the generated customer and product lists, not database ids.
+    """
+    rng = batch_rng(seed, 'orders', index)
+    products = zipf_cumulative_weights(product_count, 1.1)
+    customers = zipf_cumulative_weights(customer_count, 0.6)
+    day_weights = day_cumulative_weights(days, end.weekday())
+    orders = []
+    for _ in range(count):
+        age = pick(rng, day_weights)
+        # Busiest in the afternoon.
+        seconds = int(min(max(rng.gauss(15 * 3600, 4 * 3600), 0), 86399))
+        date = end - timedelta(days=age + 1, seconds=-seconds)
+        lines = min(product_count, 1 + poisson(rng, max(avg_lines - 1, 0)))
+        chosen = set()
+        while len(chosen) < lines:
+            chosen.add(pick(rng, products))
+        orders.append({
+            'customer': pick(rng, customers),
+            'products': sorted(chosen),
+            'status': status_for_age(rng, (end - date).total_seconds() / 86400, statuses),
+            'date': date,
+        })
+    return orders
+
+
+def end_of_day(day):
+    return datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=dt_timezone.utc)
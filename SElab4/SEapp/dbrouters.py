@@ -0,0 +1,104 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_KEY = 'seapp:sticky:{}'
+STICKY_COOKIE = 'seapp_primary'
+
+# Set while a safe request of a ReplicaReadMixin view is handled. Everything
+# else (writes, signals, management commands, the admin) reads the primary.
+read_from_replicas = ContextVar('read_from_replicas', default=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a random replica from DATABASE_REPLICAS while
+    ``read_from_replicas`` is set, and everything else to the primary.
+    Replicas hold the same data, so relations across them are allowed, and
+    only the primary is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        # The database cache holds versions and stickiness, which must not lag.
+        if model._meta.app_label == 'django_cache':
+            return 'default'
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas and read_from_replicas.get():
+            replica = random.choice(replicas)
+            if not is_primary(replica):
+                return replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def is_primary(alias):
+    # True for a replica that points at the primary database itself, like a
+    # TEST MIRROR of it does in tests.
+    location = ('ENGINE', 'NAME', 'HOST', 'PORT')
+    replica, primary = connections[alias].settings_dict, connections['default'].settings_dict
+    return all(replica.get(key) == primary.get(key) for key in location)
+
+
+def reading_from_replicas():
+    return read_from_replicas.get() and any(
+        not is_primary(alias) for alias in getattr(settings, 'DATABASE_REPLICAS', [])
+    )
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return STICKY_KEY.format(f'user:{user.pk}')
+    return STICKY_KEY.format(f'ip:{request.META.get("REMOTE_ADDR")}')
+
+
+def mark_sticky(request, response):
+    # Kept in a signed cookie, which any worker can check, for clients that
+    # keep cookies, and in the cache for those that do not; the cache only
+    # reaches the other workers when it is shared (see CACHE_BACKEND).
+    seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+    key = client_key(request)
+    response.set_signed_cookie(STICKY_COOKIE, key, salt=STICKY_COOKIE, max_age=seconds, httponly=True,
+                               samesite='Lax')
+    cache.set(key, True, seconds)
+
+
+def is_sticky(request):
+    key = client_key(request)
+    cookie = request.get_signed_cookie(STICKY_COOKIE, None, salt=STICKY_COOKIE,
+                                       max_age=settings.DATABASE_REPLICA_STICKY_SECONDS)
+    # The cookie names the client that wrote, like the cache key does.
+    return cookie == key or cache.get(key, False)
+
+
+class ReplicaReadMixin:
+    """
+    Serves safe requests from the replicas, unless the client wrote something
+    within DATABASE_REPLICA_STICKY_SECONDS, so clients always read their own
+    writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and getattr(settings, 'DATABASE_REPLICAS', []) and not is_sticky(request):
+            # Not reset with a token: async views run initial() in another context.
+            read_from_replicas.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        read_from_replicas.set(False)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            mark_sticky(request, response)
+        return response
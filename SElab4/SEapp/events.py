@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# Seconds between comment lines on an idle stream, which keep proxies and
+# load balancers from closing it.
+KEEPALIVE_INTERVAL = 15
+# Events a slow client may fall behind by before its stream is closed. It
+# reconnects and starts again from the current status.
+SUBSCRIPTION_QUEUE_SIZE = 100
+NOTIFY_CHANNEL = 'seapp_order_status'
+# PostgreSQL limits a NOTIFY payload to 8000 bytes.
+NOTIFY_PAYLOAD_SIZE = 7000
+
+
+class Subscription:
+    """
+    The order status events of some orders, read with ``await get()`` on the
+    event loop that subscribed. get() returns None once the subscription
+    overflowed: the stream should end so the client starts again.
+    """
+
+    def __init__(self, hub, order_ids):
+        self.hub = hub
+        self.order_ids = set(order_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIPTION_QUEUE_SIZE)
+
+    def put(self, event):
+        # Runs on the subscriber's loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.hub.unsubscribe(self)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class LocalHub:
+    """
+    Broadcasts order status events to the subscriptions of this process,
+    once the transaction that made the change has committed. Events can be
+    published from any thread; they are handed to each subscriber's loop.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, order_ids):
+        subscription = Subscription(self, order_ids)
+        with self.lock:
+            for order_id in subscription.order_ids:
+                self.subscriptions[order_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for order_id in subscription.order_ids:
+                subscribers = self.subscriptions.get(order_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.subscriptions[order_id]
+
+    def publish(self, events, using=None):
+        transaction.on_commit(lambda: self.dispatch(events), using=using)
+
+    def dispatch(self, events):
+        with self.lock:
+            deliveries = [
+                (subscription, event)
+                for event in events
+                for subscription in self.subscriptions.get(event['id'], ())
+            ]
+        for subscription, event in deliveries:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscriber's loop has closed.
+                self.unsubscribe(subscription)
+
+
+class PostgresHub(LocalHub):
+    """
+    Fans events out across processes with LISTEN/NOTIFY. Publishing sends a
+    NOTIFY in the writing transaction, which PostgreSQL delivers on commit;
+    each process listens on a connection of its own, in a thread started
+    with the first subscription, and dispatches to its local subscribers.
+    """
+
+    def __init__(self, using='default'):
+        super().__init__()
+        self.using = using
+        self.listener = None
+
+    def subscribe(self, order_ids):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self.listen, name='order-events', daemon=True)
+                self.listener.start()
+        return super().subscribe(order_ids)
+
+    def publish(self, events, using=None):
+        with connections[using or self.using].cursor() as cursor:
+            for payload in chunk_payloads(events):
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+
+    def listen(self):
+        # Runs for the life of the process: a failure of any kind is logged and
+        # the listener reconnects, so streams never silently stop getting events.
+        while True:
+            listener = None
+            try:
+                database = connections[self.using]
+                # Straight from the driver: a connection of DATABASE_POOL would
+                # be held for good.
+                listener = database.Database.connect(**database.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                for payload in notifications(listener):
+                    self.dispatch(json.loads(payload))
+            except Exception:
+                logger.exception('Listening for order events failed, reconnecting.')
+                time.sleep(1)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+def notifications(listener):
+    # Payloads of the NOTIFYs a listening connection receives: notifies() is
+    # a generator on psycopg 3, a list that poll() fills on psycopg2.
+    if callable(listener.notifies):
+        for notify in listener.notifies():
+            yield notify.payload
+        return
+    while True:
+        if select.select([listener], [], [], 30) == ([], [], []):
+            continue
+        listener.poll()
+        while listener.notifies:
+            yield listener.notifies.pop(0).payload
+
+
+def chunk_payloads(events):
+    chunk, size = [], 2
+    for event in events:
+        encoded = json.dumps(event, separators=(',', ':'))
+        if chunk and size + len(encoded) + 1 > NOTIFY_PAYLOAD_SIZE:
+            yield '[' + ','.join(chunk) + ']'
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        yield '[' + ','.join(chunk) + ']'
+
+
+HUBS = {
+    'local': LocalHub,
+    'postgres': PostgresHub,
+}
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = HUBS[settings.ORDER_EVENTS_BACKEND]()
+        return _hub
+
+
+def status_event(order_id, status):
+    return {'id': order_id, 'status': status}
+
+
+def publish_order_status(orders, using=None):
+    # orders: (id, status) pairs of orders whose status may have changed.
+    events = [status_event(order_id, status) for order_id, status in orders]
+    if events:
+        get_hub().publish(events, using=using or connection.alias)
@@ -0,0 +1,87 @@
+import csv
+import json
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .models import Product, Order
+
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_COLUMNS = [
+    'order_id', 'date', 'status', 'total_price', 'fulfilled',
+    'customer_id', 'customer_name', 'customer_address',
+    'product_id', 'product_name', 'product_price', 'product_available',
+]
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+_date_field = serializers.DateTimeField()
+
+
+def export_queryset(filters=None):
+    # Only the exported columns are loaded; products are prefetched per chunk
+    # by iterator(chunk_size=...), which uses a server-side cursor on PostgreSQL.
+    products = Prefetch('products', queryset=Product.objects.only('id', 'name', 'price', 'available'))
+    return (
+        Order.objects.filter(**(filters or {}))
+        .select_related('customer')
+        .prefetch_related(products)
+        .order_by('pk')
+    )
+
+
+def order_record(order):
+    return {
+        'id': order.pk,
+        'date': _date_field.to_representation(order.date),
+        'status': order.status,
+        'total_price': order.total_price,
+        'fulfilled': order.fulfilled,
+        'customer': {
+            'id': order.customer.pk,
+            'name': order.customer.name,
+            'address': order.customer.address,
+        },
+        'products': [
+            {'id': product.pk, 'name': product.name, 'price': product.price, 'available': product.available}
+            for product in order.products.all()
+        ],
+    }
+
+
+def iter_ndjson(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    for order in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(order_record(order), ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    # One row per order line; orders without products get a single row with
+    # empty product columns.
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for order in queryset.iterator(chunk_size=chunk_size):
+        customer = order.customer
+        head = [
+            order.pk, _date_field.to_representation(order.date), order.status,
+            order.total_price, order.fulfilled, customer.pk, customer.name, customer.address,
+        ]
+        products = order.products.all()
+        if not products:
+            yield writer.writerow(head + [''] * 4)
+        for product in products:
+            yield writer.writerow(head + [product.pk, product.name, product.price, product.available])
+
+
+def iter_export(export_format, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    if export_format == 'csv':
+        return iter_csv(queryset, chunk_size)
+    return iter_ndjson(queryset, chunk_size)
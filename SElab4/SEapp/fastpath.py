@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .metrics import timed
+
+# Serializer fields whose to_representation() is exactly this conversion for
+# the values the database returns. Other fields keep the serializer path.
+PLAIN_FIELDS = {
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.CharField: str,
+    serializers.BooleanField: bool,
+}
+
+
+def plain_fields(serializer):
+    # [(output name, model field, conversion)], or None when a field needs the serializer.
+    model = serializer.Meta.model
+    columns = {field.name for field in model._meta.concrete_fields}
+    fields = []
+    for name, field in serializer.fields.items():
+        convert = PLAIN_FIELDS.get(type(field))
+        if convert is None or field.source not in columns or field.write_only:
+            return None
+        fields.append((name, field.source, convert))
+    return fields
+
+
+def build_rows(rows, fields):
+    with timed('serialize'):
+        return [
+            {name: None if row[source] is None else convert(row[source]) for name, source, convert in fields}
+            for row in rows
+        ]
+
+
+class FastListMixin:
+    """
+    Serves list requests from values() rows when every field of the
+    serializer is a plain column, so no model or serializer instance is
+    built per row. The output is the serializer's, byte for byte; the
+    contract tests in test_fastpath compare the two paths.
+    """
+
+    def list(self, request, *args, **kwargs):
+        fields = plain_fields(self.get_serializer()) if settings.FAST_LIST_RESPONSES else None
+        if fields is None or self.paginator is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # The paginator reads the cursor of the next page from the ordering keys.
+        ordering = [name.lstrip('-') for name in self.paginator.get_ordering(request, queryset, self)]
+        rows = self.paginate_queryset(queryset.values(*dict.fromkeys([source for _, source, _ in fields] + ordering)))
+        return self.get_paginated_response(build_rows(rows, fields))
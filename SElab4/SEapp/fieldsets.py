@@ -0,0 +1,90 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_names(value):
+    return list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+
+
+class SparseFieldsetMixin:
+    """
+    ?fields=id,name limits list and retrieve responses to the given fields and
+    loads only the columns behind them; relations that are left out are not
+    joined or prefetched at all. ?expand= names relations (the serializer's
+    ``Meta.expandable_fields``) to render as nested objects instead of ids.
+
+    Writes ignore both parameters and always load and return whole objects.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_fieldset(self):
+        # (fields or None for all of them, expanded relations), parsed once per request.
+        if getattr(self, '_fieldset', None) is None:
+            self._fieldset = self.parse_fieldset(self.request)
+        return self._fieldset
+
+    def parse_fieldset(self, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None, []
+        params = request.query_params
+        available = list(self.serializer_class().fields)
+        expandable = getattr(self.serializer_class.Meta, 'expandable_fields', {})
+        errors = {}
+
+        fields = None
+        if self.fields_query_param in params:
+            fields = parse_names(params[self.fields_query_param])
+            unknown = [name for name in fields if name not in available]
+            if unknown or not fields:
+                errors[self.fields_query_param] = [f'Unknown field "{name}".' for name in unknown] or [
+                    'Name at least one field.'
+                ]
+        expand = parse_names(params.get(self.expand_query_param, ''))
+        unknown = [name for name in expand if name not in expandable]
+        if unknown:
+            errors[self.expand_query_param] = [f'"{name}" cannot be expanded.' for name in unknown]
+        if errors:
+            raise ValidationError(errors)
+        if fields is not None:
+            fields += [name for name in expand if name not in fields]
+        return fields, expand
+
+    def get_serializer_context(self):
+        fields, expand = self.get_fieldset()
+        return {**super().get_serializer_context(), 'fields': fields, 'expand': expand}
+
+    def get_queryset(self):
+        return self.narrow_queryset(super().get_queryset())
+
+    def narrow_queryset(self, queryset):
+        # Loads what the serialized fields read: only() their columns when the
+        # client picked the fields, and prefetches or joins relations only when
+        # they are part of the response.
+        fields, expand = self.get_fieldset()
+        model = queryset.model
+        serializer = self.serializer_class(context={'fields': fields, 'expand': expand})
+        columns = {model._meta.pk.name}
+        columns.update(name.lstrip('-') for name in getattr(self.pagination_class, 'ordering', ()))
+        prefetch, related = [], []
+        narrow = fields is not None
+        for name, field in serializer.fields.items():
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                # A property or method: its columns are unknown, so load them all.
+                narrow = False
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.append(field.source)
+            else:
+                columns.add(field.source)
+                if name in expand:
+                    related.append(field.source)
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetch)
+        if related:
+            queryset = queryset.select_related(*related)
+        if narrow:
+            queryset = queryset.only(*columns)
+        return queryset
@@ -0,0 +1,134 @@
+import re
+from datetime import datetime, time, timedelta
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from .models import Order
+
+# Text search configuration used by the search_vector trigger (see migration 0007).
+SEARCH_CONFIG = 'english'
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    ?search= backed by the indexed search_vector column and a pg_trgm index on
+    name on PostgreSQL: word prefixes match through the tsvector GIN index and
+    misspelled words through trigram word similarity. Results are annotated
+    with ``search_rank`` for relevance ordering.
+
+    Other databases fall back to SearchFilter's icontains lookups so the
+    endpoint behaves the same in tests.
+    """
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if connections[queryset.db].vendor == 'postgresql':
+            return self.filter_postgresql(queryset, terms)
+        return self.filter_fallback(request, queryset, view, terms)
+
+    def filter_postgresql(self, queryset, terms):
+        text = ' '.join(terms)
+        similarity = TrigramWordSimilarity(text, 'name')
+        condition = Q(name__trigram_word_similar=text)
+        rank = similarity
+
+        words = [word for term in terms for word in re.findall(r'\w+', term)]
+        if words:
+            prefix_query = ' & '.join(f'{word}:*' for word in words)
+            query = SearchQuery(prefix_query, search_type='raw', config=SEARCH_CONFIG)
+            condition |= Q(search_vector=query)
+            rank = SearchRank(F('search_vector'), query) + similarity
+
+        return queryset.annotate(**{
+            self.rank_annotation: Cast(rank, FloatField()),
+        }).filter(condition)
+
+    def filter_fallback(self, request, queryset, view, terms):
+        text = ' '.join(terms)
+        queryset = super().filter_queryset(request, queryset, view)
+        return queryset.annotate(**{
+            self.rank_annotation: Case(
+                When(name__iexact=text, then=Value(2.0)),
+                When(name__istartswith=text, then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+        })
+
+
+def parse_order_filters(params):
+    filters, errors = {}, {}
+    status = params.get('status')
+    if status:
+        if status not in dict(Order.STATUS_CHOICES):
+            errors['status'] = [f'"{status}" is not a valid choice.']
+        filters['status'] = status
+    customer = params.get('customer')
+    if customer:
+        try:
+            filters['customer'] = int(customer)
+        except ValueError:
+            errors['customer'] = ['A valid integer is required.']
+    for name, lookup in (('date_after', 'date__gte'), ('date_before', 'date__lt')):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            parsed, day = parse_datetime(value), parse_date(value)
+        except ValueError:
+            parsed = day = None
+        if parsed is None:
+            if day is None:
+                errors[name] = ['Enter a valid date or date/time.']
+                continue
+            # A bare date_before includes the whole day.
+            if name == 'date_before':
+                day += timedelta(days=1)
+            parsed = datetime.combine(day, time.min)
+        elif name == 'date_before':
+            lookup = 'date__lte'
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        filters[lookup] = parsed
+    if errors:
+        raise ValidationError(errors)
+    return filters
+
+
+class OrderFilterBackend(BaseFilterBackend):
+    """
+    ?status=, ?customer=, ?date_after= and ?date_before= on orders. Equality
+    filters combined with the date range and the newest-first ordering are
+    served by the (status, date, id) and (customer, date, id) indexes.
+    """
+    params = (
+        ('status', 'Order status.', 'string'),
+        ('customer', 'Customer id.', 'integer'),
+        ('date_after', 'Orders placed at or after this date or date/time.', 'string'),
+        ('date_before', 'Orders placed up to this date (inclusive) or date/time.', 'string'),
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.filter(**parse_order_filters(request.query_params))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {'type': schema_type},
+            }
+            for name, description, schema_type in self.params
+        ]
@@ -0,0 +1,387 @@
+import csv
+import io
+import json
+import math
+import time
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_model
+from .events import publish_order_status
+from .models import Product, Customer, Order, refresh_order_totals
+from .rollups import RollupDelta
+
+IMPORT_BATCH_SIZE = 5000
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+
+def read_rows(path, file_format):
+    # Rows are yielded undecoded, NDJSON lines as text and CSV rows as
+    # (header, cells), and decoded by ModelImporter.run(): a malformed row is
+    # then reported like any invalid row instead of ending the import.
+    with open(path, encoding='utf-8', newline='') as source:
+        if file_format == 'csv':
+            reader = csv.reader(source)
+            header = next(reader, [])
+            for cells in reader:
+                if cells:
+                    yield header, cells
+        else:
+            for line in source:
+                if line.strip():
+                    yield line
+
+
+def decode_row(row):
+    if isinstance(row, str):
+        row = json.loads(row)
+        if not isinstance(row, dict):
+            raise ValueError('Expected a JSON object.')
+    elif isinstance(row, tuple):
+        header, cells = row
+        if len(cells) != len(header):
+            raise ValueError(f'Expected {len(header)} cells, got {len(cells)}.')
+        row = dict(zip(header, cells))
+    return row
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f'Invalid boolean "{value}".')
+
+
+def parse_id(value):
+    if value in (None, ''):
+        return None
+    pk = int(value)
+    if pk <= 0:
+        raise ValueError(f'Invalid id "{value}".')
+    return pk
+
+
+def parse_text(row, field):
+    # A null is as missing as an empty string, and a long value is an error rather than cut short.
+    value = row.get(field.name)
+    value = '' if value is None else str(value).strip()
+    if field.max_length is not None and len(value) > field.max_length:
+        raise ValueError(f'{field.name.capitalize()} is longer than {field.max_length} characters.')
+    return value
+
+
+def copy_rows(cursor, table, columns, rows):
+    # COPY ... FROM STDIN through the driver: copy_expert() on psycopg2, copy() on psycopg 3.
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        table, ', '.join(connection.ops.quote_name(column) for column in columns)
+    )
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):
+        buffer.seek(0)
+        raw.copy_expert(sql, buffer)
+    else:
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class ModelImporter:
+    """
+    Streams rows into one model in batches, upserting on ``id`` (the natural
+    key shared with the source system) and inserting rows without one.
+
+    On PostgreSQL batches are loaded with COPY: rows with ids go through a
+    temporary staging table and INSERT ... ON CONFLICT, the rest straight into
+    the table. Other databases use bulk_create with update_conflicts.
+    """
+    model = None
+    columns = []
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, use_copy=None):
+        self.batch_size = batch_size
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        self.use_copy = use_copy
+
+    def parse(self, row):
+        raise NotImplementedError
+
+    def run(self, rows, progress=None):
+        stats = ImportStats()
+        for batch in batched(rows, self.batch_size):
+            records = []
+            for row in batch:
+                stats.rows += 1
+                try:
+                    records.append(self.parse(decode_row(row)))
+                except (KeyError, TypeError, ValueError) as exc:
+                    stats.errors.append(f'row {stats.rows}: {exc}')
+            with transaction.atomic():
+                stats.imported += self.write_batch(records, stats)
+            if progress:
+                progress(stats)
+        self.finish()
+        return stats
+
+    def write_batch(self, records, stats):
+        self.stamp(records)
+        # Later rows win when the same id appears twice in a batch.
+        keyed = {record['id']: record for record in records if record['id'] is not None}
+        new = [record for record in records if record['id'] is None]
+        if self.use_copy:
+            self.copy_upsert(list(keyed.values()))
+            self.copy_insert(new)
+        else:
+            self.bulk_upsert(list(keyed.values()))
+            self.bulk_insert(new)
+        return len(keyed) + len(new)
+
+    def stamp(self, records):
+        # COPY and bulk upserts do not fill auto_now fields.
+        now = timezone.now()
+        for record in records:
+            record['updated_at'] = now
+
+    def values(self, record):
+        return [record[column] for column in self.columns]
+
+    def copy_insert(self, records):
+        if records:
+            with connection.cursor() as cursor:
+                copy_rows(cursor, self.table, self.columns, [self.values(record) for record in records])
+
+    def copy_upsert(self, records):
+        if not records:
+            return
+        stage = connection.ops.quote_name(f'import_{self.model._meta.db_table.lower()}')
+        columns = ['id'] + self.columns
+        quoted = ', '.join(connection.ops.quote_name(column) for column in columns)
+        updates = ', '.join(
+            '{0} = EXCLUDED.{0}'.format(connection.ops.quote_name(column)) for column in self.columns
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMPORARY TABLE {stage} (LIKE {self.table}) ON COMMIT DROP')
+            copy_rows(cursor, stage, columns, [[record['id']] + self.values(record) for record in records])
+            cursor.execute(
+                f'INSERT INTO {self.table} ({quoted}) SELECT {quoted} FROM {stage} '
+                f'ON CONFLICT ("id") DO UPDATE SET {updates}'
+            )
+
+    def bulk_upsert(self, records):
+        if records:
+            self.model.objects.bulk_create(
+                [self.build(record) for record in records],
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=[self.model._meta.get_field(column).name for column in self.columns],
+            )
+
+    def bulk_insert(self, records):
+        if records:
+            self.model.objects.bulk_create([self.build(record) for record in records], batch_size=self.batch_size)
+
+    def build(self, record):
+        return self.model(id=record['id'], **{column: record[column] for column in self.columns})
+
+    @property
+    def table(self):
+        return connection.ops.quote_name(self.model._meta.db_table)
+
+    def finish(self):
+        # Explicit ids do not advance the primary key sequence on PostgreSQL.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [self.model]):
+                cursor.execute(sql)
+        invalidate_model(self.model)
+
+
+class ProductImporter(ModelImporter):
+    model = Product
+    columns = ['name', 'price', 'available', 'updated_at']
+
+    def parse(self, row):
+        price = round(float(row['price']), 2)
+        if not math.isfinite(price) or price <= 0:
+            raise ValueError('Price must be positive.')
+        name = parse_text(row, Product._meta.get_field('name'))
+        if not name:
+            raise ValueError('Name is required.')
+        available = row.get('available')
+        return {
+            'id': parse_id(row.get('id')),
+            'name': name,
+            'price': price,
+            'available': True if available in (None, '') else parse_bool(available),
+        }
+
+    def write_batch(self, records, stats):
+        # Upserted products may have changed price or availability.
+        updated = [record['id'] for record in records if record['id'] is not None]
+        order_ids = list(Order.objects.filter(products__in=updated).values_list('pk', flat=True).distinct())
+        rollups = RollupDelta().subtract(order_ids)
+        written = super().write_batch(records, stats)
+        refresh_order_totals(order_ids)
+        rollups.add(order_ids).apply()
+        return written
+
+
+class CustomerImporter(ModelImporter):
+    model = Customer
+    columns = ['name', 'address', 'updated_at']
+
+    def parse(self, row):
+        name = parse_text(row, Customer._meta.get_field('name'))
+        address = parse_text(row, Customer._meta.get_field('address'))
+        if not name or not address:
+            raise ValueError('Name and address are required.')
+        return {'id': parse_id(row.get('id')), 'name': name, 'address': address}
+
+
+class OrderImporter(ModelImporter):
+    """
+    Order rows reference existing customers and products by id; ``products``
+    is a JSON list in NDJSON and a ``;`` separated list in CSV. References are
+    checked with one query per batch, links are written in bulk and the stored
+    totals refreshed with one UPDATE per batch.
+    """
+    model = Order
+    columns = ['customer_id', 'status', 'date', 'total_price', 'fulfilled', 'updated_at']
+
+    def parse(self, row):
+        status = row['status']
+        if status not in dict(Order.STATUS_CHOICES):
+            raise ValueError(f'Invalid status "{status}".')
+        products = row.get('products') or []
+        if isinstance(products, str):
+            products = [value for value in products.split(';') if value.strip()]
+        date = row.get('date') or None
+        if date is not None:
+            date = parse_datetime(date)
+            if date is None:
+                raise ValueError(f'Invalid date "{row["date"]}".')
+            if timezone.is_naive(date):
+                date = timezone.make_aware(date)
+        return {
+            'id': parse_id(row.get('id')),
+            'customer_id': int(row['customer']),
+            'status': status,
+            'date': date or timezone.now(),
+            'products': list(dict.fromkeys(int(pk) for pk in products)),
+            # Refreshed from the links once the batch is written.
+            'total_price': 0,
+            'fulfilled': True,
+        }
+
+    def write_batch(self, records, stats):
+        records = self.check_references(records, stats)
+        self.stamp(records)
+        keyed = list({record['id']: record for record in records if record['id'] is not None}.values())
+        new = [record for record in records if record['id'] is None]
+        rollups = RollupDelta().subtract([record['id'] for record in keyed])
+        if self.use_copy:
+            self.copy_upsert(keyed)
+        else:
+            self.bulk_upsert(keyed)
+        # Orders without an id need theirs back for the links, which COPY cannot return.
+        self.bulk_insert(new)
+
+        written = keyed + new
+        order_ids = [record['id'] for record in written]
+        Through = Order.products.through
+        Through.objects.filter(order_id__in=[record['id'] for record in keyed]).delete()
+        links = [(record['id'], pk) for record in written for pk in record['products']]
+        if self.use_copy:
+            with connection.cursor() as cursor:
+                copy_rows(cursor, connection.ops.quote_name(Through._meta.db_table), ['order_id', 'product_id'], links)
+        else:
+            Through.objects.bulk_create(
+                [Through(order_id=order_id, product_id=product_id) for order_id, product_id in links],
+                batch_size=self.batch_size,
+            )
+        Order.objects.filter(pk__in=order_ids).refresh_totals()
+        rollups.add(order_ids).apply()
+        # Upserted orders may have moved to another status.
+        publish_order_status([(record['id'], record['status']) for record in keyed])
+        return len(written)
+
+    def check_references(self, records, stats):
+        customers = set(Customer.objects.filter(
+            pk__in={record['customer_id'] for record in records}
+        ).values_list('pk', flat=True))
+        products = set(Product.objects.filter(
+            pk__in={pk for record in records for pk in record['products']}
+        ).values_list('pk', flat=True))
+        valid = []
+        for record in records:
+            missing = [pk for pk in record['products'] if pk not in products]
+            if record['customer_id'] not in customers:
+                stats.errors.append(f'order {record["id"]}: unknown customer {record["customer_id"]}.')
+            elif missing:
+                stats.errors.append(f'order {record["id"]}: unknown products {missing}.')
+            else:
+                valid.append(record)
+        return valid
+
+    def bulk_upsert(self, records):
+        super().bulk_upsert(records)
+        self.restore_dates(records)
+
+    def bulk_insert(self, records):
+        orders = [self.build(record) for record in records]
+        Order.objects.bulk_create(orders, batch_size=self.batch_size)
+        for record, order in zip(records, orders):
+            record['id'] = order.pk
+        self.restore_dates(records)
+
+    def restore_dates(self, records):
+        # bulk_create() lets auto_now_add overwrite the imported dates.
+        if records:
+            Order.objects.bulk_update(
+                [Order(id=record['id'], date=record['date']) for record in records],
+                ['date'], batch_size=self.batch_size,
+            )
+
+
+IMPORTERS = {
+    'products': ProductImporter,
+    'customers': CustomerImporter,
+    'orders': OrderImporter,
+}
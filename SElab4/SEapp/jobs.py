@@ -0,0 +1,120 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Order, ProductChangeJob, ORDER_TOTALS_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold a job before another one takes it over.
+JOB_LEASE = timedelta(minutes=5)
+# Retry delay after a failure, doubled on each further failure.
+RETRY_DELAY = timedelta(seconds=10)
+MAX_RETRY_DELAY = timedelta(hours=1)
+# Jobs looked at per claim attempt.
+CLAIM_BATCH_SIZE = 10
+
+# Set while product changes hand the order refresh to the job queue instead
+# of doing it in the signal handlers.
+_deferred = ContextVar('deferred_product_fanout', default=False)
+
+
+@contextmanager
+def deferred_product_fanout():
+    token = _deferred.set(settings.PRODUCT_CHANGES_IN_BACKGROUND)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+
+
+def product_fanout_is_deferred():
+    return _deferred.get()
+
+
+def change_delay():
+    return timedelta(seconds=settings.PRODUCT_CHANGE_DELAY)
+
+
+def enqueue_product_change(product_id):
+    # INSERT ... ON CONFLICT, so that a pending job only gets a new version
+    # and keeps its place in the queue: changes in quick succession coalesce.
+    now = timezone.now()
+    fields = [ProductChangeJob._meta.get_field(name)
+              for name in ('product', 'version', 'run_after', 'attempts', 'last_error')]
+    quote = connection.ops.quote_name
+    table = quote(ProductChangeJob._meta.db_table)
+    version = quote(fields[1].column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(quote(field.column) for field in fields)}) '
+            f'VALUES (%s, %s, %s, %s, %s) '
+            f'ON CONFLICT ({quote(fields[0].column)}) DO UPDATE SET {version} = {table}.{version} + 1',
+            [product_id, 1, fields[2].get_db_prep_value(now + change_delay(), connection), 0, ''],
+        )
+
+
+def refresh_product_orders(product_id, batch_size=ORDER_TOTALS_BATCH_SIZE):
+    # Walks the product's order lines in order id order, recomputing each
+    # chunk of orders with one UPDATE. Safe to repeat: totals are recomputed
+    # from the lines, not adjusted.
+    lines = Order.products.through.objects.filter(product_id=product_id).order_by('order_id')
+    last = 0
+    while True:
+        order_ids = list(lines.filter(order_id__gt=last).values_list('order_id', flat=True)[:batch_size])
+        if not order_ids:
+            return
+        Order.objects.filter(pk__in=order_ids).refresh_totals()
+        last = order_ids[-1]
+
+
+def claim_job():
+    # Compare-and-set on locked_until, so concurrent workers never run the
+    # same job, without SELECT ... FOR UPDATE SKIP LOCKED (which SQLite lacks).
+    now = timezone.now()
+    due = ProductChangeJob.objects.filter(run_after__lte=now).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now)
+    ).order_by('run_after')
+    for job in due[:CLAIM_BATCH_SIZE]:
+        claimed = ProductChangeJob.objects.filter(pk=job.pk, locked_until=job.locked_until).update(
+            locked_until=now + JOB_LEASE,
+        )
+        if claimed:
+            return job
+    return None
+
+
+def run_job(job, batch_size=ORDER_TOTALS_BATCH_SIZE):
+    try:
+        refresh_product_orders(job.product_id, batch_size)
+    except Exception as error:
+        logger.exception('Refreshing the orders of product %s failed.', job.product_id)
+        delay = min(RETRY_DELAY * 2 ** job.attempts, MAX_RETRY_DELAY)
+        ProductChangeJob.objects.filter(pk=job.pk).update(
+            attempts=F('attempts') + 1, locked_until=None, run_after=timezone.now() + delay, last_error=str(error),
+        )
+        return False
+    # A change made while the job ran bumped the version: keep the job so it runs again.
+    if not ProductChangeJob.objects.filter(pk=job.pk, version=job.version).delete()[0]:
+        ProductChangeJob.objects.filter(pk=job.pk).update(
+            locked_until=None, run_after=timezone.now() + change_delay(), attempts=0, last_error='',
+        )
+    return True
+
+
+def run_pending_jobs(limit=None, batch_size=ORDER_TOTALS_BATCH_SIZE):
+    # Runs due jobs until none is left (or limit have run), returns how many ran.
+    count = 0
+    while limit is None or count < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job, batch_size)
+        count += 1
+    return count
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.benchmarks import (
+    BenchmarkError, build_scenarios, compare_results, failed_statuses, run_benchmarks, run_concurrent,
+)
+from SEapp.models import Product, Customer, Order
+
+BENCHMARK_END_DATE = date(2024, 12, 31)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway test database and measures the API routes through the "
+        "Django test client: throughput, latency percentiles, SQL queries and memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--avg-lines', type=float, default=3.0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--end-date', type=date.fromisoformat, default=BENCHMARK_END_DATE,
+                            help="Last day of the generated orders (YYYY-MM-DD). Fixed by default so runs on "
+                                 "different days seed the same data.")
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help="Only run the named scenario, can be repeated.")
+        parser.add_argument('--cold-cache', action='store_true',
+                            help="Clear the cache before every request.")
+        parser.add_argument('--concurrency', type=int, default=0,
+                            help="Also run the read scenarios through the ASGI path with this many "
+                                 "requests in flight, to compare the sync and async views.")
+        parser.add_argument('--db-latency', type=float, default=0.0,
+                            help="Milliseconds added to every query in the concurrent runs.")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--compare', help="Baseline results JSON to compare against.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed relative p95 latency and memory growth, default 0.2.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the benchmark database.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        if options['warmup'] < 0:
+            raise CommandError('--warmup cannot be negative.')
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                baseline = json.load(source)
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+
+        if baseline is not None:
+            regressions = compare_results(baseline, results, options['threshold'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run(self, options):
+        call_command(
+            'populate_sample_data',
+            '--products', str(options['products']), '--customers', str(options['customers']),
+            '--orders', str(options['orders']), '--avg-lines', str(options['avg_lines']),
+            '--seed', str(options['seed']), '--end-date', options['end_date'].isoformat(), stdout=self.stdout,
+        )
+        admin = User.objects.create_superuser(username='benchmark', password='benchmark')
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+
+        scenarios = build_scenarios(
+            # Unavailable products cannot be ordered.
+            list(Product.objects.filter(available=True).order_by('pk').values_list('pk', flat=True)[:100]),
+            list(Customer.objects.order_by('pk').values_list('pk', flat=True)[:100]),
+            list(Order.objects.order_by('pk').values_list('pk', flat=True)[:100]),
+        )
+        if options['scenarios']:
+            unknown = set(options['scenarios']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['scenarios']]
+
+        try:
+            results = run_benchmarks(
+                client, scenarios, options['iterations'], options['warmup'],
+                options['cold_cache'], progress=self.report,
+            )
+        except BenchmarkError as error:
+            raise CommandError(error)
+        if options['concurrency']:
+            headers = {'Authorization': client.defaults['HTTP_AUTHORIZATION']}
+            results['concurrent'] = {}
+            for scenario in scenarios:
+                if scenario.method != 'get':
+                    continue
+                result = asyncio.run(run_concurrent(
+                    scenario, options['iterations'], options['concurrency'],
+                    headers, options['db_latency'] / 1000,
+                ))
+                results['concurrent'][scenario.name] = result
+                self.report(f'{scenario.name} x{options["concurrency"]}', result)
+                failed = failed_statuses(result)
+                if failed:
+                    raise CommandError(f'{scenario.name}: responses with status {", ".join(map(str, failed))}')
+        results['meta'].update({
+            'products': options['products'],
+            'customers': options['customers'],
+            'orders': options['orders'],
+            'seed': options['seed'],
+            'end_date': options['end_date'].isoformat(),
+        })
+        return results
+
+    def report(self, name, result):
+        latency = result['latency_ms']
+        line = (
+            f"{name:<26} {result['throughput_rps']:8.1f} req/s  "
+            f"p50 {latency['p50']:7.2f}ms  p95 {latency['p95']:7.2f}ms  p99 {latency['p99']:7.2f}ms"
+        )
+        if 'queries' in result:
+            line += f"  {result['queries']:3d} queries ({result['query_time_ms']:.2f}ms)  {result['peak_memory_kb']:.0f}KB"
+        self.stdout.write(line)
@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from SEapp.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export
+from SEapp.filters import parse_order_filters
+
+
+class Command(BaseCommand):
+    help = "Streams all orders with their customer and product lines as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--status')
+        parser.add_argument('--customer')
+        parser.add_argument('--date-after')
+        parser.add_argument('--date-before')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', help="File to write to, defaults to stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_order_filters({
+                'status': options['status'],
+                'customer': options['customer'],
+                'date_after': options['date_after'],
+                'date_before': options['date_before'],
+            })
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        chunks = iter_export(options['export_format'], export_queryset(filters), options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from SEapp.importer import IMPORT_BATCH_SIZE, IMPORTERS, read_rows
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "Imports products, customers or orders from an NDJSON or CSV file, upserting on id."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=['ndjson', 'csv'],
+                            help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--no-copy', action='store_true',
+                            help="Use bulk_create even on PostgreSQL.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File "{path}" does not exist.')
+        file_format = options['file_format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+
+        importer = IMPORTERS[options['kind']](
+            batch_size=options['batch_size'],
+            use_copy=False if options['no_copy'] else None,
+        )
+        progress = self.report_progress if options['verbosity'] > 1 else None
+        stats = importer.run(read_rows(path, file_format), progress=progress)
+
+        for error in stats.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(error)
+        if len(stats.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f'... and {len(stats.errors) - MAX_REPORTED_ERRORS} more errors.')
+        self.stdout.write(
+            f'Imported {stats.imported} of {stats.rows} {options["kind"]} in {stats.elapsed:.2f}s '
+            f'({stats.rate:.0f} rows/s), {len(stats.errors)} errors.'
+        )
+
+    def report_progress(self, stats):
+        self.stdout.write(f'{stats.rows} rows read, {stats.imported} imported ({stats.rate:.0f} rows/s)')
@@ -1,9 +1,132 @@
-from django.core.management.base import BaseCommand
-from SEapp.models import Product, Customer, Order
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from SEapp import datagen
+from SEapp.importer import ImportStats, ProductImporter, CustomerImporter, OrderImporter
+from SEapp.models import (
+    Product, Customer, Order, ProductChangeJob, Tombstone, DailySales, ProductSales, CustomerSales,
+)
+
 
 class Command(BaseCommand):
+    help = (
+        "Replaces all data with a small fixed sample, or with a generated dataset "
+        "when --products/--customers/--orders are given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=0)
+        parser.add_argument('--customers', type=int, default=0)
+        parser.add_argument('--orders', type=int, default=0)
+        parser.add_argument('--avg-lines', type=float, default=3.0,
+                            help="Average number of products per order.")
+        parser.add_argument('--days', type=int, default=365,
+                            help="Number of days the order dates are spread over.")
+        parser.add_argument('--end-date', type=date.fromisoformat, default=None,
+                            help="Last order day (YYYY-MM-DD), defaults to today. Give it with --seed "
+                                 "to get the same dataset on any day.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Processes used to generate the rows.")
+
+    def handle(self, *args, **options):
+        if options['products'] or options['customers'] or options['orders']:
+            self.generate(options)
+        else:
+            self.create_sample()
+
+    def generate(self, options):
+        if options['orders'] and not (options['products'] and options['customers']):
+            raise CommandError("Orders need --products and --customers.")
+        if options['batch_size'] <= 0 or options['workers'] <= 0 or options['days'] <= 0:
+            raise CommandError("--batch-size, --workers and --days must be positive.")
+
+        started = time.monotonic()
+        self.flush()
+        pool = ProcessPoolExecutor(options['workers']) if options['workers'] > 1 else None
+        try:
+            self.load(pool, ProductImporter, datagen.generate_products, options['products'], options)
+            self.load(pool, CustomerImporter, datagen.generate_customers, options['customers'], options)
+            if options['orders']:
+                self.load_orders(pool, options)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        total = options['products'] + options['customers'] + options['orders']
+        self.stdout.write(
+            f"Generated {options['products']} products, {options['customers']} customers and "
+            f"{options['orders']} orders in {elapsed:.2f}s ({total / elapsed:.0f} rows/s)."
+        )
+
+    def flush(self):
+        # The rollups and tombstones describe the rows being dropped: kept, the
+        # imported orders would be counted on top of the old ones.
+        models = (Order.products.through, Order, Product, Customer, ProductChangeJob, Tombstone,
+                  DailySales, ProductSales, CustomerSales)
+        tables = [model._meta.db_table for model in models]
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True)
+        )
+
+    def batches(self, total, options):
+        size = options['batch_size']
+        return [(index, min(size, total - start)) for index, start in enumerate(range(0, total, size))]
+
+    def map(self, pool, function, *iterables):
+        return pool.map(function, *iterables) if pool else map(function, *iterables)
+
+    def load(self, pool, importer_class, generator, total, options):
+        importer = importer_class(batch_size=options['batch_size'])
+        stats = ImportStats()
+        jobs = self.batches(total, options)
+        if jobs:
+            for records in self.map(pool, generator, [options['seed']] * len(jobs), *zip(*jobs)):
+                with transaction.atomic():
+                    importer.write_batch(records, stats)
+        importer.finish()
+
+    def load_orders(self, pool, options):
+        # Generated orders point at positions in the product and customer lists.
+        product_ids = list(Product.objects.order_by('pk').values_list('pk', flat=True))
+        customer_ids = list(Customer.objects.order_by('pk').values_list('pk', flat=True))
+        end = datagen.end_of_day(options['end_date'] or date.today())
+
+        jobs = self.batches(options['orders'], options)
+        count = len(jobs)
+        generated = self.map(
+            pool, datagen.generate_orders,
+            [options['seed']] * count, *zip(*jobs),
+            [len(product_ids)] * count, [len(customer_ids)] * count,
+            [options['avg_lines']] * count, [options['days']] * count, [end] * count,
+            [[value for value, _ in Order.STATUS_CHOICES]] * count,
+        )
+        importer = OrderImporter(batch_size=options['batch_size'])
+        stats = ImportStats()
+        for orders in generated:
+            records = [
+                {
+                    'id': None,
+                    'customer_id': customer_ids[order['customer']],
+                    'status': order['status'],
+                    'date': order['date'],
+                    'products': [product_ids[position] for position in order['products']],
+                    'total_price': 0,
+                    'fulfilled': True,
+                }
+                for order in orders
+            ]
+            with transaction.atomic():
+                importer.write_batch(records, stats)
+        importer.finish()
 
-    def handle(self, *args, **kwargs):
+    def create_sample(self):
         Product.objects.all().delete()
         Customer.objects.all().delete()
         Order.objects.all().delete()
@@ -57,4 +180,4 @@ class Command(BaseCommand):
         )
         order3.products.add(product1, product3)
 
-        self.stdout.write("Data created successfully.")
\ No newline at end of file
+        self.stdout.write("Data created successfully.")
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+from SEapp.models import DailySales, ProductSales, CustomerSales
+from SEapp.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily, product and customer sales rollups from all orders."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {DailySales.objects.count()} daily, {ProductSales.objects.count()} product and '
+            f'{CustomerSales.objects.count()} customer rollup rows in {time.monotonic() - started:.2f}s.'
+        ))
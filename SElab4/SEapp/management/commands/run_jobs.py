@@ -0,0 +1,43 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import InterfaceError, OperationalError, close_old_connections
+from SEapp.jobs import run_pending_jobs
+
+logger = logging.getLogger(__name__)
+
+# Longest wait, in seconds, between attempts while the database is unreachable.
+MAX_BACKOFF = 60
+
+
+class Command(BaseCommand):
+    help = "Runs the queued product change jobs, polling the queue until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run the jobs that are due, then exit.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        backoff = options['poll_interval']
+        while True:
+            # Like a request would, drop a connection that is broken or past CONN_MAX_AGE.
+            close_old_connections()
+            try:
+                count = run_pending_jobs()
+            except (OperationalError, InterfaceError):
+                if options['once']:
+                    raise
+                logger.exception('Running product change jobs failed, retrying in %.0fs.', backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+            backoff = options['poll_interval']
+            if count and options['verbosity'] > 1:
+                self.stdout.write(f'Ran {count} jobs.')
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs.'))
+                return
+            if not count:
+                time.sleep(options['poll_interval'])
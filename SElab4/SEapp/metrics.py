@@ -0,0 +1,170 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Seconds, and numbers of queries.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+# The timings of the request being handled. Copied into the threads that
+# sync_to_async runs the ORM in, so queries of async views count as well.
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Where the time of one request went, in seconds per phase.
+    """
+    __slots__ = ('start', 'durations', 'queries', 'active')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = {}
+        self.queries = 0
+        self.active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total):
+        # Phases overlap: queries run during serialization of lazy relations, for example.
+        metrics = [f'db;dur={self.durations.get("db", 0.0) * 1000:.3f};desc="{self.queries} queries"']
+        metrics += [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.durations.items() if name != 'db']
+        metrics.append(f'total;dur={total * 1000:.3f}')
+        return ', '.join(metrics)
+
+
+@contextmanager
+def timed(name):
+    # Adds the time spent in the block to the current request, once: nested
+    # blocks of the same name (a serializer inside a serializer) are not counted twice.
+    timings = current_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+        timings.active.discard(name)
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Connected to connection_created, so every connection in every thread records.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        # labels -> [count per bucket (the last one is +Inf), sum]
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def expose(self, label_names):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(self.series.items()):
+            label_text = ','.join(f'{name}="{escape(value)}"' for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total!r}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class RequestMetrics:
+    """
+    Route-labelled histograms of request timings, kept in process memory and
+    exposed in the Prometheus text format. Each worker process has its own.
+    """
+    label_names = ('view', 'action', 'method')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = self.create_histograms()
+
+    def create_histograms(self):
+        return {
+            'total': Histogram('seapp_request_duration_seconds', 'Time to handle the request.', DURATION_BUCKETS),
+            'db': Histogram('seapp_request_db_seconds', 'Time spent in SQL queries.', DURATION_BUCKETS),
+            'queries': Histogram('seapp_request_db_queries', 'SQL queries per request.', QUERY_BUCKETS),
+            'auth': Histogram('seapp_request_auth_seconds', 'Time spent authenticating.', DURATION_BUCKETS),
+            'serialize': Histogram('seapp_request_serialize_seconds', 'Time spent serializing data.',
+                                   DURATION_BUCKETS),
+            'render': Histogram('seapp_request_render_seconds', 'Time spent rendering the response body.',
+                                DURATION_BUCKETS),
+        }
+
+    def reset(self):
+        with self.lock:
+            self.histograms = self.create_histograms()
+
+    def observe(self, labels, timings, total):
+        with self.lock:
+            self.histograms['total'].observe(labels, total)
+            self.histograms['queries'].observe(labels, timings.queries)
+            for name in ('db', 'auth', 'serialize', 'render'):
+                self.histograms[name].observe(labels, timings.durations.get(name, 0.0))
+
+    def expose(self):
+        with self.lock:
+            lines = []
+            for histogram in self.histograms.values():
+                lines += histogram.expose(self.label_names)
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def route_labels(request):
+    # Viewset and action (ProductViewSet, list), or the view class and method
+    # handler of other views. Unmatched paths share one label, so scanning
+    # clients cannot create series without bound.
+    match = getattr(request, 'resolver_match', None)
+    method = request.method if request.method in HTTP_METHODS else 'OTHER'
+    if match is None:
+        return ('unmatched', '', method)
+    view = match.func
+    cls = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+    actions = getattr(view, 'actions', None)
+    if cls is None:
+        return (match.view_name or view.__name__, '', method)
+    if actions:
+        return (cls.__name__, actions.get(method.lower(), ''), method)
+    return (cls.__name__, method.lower(), method)
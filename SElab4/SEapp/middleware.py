@@ -0,0 +1,97 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+from .metrics import RequestTimings, current_timings, request_metrics, route_labels
+from .querycheck import checking_queries
+
+
+class TimingMiddleware:
+    """
+    Times every request: SQL queries (count and time), authentication,
+    serialization, rendering and the total. The timings go into the
+    route-labelled histograms served at /metrics and, with
+    SERVER_TIMING_HEADER, out in a Server-Timing header.
+
+    Put it first, so the total covers the other middleware as well.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        total = timings.total()
+        request_metrics.observe(route_labels(request), timings, total)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+
+class QueryCheckMiddleware:
+    """
+    Runs every request under checking_queries() when QUERY_CHECK is set:
+    'log' logs what it finds, 'raise' fails the request with QueryCheckError.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.QUERY_CHECK:
+            return self.get_response(request)
+        with checking_queries(f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not settings.QUERY_CHECK:
+            return await self.get_response(request)
+        with checking_queries(f'{request.method} {request.path}'):
+            return await self.get_response(request)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves responses shorter than GZIP_MIN_LENGTH bytes
+    alone: for those, compressing costs more time than it saves on the wire.
+    Event streams are not compressed either.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_LENGTH:
+            return response
+        # Compressing would hold events back until a compressed block fills up.
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:46
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model('SEapp', 'Order')
+    lines = Order.products.through.objects.filter(order=OuterRef('pk'))
+    total = lines.values('order').annotate(total=Sum('product__price')).values('total')
+    Order.objects.update(
+        total_price=Coalesce(Subquery(total), Value(0.0)),
+        fulfilled=~Exists(lines.filter(product__available=False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SEapp', '0004_alter_customer_name_alter_product_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='fulfilled',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SEapp', '0005_order_total_price_fulfilled'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['date', 'id'], name='order_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:49
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The GIN indexes and the trigger are PostgreSQL only, so they are created here
+# instead of being declared on the model (SQLite test databases skip them).
+FORWARD_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION seapp_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := to_tsvector('english', coalesce(NEW.name, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER seapp_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION seapp_product_search_vector_update()
+    """,
+    "UPDATE {table} SET search_vector = to_tsvector('english', coalesce(name, ''))",
+    "CREATE INDEX product_search_vector_idx ON {table} USING gin (search_vector)",
+    "CREATE INDEX product_name_trgm_idx ON {table} USING gin (name gin_trgm_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS product_name_trgm_idx",
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "DROP TRIGGER IF EXISTS seapp_product_search_vector_trigger ON {table}",
+    "DROP FUNCTION IF EXISTS seapp_product_search_vector_update()",
+]
+
+
+def run_postgresql(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        table = schema_editor.quote_name(apps.get_model('SEapp', 'Product')._meta.db_table)
+        for statement in statements:
+            schema_editor.execute(statement.format(table=table))
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SEapp', '0006_order_date_id_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_postgresql(FORWARD_SQL), run_postgresql(REVERSE_SQL)),
+    ]
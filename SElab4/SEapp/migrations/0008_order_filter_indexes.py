@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SEapp', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'date', 'id'], name='order_status_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'date', 'id'], name='order_customer_date_id_idx'),
+        ),
+    ]
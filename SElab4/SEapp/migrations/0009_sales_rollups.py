@@ -0,0 +1,81 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:15
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    Order = apps.get_model('SEapp', 'Order')
+    DailySales = apps.get_model('SEapp', 'DailySales')
+    ProductSales = apps.get_model('SEapp', 'ProductSales')
+    CustomerSales = apps.get_model('SEapp', 'CustomerSales')
+    daily = Order.objects.values('status', day=TruncDate('date')).annotate(
+        orders=Count('id', distinct=True), units=Count('products'), revenue=Sum('products__price'),
+    ).order_by()
+    DailySales.objects.bulk_create(
+        [DailySales(**{**row, 'revenue': row['revenue'] or 0}) for row in daily.iterator()], batch_size=1000,
+    )
+    products = Order.products.through.objects.values('product_id', status=F('order__status')).annotate(
+        units=Count('id'), revenue=Sum('product__price'),
+    ).order_by()
+    ProductSales.objects.bulk_create([ProductSales(**row) for row in products.iterator()], batch_size=1000)
+    customers = Order.objects.values('customer_id', 'status').annotate(
+        orders=Count('id', distinct=True), units=Count('products'), revenue=Sum('products__price'),
+    ).order_by()
+    CustomerSales.objects.bulk_create(
+        [CustomerSales(**{**row, 'revenue': row['revenue'] or 0}) for row in customers.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SEapp', '0008_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('New', 'New'), ('In Process', 'In Process'), ('Sent', 'Sent'), ('Completed', 'Completed')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('customer_id', 'status'), name='customer_sales_customer_status_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('New', 'New'), ('In Process', 'In Process'), ('Sent', 'Sent'), ('Completed', 'Completed')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='daily_sales_day_status_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('New', 'New'), ('In Process', 'In Process'), ('Sent', 'Sent'), ('Completed', 'Completed')], max_length=20)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product_id', 'status'), name='product_sales_product_status_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SEapp', '0009_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChangeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('run_after', models.DateTimeField(db_index=True)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='SEapp.product')),
+            ],
+        ),
+    ]
@@ -1,5 +1,12 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Number of orders recomputed per UPDATE when a product change fans out.
+ORDER_TOTALS_BATCH_SIZE = 500
 
 
 def validate_price(value):
@@ -10,15 +17,56 @@ class Product(models.Model):
     name = models.CharField(max_length=255)
     price = models.FloatField(validators=[validate_price])
     available = models.BooleanField(default=True)
+    # Set on every write, for the changes feed (see SEapp.changes). Writes that
+    # bypass save() (update(), bulk_update(), the importer) set it themselves.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Filled by a database trigger on PostgreSQL, see migration 0007.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Fields whose changes have to be propagated to the orders containing the product.
+    TRACKED_FIELDS = ('price', 'available')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.TRACKED_FIELDS
+        }
+        return instance
+
+    def changed_tracked_fields(self):
+        loaded = getattr(self, '_loaded_values', {})
+        return [name for name, value in loaded.items() if getattr(self, name) != value]
 
     def save(self, *args, **kwargs):
         self.price = round(self.price, 2)
         super().save(*args, **kwargs)
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
 
 
 class Customer(models.Model):
     name = models.CharField(max_length=100)
     address = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class OrderQuerySet(models.QuerySet):
+    def refresh_totals(self):
+        # Recomputes the stored total and fulfilment flag of every order in the
+        # queryset with a single UPDATE.
+        lines = Order.products.through.objects.filter(order=OuterRef('pk'))
+        total = lines.values('order').annotate(total=Sum('product__price')).values('total')
+        return self.update(
+            total_price=Coalesce(Subquery(total), Value(0.0)),
+            fulfilled=~Exists(lines.filter(product__available=False)),
+            updated_at=timezone.now(),
+        )
+
+
+def refresh_order_totals(order_ids, batch_size=ORDER_TOTALS_BATCH_SIZE):
+    order_ids = list(order_ids)
+    for start in range(0, len(order_ids), batch_size):
+        Order.objects.filter(pk__in=order_ids[start:start + batch_size]).refresh_totals()
 
 
 class Order(models.Model):
@@ -28,15 +76,148 @@ class Order(models.Model):
         ('Sent', 'Sent'),
         ('Completed', 'Completed')
     ]
+    # The moves the transition endpoints allow (see SEapp.transitions): each
+    # status to the one after it.
+    STATUS_TRANSITIONS = {
+        current: {following} for (current, _), (following, _) in zip(STATUS_CHOICES, STATUS_CHOICES[1:])
+    }
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="orders")
     products = models.ManyToManyField(Product, related_name="orders")
     date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # Maintained by the signal handlers in SEapp.signals.
+    total_price = models.FloatField(default=0, editable=False)
+    fulfilled = models.BooleanField(default=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination key of the order list.
+            models.Index(fields=['date', 'id'], name='order_date_id_idx'),
+            # The list filtered by status or customer, in the same order.
+            models.Index(fields=['status', 'date', 'id'], name='order_status_date_id_idx'),
+            models.Index(fields=['customer', 'date', 'id'], name='order_customer_date_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+        return instance
+
+    def status_changed(self):
+        # Whether status differs from the database, as far as this instance knows.
+        return getattr(self, '_loaded_status', None) != self.status
 
     def total_order_price(self):
-        return sum(product.price for product in self.products.all())
+        return self.total_price
 
     def is_order_fulfilled(self):
-        unavailable_products = [product for product in self.products.all() if not product.available]
-        return len(unavailable_products) == 0
+        return self.fulfilled
+
+
+def order_totals(products):
+    return {
+        'total_price': sum(product.price for product in products),
+        'fulfilled': all(product.available for product in products),
+    }
+
+
+def set_prefetched_products(order, products):
+    # Fills the prefetch cache so serializing order.products does not query.
+    queryset = order.products.all()
+    queryset._result_cache = list(products)
+    queryset._prefetch_done = True
+    order._prefetched_objects_cache = {**getattr(order, '_prefetched_objects_cache', {}), 'products': queryset}
+
+
+def link_order_products(orders, product_lists, batch_size=None):
+    # Writes the order lines of many orders with one bulk INSERT. No
+    # m2m_changed signal is sent: callers maintain totals and rollups.
+    Through = Order.products.through
+    Through.objects.bulk_create(
+        [
+            Through(order_id=order.pk, product_id=product.pk)
+            for order, products in zip(orders, product_lists)
+            for product in products
+        ],
+        batch_size=batch_size,
+    )
+    for order, products in zip(orders, product_lists):
+        set_prefetched_products(order, products)
+
+
+
+# Sales rollups, kept up to date by SEapp.rollups. They reference products
+# and customers by plain id, so rows outlive deletions and drop to zero instead.
+
+class DailySales(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='daily_sales_day_status_uniq'),
+        ]
+
+
+class ProductSales(models.Model):
+    product_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    units = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product_id', 'status'], name='product_sales_product_status_uniq'),
+        ]
+
+
+class CustomerSales(models.Model):
+    customer_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer_id', 'status'], name='customer_sales_customer_status_uniq'),
+        ]
+
+
+class ProductChangeJob(models.Model):
+    """
+    Queued recomputation of the orders containing a product whose price or
+    availability changed, run by the run_jobs worker (see SEapp.jobs). There
+    is one row per product: changes made before the job has run only bump
+    the version, so they are handled together.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='+')
+    version = models.PositiveIntegerField(default=1)
+    run_after = models.DateTimeField(db_index=True)
+    # Set while a worker runs the job. A worker that dies leaves it to expire.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+
+class Tombstone(models.Model):
+    """
+    Records the deletion of a product, customer or order, so the changes
+    feeds can report it. ``model`` is the model name, e.g. "order".
+    """
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ]
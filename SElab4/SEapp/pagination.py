@@ -0,0 +1,254 @@
+import math
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering key instead of using OFFSET,
+    so every page costs the same no matter how deep the client goes.
+
+    The cursor is an opaque token holding the ordering values of the row the
+    page starts after (or before, when paging backwards). The last field of
+    ``ordering`` must be unique, so that the key identifies exactly one row.
+    """
+    ordering = ('id',)
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    # ?count=exact runs COUNT(*), ?count=estimate asks the planner for a row estimate.
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        return self.paginate_rows(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view, count=False)
+        self.count = await self.aget_count(queryset, request)
+        return self.paginate_rows([row async for row in page_queryset.aiterator(chunk_size=self.page_size + 1)])
+
+    def get_page_queryset(self, queryset, request, view=None, count=True):
+        # Split from paginate_queryset so callers can evaluate the page queryset
+        # themselves (e.g. asynchronously) and pass the rows to paginate_rows().
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(self.get_ordering(request, queryset, view))
+        self.cursor = self.decode_cursor(request, queryset.model)
+        self.count = self.get_count(queryset, request) if count else None
+
+        if self.cursor is not None:
+            values, reverse = self.cursor
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+        else:
+            reverse = False
+        return queryset.order_by(*self.get_order_by(reverse))[:self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        reverse = self.cursor is not None and self.cursor[1]
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [field[1:] if field.startswith('-') else '-' + field for field in self.ordering]
+
+    def keyset_filter(self, values, reverse):
+        # (a, b) > (x, y) expanded to a >= x AND (a > x OR (a = x AND b > y)), which
+        # also works for mixed directions and keeps the index range on the first field.
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            term = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+            for previous, value in zip(self.ordering[:position], values):
+                term &= Q(**{previous.lstrip('-'): value})
+            condition |= term
+
+        first = self.ordering[0]
+        descending = first.startswith('-') != reverse
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if descending else 'gte'}": values[0]})
+        return bound & condition
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    async def aget_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return await queryset.acount()
+        if mode == 'estimate':
+            return await sync_to_async(estimate_count)(queryset)
+        return None
+
+    def get_row_values(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def encode_cursor(self, row, reverse):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value
+                  for value in self.get_row_values(row)]
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        token = b64encode(payload.encode('ascii'), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(b64decode(token.encode('ascii'), altchars=b'-_'))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return self.convert_cursor_values(model, values), reverse
+
+    def convert_cursor_values(self, model, values):
+        converted = []
+        for field, value in zip(self.ordering, values):
+            if value is None:
+                # The ordering fields are not nullable: a null only comes from a tampered cursor.
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                try:
+                    value = model._meta.get_field(field.lstrip('-')).to_python(value)
+                except FieldDoesNotExist:
+                    # Annotations (a relevance rank) are floats.
+                    value = float(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None or (isinstance(value, float) and not math.isfinite(value)):
+                raise NotFound(self.invalid_cursor_message)
+            converted.append(value)
+        return converted
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload.update({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Include a total count: 'exact' or 'estimate'.",
+                'schema': {'type': 'string', 'enum': ['exact', 'estimate']},
+            },
+        ]
+
+
+def estimate_count(queryset):
+    # The planner's row estimate costs a fraction of COUNT(*) on large tables.
+    # Only PostgreSQL exposes it, other databases get an exact count.
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+
+class ProductPagination(KeysetPagination):
+    ordering = ('id',)
+
+    def get_ordering(self, request, queryset, view):
+        # Search results are ordered by relevance first.
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank',) + self.ordering
+        return self.ordering
+
+
+class CustomerPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ('-date', '-id')
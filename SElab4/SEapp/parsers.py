@@ -0,0 +1,20 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses application/msgpack request bodies. Needs the optional msgpack package.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
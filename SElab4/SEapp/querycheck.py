@@ -0,0 +1,130 @@
+import logging
+import re
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# The check of the request being handled, None outside of checked requests.
+current_check = ContextVar('current_query_check', default=None)
+
+# Parts of a statement that vary between executions of the same code: IN
+# lists of any length, and literals (LIMIT 21, LIMIT 41).
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r'\s+')
+
+# Execute wrappers, which are on the stack of every query.
+WRAPPER_FILES = {str(Path(__file__).resolve()), str(Path(metrics.__file__).resolve())}
+
+
+class QueryCheckError(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    sql = PLACEHOLDER_LIST.sub('%s', sql)
+    return WHITESPACE.sub(' ', LITERAL.sub('?', sql)).strip()
+
+
+def origin():
+    # The innermost frame of the project's own code that led to the query.
+    base = str(settings.BASE_DIR)
+    for frame, lineno in traceback.walk_stack(None):
+        filename = frame.f_code.co_filename
+        if filename.startswith(base) and filename not in WRAPPER_FILES and 'site-packages' not in filename:
+            return f'{Path(filename).relative_to(base)}:{lineno} in {frame.f_code.co_name}'
+    return 'unknown'
+
+
+class QueryCheck:
+    """
+    Watches the queries of one request for statements repeated at least
+    QUERY_CHECK_REPEATS times (the N+1 pattern: the same query per row) and
+    statements slower than QUERY_CHECK_SLOW_MS.
+    """
+
+    def __init__(self, repeats, slow_seconds):
+        self.repeats = repeats
+        self.slow_seconds = slow_seconds
+        self.counts = {}
+        # fingerprint -> where the statement was repeated
+        self.repeated = {}
+        self.slow = []
+        self.allowed = 0
+
+    def record(self, sql, seconds):
+        if self.allowed:
+            return
+        key = fingerprint(sql)
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+        if count == self.repeats:
+            self.repeated[key] = origin()
+        if seconds >= self.slow_seconds:
+            self.slow.append((seconds, sql, origin()))
+
+    def violations(self):
+        messages = [
+            f'{self.counts[key]} similar queries at {where}: {key}' for key, where in self.repeated.items()
+        ]
+        messages += [f'Slow query ({seconds * 1000:.1f} ms) at {where}: {sql}' for seconds, sql, where in self.slow]
+        return messages
+
+    def report(self, label):
+        messages = self.violations()
+        if not messages:
+            return
+        if settings.QUERY_CHECK == 'raise':
+            raise QueryCheckError('\n'.join([f'Query check failed for {label}:'] + messages))
+        for message in messages:
+            logger.warning('%s: %s', label, message)
+
+
+def check_query(execute, sql, params, many, context):
+    check = current_check.get()
+    if check is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        check.record(sql, time.perf_counter() - start)
+
+
+def install_query_check(sender, connection, **kwargs):
+    if check_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(check_query)
+
+
+@contextmanager
+def checking_queries(label):
+    # Checks the queries run inside the block, and reports as QUERY_CHECK says.
+    check = QueryCheck(settings.QUERY_CHECK_REPEATS, settings.QUERY_CHECK_SLOW_MS / 1000)
+    token = current_check.set(check)
+    try:
+        yield check
+    finally:
+        current_check.reset(token)
+    check.report(label)
+
+
+@contextmanager
+def allow_repeated_queries():
+    # For loops that repeat a statement on purpose, such as batched writes.
+    check = current_check.get()
+    if check is None:
+        yield
+        return
+    check.allowed += 1
+    try:
+        yield
+    finally:
+        check.allowed -= 1
+
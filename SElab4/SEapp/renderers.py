@@ -0,0 +1,88 @@
+import json
+import re
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .metrics import timed
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Floats orjson writes differently from the json module: exponents (1e16
+# against 1e+16) and small numbers (0.00001 against 1e-05). A match may be a
+# false positive inside a string; the output is then simply produced again.
+DIVERGING_FLOAT = re.compile(rb'\d[eE]|0\.0000')
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed and the result
+    is byte for byte what JSONRenderer would produce. Anything else (indented
+    or ASCII-only output, types orjson rejects, floats it formats differently)
+    goes through JSONRenderer itself.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self.encode(data, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if DIVERGING_FLOAT.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes the two line terminators that JavaScript does not allow in strings.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renders application/msgpack. Values MessagePack has no type for (dates,
+    decimals, UUIDs) are converted as for JSON, so both carry the same data.
+    Needs the optional msgpack package.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed('render'):
+            return msgpack.packb(data, default=encoders.JSONEncoder().default, use_bin_type=True)
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """
+    Lets views that stream text/event-stream pass content negotiation, and
+    renders their error responses (401, 404) as a single "error" event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return format_event('error', data).encode('utf-8')
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=encoders.JSONEncoder, separators=(",", ":"))}\n\n'
@@ -0,0 +1,157 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Order, DailySales, ProductSales, CustomerSales, ORDER_TOTALS_BATCH_SIZE
+
+ROLLUP_BATCH_SIZE = 1000
+
+# Set while a caller updates the rollups for a whole batch itself, so the
+# per-object signal handlers stand aside.
+_manual = ContextVar('manual_rollups', default=False)
+
+
+def daily_totals(orders):
+    return orders.values('status', day=TruncDate('date')).annotate(
+        orders=Count('id', distinct=True), units=Count('products'), revenue=Sum('products__price'),
+    ).order_by()
+
+
+def product_totals(orders):
+    return Order.products.through.objects.filter(order__in=orders).values(
+        'product_id', status=F('order__status'),
+    ).annotate(units=Count('id'), revenue=Sum('product__price')).order_by()
+
+
+def customer_totals(orders):
+    return orders.values('customer_id', 'status').annotate(
+        orders=Count('id', distinct=True), units=Count('products'), revenue=Sum('products__price'),
+    ).order_by()
+
+
+# (model, key fields, summed fields, aggregate over an Order queryset)
+ROLLUPS = [
+    (DailySales, ('day', 'status'), ('orders', 'units', 'revenue'), daily_totals),
+    (ProductSales, ('product_id', 'status'), ('units', 'revenue'), product_totals),
+    (CustomerSales, ('customer_id', 'status'), ('orders', 'units', 'revenue'), customer_totals),
+]
+
+
+class RollupDelta:
+    """
+    Collects a change to the sales rollups: subtract() what some orders
+    contribute before they are changed, add() it again afterwards and apply()
+    the difference as increments, so only the touched rollup rows are written.
+    """
+
+    def __init__(self):
+        self.changes = {model: defaultdict(lambda size=len(values): [0] * size) for model, _, values, _ in ROLLUPS}
+
+    def subtract(self, order_ids):
+        return self.collect(order_ids, -1)
+
+    def add(self, order_ids):
+        return self.collect(order_ids, 1)
+
+    def collect(self, order_ids, sign):
+        order_ids = list(order_ids)
+        for start in range(0, len(order_ids), ORDER_TOTALS_BATCH_SIZE):
+            orders = Order.objects.filter(pk__in=order_ids[start:start + ORDER_TOTALS_BATCH_SIZE])
+            for model, keys, values, totals in ROLLUPS:
+                changes = self.changes[model]
+                for row in totals(orders):
+                    change = changes[tuple(row[key] for key in keys)]
+                    for position, name in enumerate(values):
+                        change[position] += sign * (row[name] or 0)
+        return self
+
+    def restatus(self, order_ids, previous_status):
+        # The orders just moved from previous_status to the status they have
+        # now: what they contribute moves between the rows of the two, read
+        # in one pass instead of a subtract() before the move and an add() after.
+        order_ids = list(order_ids)
+        for start in range(0, len(order_ids), ORDER_TOTALS_BATCH_SIZE):
+            orders = Order.objects.filter(pk__in=order_ids[start:start + ORDER_TOTALS_BATCH_SIZE])
+            for model, keys, values, totals in ROLLUPS:
+                changes = self.changes[model]
+                for row in totals(orders):
+                    for status, sign in ((row['status'], 1), (previous_status, -1)):
+                        change = changes[tuple(status if key == 'status' else row[key] for key in keys)]
+                        for position, name in enumerate(values):
+                            change[position] += sign * (row[name] or 0)
+        return self
+
+    def reprice(self, product_id, difference):
+        # A new price only moves the revenue of the product's order lines, by
+        # the difference per unit: one grouped query instead of collect().
+        lines = Order.products.through.objects.filter(product_id=product_id).values(
+            customer_id=F('order__customer_id'), status=F('order__status'), day=TruncDate('order__date'),
+        ).annotate(units=Count('id')).order_by()
+        for row in lines:
+            row['product_id'] = product_id
+            for model, keys, values, _ in ROLLUPS:
+                change = self.changes[model][tuple(row[key] for key in keys)]
+                change[values.index('revenue')] += difference * row['units']
+        return self
+
+    def apply(self):
+        for model, keys, values, _ in ROLLUPS:
+            rows = [key + tuple(change) for key, change in self.changes[model].items() if any(change)]
+            if rows:
+                increment_rows(model, keys, values, rows)
+            self.changes[model].clear()
+
+
+@contextmanager
+def manual_rollups():
+    token = _manual.set(True)
+    try:
+        yield
+    finally:
+        _manual.reset(token)
+
+
+def rollups_are_manual():
+    return _manual.get()
+
+
+def increment_rows(model, keys, values, rows):
+    # INSERT ... ON CONFLICT DO UPDATE with increments, which PostgreSQL and
+    # SQLite spell the same way: one statement per batch and no lost updates.
+    fields = [model._meta.get_field(name) for name in keys + values]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(field.column) for field in fields)
+    conflict = ', '.join(quote(field.column) for field in fields[:len(keys)])
+    updates = ', '.join(
+        f'{quote(field.column)} = {table}.{quote(field.column)} + excluded.{quote(field.column)}'
+        for field in fields[len(keys):]
+    )
+    row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    max_params = connection.features.max_query_params
+    batch_size = min(max_params // len(fields), ROLLUP_BATCH_SIZE) if max_params else ROLLUP_BATCH_SIZE
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join([row_sql] * len(batch))} '
+                f'ON CONFLICT ({conflict}) DO UPDATE SET {updates}',
+                [field.get_db_prep_value(value, connection) for row in batch for field, value in zip(fields, row)],
+            )
+
+
+def rebuild_rollups():
+    with transaction.atomic():
+        for model, keys, values, totals in ROLLUPS:
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                [
+                    model(**{name: row[name] or 0 for name in values}, **{key: row[key] for key in keys})
+                    for row in totals(Order.objects.all()).iterator()
+                ],
+                batch_size=ROLLUP_BATCH_SIZE,
+            )
@@ -1,26 +1,171 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Product, Customer, Order
+from .metrics import timed
+from .models import Product, Customer, Order, link_order_products, order_totals, set_prefetched_products
+from .rollups import RollupDelta, manual_rollups
 
+INVALID_PK_MESSAGE = 'Invalid pk "{}" - object does not exist.'
+UNAVAILABLE_PK_MESSAGE = 'Product "{}" is not available.'
+# Orders a batch transition may name, all moved by one UPDATE.
+TRANSITION_BATCH_SIZE = 500
 
-class ProductSerializer(serializers.ModelSerializer):
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Counts the time spent producing ``data`` towards the request's
+    serialization time (see SEapp.metrics); many=True lists need
+    ``Meta.list_serializer_class = TimedListSerializer``.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Keeps only the fields named in the 'fields' context entry (all when it is
+    None) and renders the relations in 'expand' with their
+    ``Meta.expandable_fields`` serializer. See SEapp.fieldsets.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in self.context.get('expand') or ():
+            if name in self.fields:
+                self.fields[name] = self.Meta.expandable_fields[name](read_only=True)
+
+
+class ProductSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'
+        fields = ['id', 'name', 'price', 'available']
+        list_serializer_class = TimedListSerializer
 
     def validate(self, data):
         if not data:
             raise serializers.ValidationError("At least one field is required for update.")
         return data
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = ['id', 'name', 'address']
+        list_serializer_class = TimedListSerializer
+
+class OrderProductsField(serializers.ListField):
+    """
+    Written as a list of product ids, read as the nested products.
+    """
+    child = serializers.IntegerField()
 
-class OrderSerializer(serializers.ModelSerializer):
-    products = ProductSerializer(many=True)
+    def to_representation(self, value):
+        return ProductSerializer(value.all(), many=True).data
+
+
+class OrderSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    products = OrderProductsField(allow_empty=True)
+    total_order_price = serializers.FloatField(source='total_price', read_only=True)
+    is_order_fulfilled = serializers.BooleanField(source='fulfilled', read_only=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'customer', 'products', 'date', 'status', 'total_order_price']
-        read_only_fields = ['total_order_price']
\ No newline at end of file
+        fields = ['id', 'customer', 'products', 'date', 'status', 'total_order_price', 'is_order_fulfilled']
+        expandable_fields = {'customer': CustomerSerializer}
+        list_serializer_class = TimedListSerializer
+
+    def validate_products(self, value):
+        # One query for all ids. Products the order already contains may stay
+        # in it after they became unavailable; only new lines need stock.
+        ids = list(dict.fromkeys(value))
+        products = Product.objects.in_bulk(ids)
+        linked = {product.pk for product in self.instance.products.all()} if self.instance else set()
+        errors = []
+        for pk in ids:
+            if pk not in products:
+                errors.append(INVALID_PK_MESSAGE.format(pk))
+            elif not products[pk].available and pk not in linked:
+                errors.append(UNAVAILABLE_PK_MESSAGE.format(pk))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [products[pk] for pk in ids]
+
+    def create(self, validated_data):
+        products = validated_data.pop('products')
+        order = Order(**validated_data, **order_totals(products))
+        with transaction.atomic():
+            with manual_rollups():
+                order.save()
+                link_order_products([order], [products])
+            RollupDelta().add([order.pk]).apply()
+        return order
+
+    def update(self, instance, validated_data):
+        products = validated_data.pop('products', None)
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        with transaction.atomic():
+            rollups = RollupDelta().subtract([instance.pk])
+            with manual_rollups():
+                if products is not None:
+                    for name, value in order_totals(products).items():
+                        setattr(instance, name, value)
+                instance.save()
+                if products is not None:
+                    self.relink_products(instance, products)
+            rollups.add([instance.pk]).apply()
+        return instance
+
+    def relink_products(self, order, products):
+        # Only the lines that differ are deleted or inserted.
+        current = {product.pk for product in order.products.all()}
+        wanted = {product.pk for product in products}
+        if current - wanted:
+            Order.products.through.objects.filter(order=order, product_id__in=current - wanted).delete()
+        link_order_products([order], [[product for product in products if product.pk not in current]])
+        set_prefetched_products(order, products)
+
+
+class OrderBulkItemSerializer(serializers.Serializer):
+    # Ids are resolved for the whole batch at once by OrderBulkMixin.
+    id = serializers.IntegerField(required=False)
+    customer = serializers.IntegerField()
+    products = serializers.ListField(child=serializers.IntegerField(), allow_empty=True)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    # expected is the status the order must still have for the move to happen;
+    # it defaults to the only status that can move to status.
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    expected = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+    def validate(self, data):
+        if 'expected' not in data:
+            sources = [current for current, targets in Order.STATUS_TRANSITIONS.items() if data['status'] in targets]
+            if len(sources) != 1:
+                raise serializers.ValidationError({'expected': ['This field is required.']})
+            data['expected'] = sources[0]
+        if data['status'] not in Order.STATUS_TRANSITIONS.get(data['expected'], ()):
+            raise serializers.ValidationError(
+                {'status': [f'An order cannot move from "{data["expected"]}" to "{data["status"]}".']}
+            )
+        return data
+
+
+class OrderBatchTransitionSerializer(OrderTransitionSerializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=TRANSITION_BATCH_SIZE,
+    )
@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .authentication import user_cache
+from .cache import invalidate_model
+from .changes import record_deletion
+from .events import publish_order_status
+from .jobs import enqueue_product_change, product_fanout_is_deferred
+from .models import Product, Customer, Order, refresh_order_totals
+from .rollups import RollupDelta, rollups_are_manual
+
+
+# Changes to orders are mirrored into the sales rollups by subtracting what
+# the affected orders contributed before the change and adding it back after.
+
+@receiver(m2m_changed, sender=Order.products.through)
+def order_products_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('pre_add', 'pre_remove', 'pre_clear'):
+            instance._rollup_delta = RollupDelta().subtract([instance.pk])
+        elif action in ('post_add', 'post_remove', 'post_clear'):
+            Order.objects.filter(pk=instance.pk).refresh_totals()
+            instance.refresh_from_db(fields=['total_price', 'fulfilled'])
+            instance.__dict__.pop('_rollup_delta', RollupDelta()).add([instance.pk]).apply()
+        return
+
+    # product.orders.add/remove/clear(): the instance is a product and pk_set holds order ids.
+    if action == 'pre_clear':
+        instance._cleared_order_ids = list(instance.orders.values_list('pk', flat=True))
+        instance._rollup_delta = RollupDelta().subtract(instance._cleared_order_ids)
+    elif action in ('pre_add', 'pre_remove'):
+        instance._rollup_delta = RollupDelta().subtract(pk_set)
+    elif action in ('post_clear', 'post_add', 'post_remove'):
+        order_ids = instance.__dict__.pop('_cleared_order_ids', []) if action == 'post_clear' else pk_set
+        refresh_order_totals(order_ids)
+        instance.__dict__.pop('_rollup_delta', RollupDelta()).add(order_ids).apply()
+
+
+@receiver(pre_save, sender=Order)
+def order_saving(sender, instance, **kwargs):
+    if not instance._state.adding and not rollups_are_manual():
+        instance._rollup_delta = RollupDelta().subtract([instance.pk])
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, **kwargs):
+    if not rollups_are_manual():
+        instance.__dict__.pop('_rollup_delta', RollupDelta()).add([instance.pk]).apply()
+
+
+@receiver(post_save, sender=Order)
+def order_status_saved(sender, instance, created, using, **kwargs):
+    if created or instance.status_changed():
+        publish_order_status([(instance.pk, instance.status)], using=using)
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleting(sender, instance, **kwargs):
+    if not rollups_are_manual():
+        RollupDelta().subtract([instance.pk]).apply()
+
+
+@receiver(pre_save, sender=Product)
+def product_saving(sender, instance, **kwargs):
+    # Only the price feeds into the rollups.
+    if instance._state.adding or product_fanout_is_deferred():
+        return
+    if 'price' in instance.changed_tracked_fields():
+        instance._rollup_order_ids = list(instance.orders.values_list('pk', flat=True))
+        instance._rollup_delta = RollupDelta().subtract(instance._rollup_order_ids)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    changed = [] if created else instance.changed_tracked_fields()
+    if changed and product_fanout_is_deferred():
+        # The rollups are corrected now, the orders by a queued job.
+        if 'price' in changed:
+            RollupDelta().reprice(instance.pk, instance.price - instance._loaded_values['price']).apply()
+        enqueue_product_change(instance.pk)
+    elif changed:
+        order_ids = instance.__dict__.pop('_rollup_order_ids', None)
+        if order_ids is None:
+            order_ids = instance.orders.values_list('pk', flat=True)
+        refresh_order_totals(order_ids)
+        if '_rollup_delta' in instance.__dict__:
+            instance.__dict__.pop('_rollup_delta').add(order_ids).apply()
+
+
+def product_deletion(instance, origin):
+    # Where the rollup work of a product delete is kept: on the queryset for
+    # a queryset delete, whose products share it, otherwise on the product.
+    return origin if isinstance(origin, QuerySet) else instance
+
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, origin=None, **kwargs):
+    # The m2m rows are removed by the cascade without an m2m_changed signal.
+    # A queryset delete sends every pre_delete before it removes any row, so
+    # the orders of all its products are subtracted once, by the first one:
+    # per product, an order holding two of them would be subtracted twice.
+    if rollups_are_manual():
+        return
+    holder = product_deletion(instance, origin)
+    deletion = holder.__dict__.get('_product_deletion')
+    if deletion is None:
+        products = holder.values('pk') if isinstance(holder, QuerySet) else [instance.pk]
+        order_ids = list(Order.products.through.objects.filter(
+            product__in=products,
+        ).values_list('order_id', flat=True).distinct())
+        deletion = holder._product_deletion = {
+            'order_ids': order_ids, 'rollups': RollupDelta().subtract(order_ids), 'pending': 0,
+        }
+    deletion['pending'] += 1
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, origin=None, **kwargs):
+    # Every row of the batch is gone by the first post_delete.
+    holder = product_deletion(instance, origin)
+    deletion = holder.__dict__.get('_product_deletion')
+    if deletion is None:
+        return
+    if deletion['rollups'] is not None:
+        refresh_order_totals(deletion['order_ids'])
+        deletion['rollups'].add(deletion['order_ids']).apply()
+        deletion['rollups'] = None
+    deletion['pending'] -= 1
+    if not deletion['pending']:
+        del holder._product_deletion
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Order)
+def record_tombstone(sender, instance, **kwargs):
+    record_deletion(sender, instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_cached_reads(sender, **kwargs):
+    invalidate_model(sender)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
@@ -0,0 +1,19 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class QueryCheckRunner(DiscoverRunner):
+    """
+    Runs the tests with QUERY_CHECK = 'raise', so a request that repeats a
+    query per row fails its test. Slow queries are not checked: timings on a
+    busy CI machine would fail tests at random.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.query_check_settings = override_settings(QUERY_CHECK='raise', QUERY_CHECK_SLOW_MS=float('inf'))
+        self.query_check_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.query_check_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.async_views import AsyncProductView, AsyncCustomerView, AsyncOrderView
+from SEapp.models import Product, Customer, Order
+
+
+class AsyncReadViewsTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.products = [Product.objects.create(name=f"Shampoo {i}", price=1.0 + i) for i in range(5)]
+        self.customer = Customer.objects.create(name="John Doe", address="123 Main St")
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(*self.products[:2])
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_views_are_async(self):
+        for view in (AsyncProductView, AsyncCustomerView, AsyncOrderView):
+            self.assertTrue(view.view_is_async)
+
+    def test_responses_match_the_sync_views(self):
+        for name, pk in (('product', self.products[0].pk), ('customer', self.customer.pk),
+                         ('order', self.order.pk)):
+            for suffix, kwargs in (('list', {}), ('detail', {'pk': pk})):
+                sync = self.client.get(reverse(f'{name}-{suffix}', kwargs=kwargs))
+                response = self.client.get(reverse(f'async-{name}-{suffix}', kwargs=kwargs))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), sync.json())
+
+    def test_list_pages_and_counts(self):
+        response = self.client.get(reverse('async-product-list') + '?page_size=2&count=exact')
+        self.assertEqual(response.data['count'], 5)
+        ids = [item['id'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [product.id for product in self.products[:4]])
+
+    def test_search(self):
+        Product.objects.create(name="Hair Brush", price=4.0)
+        response = self.client.get(reverse('async-product-list') + '?search=brush')
+        self.assertEqual([item['name'] for item in response.data['results']], ["Hair Brush"])
+
+    def test_missing_object(self):
+        response = self.client.get(reverse('async-order-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.get(reverse('async-customer-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_is_read_only(self):
+        response = self.client.post(reverse('async-product-list'), {"name": "New", "price": 1.0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_async_client(self):
+        response = await AsyncClient().get(
+            reverse('async-order-detail', kwargs={'pk': self.order.pk}),
+            headers={'Authorization': f'Bearer {AccessToken.for_user(self.user)}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total_order_price'], 3.0)
+
+    def test_cached_reads_are_shared_with_conditional_requests(self):
+        url = reverse('async-customer-detail', kwargs={'pk': self.customer.pk})
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(reverse('customer-detail', kwargs={'pk': self.customer.pk}),
+                          {"address": "456 Elm St"}, format='json')
+        response = self.client.get(url)
+        self.assertEqual(response.data['address'], "456 Elm St")
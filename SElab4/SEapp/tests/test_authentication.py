@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.authentication import UserCache
+
+
+def user_queries(context):
+    return [query for query in context.captured_queries if 'auth_user' in query['sql']]
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.authenticate_user(self.admin)
+        self.url = reverse('customer-list')
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_is_loaded_once(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(user_queries(first)), 1)
+        self.assertEqual(user_queries(second), [])
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.url)
+        self.admin.is_active = False
+        self.admin.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_flag_change_applies_immediately(self):
+        self.client.get(self.url)
+        self.admin.is_staff = False
+        self.admin.save()
+        response = self.client.post(reverse('product-list'), {"name": "Product", "price": 1.0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_revokes_tokens(self):
+        self.client.get(self.url)
+        self.admin.set_password('newpassword')
+        self.admin.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def authenticate_with_legacy_token(self):
+        # As issued before CHECK_REVOKE_TOKEN was turned on.
+        token = AccessToken.for_user(self.admin)
+        del token[api_settings.REVOKE_TOKEN_CLAIM]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @override_settings(AUTH_LEGACY_TOKENS=True)
+    def test_tokens_without_the_password_claim_are_accepted_while_staged(self):
+        self.authenticate_with_legacy_token()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.admin.is_active = False
+        self.admin.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_LEGACY_TOKENS=False)
+    def test_tokens_without_the_password_claim_are_rejected_afterwards(self):
+        self.authenticate_with_legacy_token()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(self.url)
+        self.admin.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_STATELESS_TOKENS=True)
+    def test_stateless_tokens_skip_the_user_query(self):
+        response = self.client.post(reverse('token_obtain_pair'),
+                                    {"username": "testadmin", "password": "testpassword"}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('product-list'), {"name": "Product", "price": 1.0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(user_queries(context), [])
+
+    @override_settings(AUTH_STATELESS_TOKENS=True)
+    def test_stateless_tokens_carry_the_staff_flag(self):
+        User.objects.create_user(username='testuser', password='testpassword')
+        response = self.client.post(reverse('token_obtain_pair'),
+                                    {"username": "testuser", "password": "testpassword"}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('product-list'), {"name": "Product", "price": 1.0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class UserCacheTest(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserCache(max_size=2)
+        cache.set(('1', 'a'), 'one', ttl=60)
+        cache.set(('2', 'a'), 'two', ttl=60)
+        cache.get(('1', 'a'))
+        cache.set(('3', 'a'), 'three', ttl=60)
+        self.assertEqual(cache.get(('1', 'a')), 'one')
+        self.assertIsNone(cache.get(('2', 'a')))
+
+    def test_entries_expire(self):
+        cache = UserCache()
+        with mock.patch('SEapp.authentication.time.monotonic', return_value=100.0):
+            cache.set(('1', 'a'), 'one', ttl=10)
+        with mock.patch('SEapp.authentication.time.monotonic', return_value=109.0):
+            self.assertEqual(cache.get(('1', 'a')), 'one')
+        with mock.patch('SEapp.authentication.time.monotonic', return_value=110.0):
+            self.assertIsNone(cache.get(('1', 'a')))
+
+    def test_invalidate_drops_every_token_version(self):
+        cache = UserCache()
+        cache.set(('1', 'a'), 'one', ttl=60)
+        cache.set(('1', 'b'), 'one', ttl=60)
+        cache.set(('2', 'a'), 'two', ttl=60)
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(('1', 'a')))
+        self.assertIsNone(cache.get(('1', 'b')))
+        self.assertEqual(cache.get(('2', 'a')), 'two')
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.benchmarks import BenchmarkError, build_scenarios, compare_results, percentile, run_benchmarks
+from SEapp.models import Product, Customer, Order
+
+
+class BenchmarkRunnerTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+        self.products = [Product.objects.create(name=f"Shampoo {i}", price=1.0 + i) for i in range(3)]
+        self.customer = Customer.objects.create(name="Customer", address="123 Main St")
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(*self.products)
+
+    def test_every_scenario_runs_and_succeeds(self):
+        scenarios = build_scenarios([p.id for p in self.products], [self.customer.id], [self.order.id])
+        results = run_benchmarks(self.client, scenarios, iterations=3, warmup=1)
+        self.assertEqual(set(results['scenarios']), {scenario.name for scenario in scenarios})
+        for name, result in results['scenarios'].items():
+            self.assertTrue(all(200 <= code < 300 for code in result['statuses']), name)
+            if name.endswith(('create', 'patch')):
+                # Reads may be answered from the response and user caches.
+                self.assertGreater(result['queries'], 0, name)
+            self.assertGreater(result['peak_memory_kb'], 0, name)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+
+    def test_error_responses_fail_the_run(self):
+        Product.objects.filter(pk=self.products[0].pk).update(available=False)
+        scenarios = [scenario for scenario in build_scenarios([p.id for p in self.products], [self.customer.id],
+                                                              [self.order.id]) if scenario.name == 'orders-create']
+        with self.assertRaisesMessage(BenchmarkError, 'orders-create: responses with status 400'):
+            run_benchmarks(self.client, scenarios, iterations=3, warmup=1)
+
+    def test_command_needs_iterations(self):
+        with self.assertRaisesMessage(CommandError, '--iterations must be at least 1.'):
+            call_command('benchmark_api', '--iterations', '0')
+
+    def test_percentile_interpolates(self):
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 0.5), 3)
+        self.assertEqual(percentile([1, 2], 0.5), 1.5)
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+
+class CompareResultsTest(TestCase):
+    def result(self, p95, queries, memory=100.0, statuses=(200,)):
+        return {'latency_ms': {'p95': p95}, 'queries': queries, 'peak_memory_kb': memory, 'statuses': list(statuses)}
+
+    def test_regressions_past_threshold(self):
+        baseline = {'scenarios': {'products-list': self.result(10.0, 2), 'orders-list': self.result(10.0, 3)}}
+        current = {'scenarios': {
+            'products-list': self.result(11.5, 2),
+            'orders-list': self.result(13.0, 4, memory=200.0),
+            'customers-list': self.result(50.0, 9),
+        }}
+        regressions = compare_results(baseline, current, threshold=0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(line.startswith('orders-list') for line in regressions))
+
+    def test_error_responses_are_regressions(self):
+        baseline = {'scenarios': {'orders-create': self.result(10.0, 5)}}
+        current = {'scenarios': {'orders-create': self.result(2.0, 1, statuses=(201, 400))}}
+        self.assertEqual(compare_results(baseline, current, threshold=0.2),
+                         ['orders-create: responses with status 400'])
@@ -0,0 +1,251 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.models import Product, Customer, Order
+
+
+class BulkApiTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.regular_user = User.objects.create_user(username='testuser', password='testpassword')
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.authenticate_user(self.admin)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+class ProductBulkApiTest(BulkApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('product-bulk')
+
+    def test_bulk_create_products(self):
+        data = [{"name": f"Product {i}", "price": 1.005 + i, "available": True} for i in range(50)]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Product.objects.count(), 50)
+        self.assertEqual(Product.objects.get(name="Product 0").price, round(1.005, 2))
+        inserts = [query for query in context.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        data = [
+            {"name": "Valid", "price": 1.99},
+            {"name": "", "price": -1},
+            {"name": "Also valid", "price": 2.99},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('name', response.data['errors'][0]['errors'])
+        self.assertIn('price', response.data['errors'][0]['errors'])
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_atomic_bulk_create_writes_nothing_on_error(self):
+        data = [{"name": "Valid", "price": 1.99}, {"name": "Invalid", "price": -1}]
+        response = self.client.post(self.url + '?atomic=true', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Product.objects.count(), 0)
+
+    def test_bulk_requires_a_list(self):
+        response = self.client.post(self.url, {"name": "Single"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_requires_admin(self):
+        self.authenticate_user(self.regular_user)
+        response = self.client.post(self.url, [{"name": "Product", "price": 1.99}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_update_products_refreshes_orders(self):
+        products = [Product.objects.create(name=f"Product {i}", price=1.0) for i in range(3)]
+        customer = Customer.objects.create(name="Customer", address="123 Main St")
+        order = Order.objects.create(customer=customer, status='New')
+        order.products.add(*products)
+
+        data = [
+            {"id": products[0].id, "price": 5.0},
+            {"id": products[1].id, "available": False},
+            {"id": 999, "price": 1.0},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, 7.0)
+        self.assertFalse(order.fulfilled)
+
+    def test_bulk_update_rejects_repeated_ids(self):
+        product = Product.objects.create(name="Product", price=1.0)
+        response = self.client.patch(self.url, [{"id": product.id, "price": 2.0}, {"id": product.id, "price": 3.0}],
+                                     format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['errors'], [
+            {'index': 1, 'errors': {'id': [f'Id "{product.id}" appears more than once in the batch.']}},
+        ])
+        product.refresh_from_db()
+        self.assertEqual(product.price, 2.0)
+
+    def test_bulk_delete_products(self):
+        products = [Product.objects.create(name=f"Product {i}", price=1.0) for i in range(3)]
+        customer = Customer.objects.create(name="Customer", address="123 Main St")
+        order = Order.objects.create(customer=customer, status='New')
+        order.products.add(*products)
+
+        response = self.client.delete(self.url, [products[0].id, products[1].id, 999], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+        self.assertEqual(list(Product.objects.values_list('id', flat=True)), [products[2].id])
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, 1.0)
+
+    @override_settings(QUERY_CHECK='raise')
+    def test_bulk_delete_many_products_without_per_product_queries(self):
+        products = [Product.objects.create(name=f"Product {i}", price=1.0) for i in range(8)]
+        customer = Customer.objects.create(name="Customer", address="123 Main St")
+        order = Order.objects.create(customer=customer, status='New')
+        order.products.add(*products)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.delete(self.url, [product.id for product in products[:6]], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 6)
+        # The links are read once, by the bulk path; the per-product signal handlers stand aside.
+        link_reads = [query for query in context.captured_queries
+                      if query['sql'].startswith('SELECT DISTINCT "SEapp_order_products"."order_id"')]
+        self.assertEqual(len(link_reads), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, 2.0)
+
+
+class OrderBulkApiTest(BulkApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('order-bulk')
+        self.customer = Customer.objects.create(name="Customer", address="123 Main St")
+        self.products = [Product.objects.create(name=f"Product {i}", price=1.0 + i) for i in range(5)]
+        self.unavailable = Product.objects.create(name="Unavailable", price=10.0, available=False)
+
+    def order_payload(self, count):
+        return [
+            {"customer": self.customer.id, "status": "New", "products": [p.id for p in self.products[:i % 5 + 1]]}
+            for i in range(count)
+        ]
+
+    def test_bulk_create_orders_with_constant_queries(self):
+        self.client.get(reverse('order-list'))
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(self.url, self.order_payload(2), format='json')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(self.url, self.order_payload(40), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Order.objects.count(), 42)
+        self.assertEqual(Order.products.through.objects.count(), (1 + 2) + 8 * (1 + 2 + 3 + 4 + 5))
+
+    def test_bulk_create_orders_sets_totals(self):
+        data = [{"customer": self.customer.id, "status": "New",
+                 "products": [self.products[0].id, self.products[1].id]}]
+        response = self.client.post(self.url, data, format='json')
+        created = response.data['results'][0]
+        self.assertEqual(created['total_order_price'], 3.0)
+        self.assertTrue(created['is_order_fulfilled'])
+        self.assertEqual(len(created['products']), 2)
+        order = Order.objects.get(pk=created['id'])
+        self.assertEqual(order.total_price, 3.0)
+
+    def test_unavailable_products_only_stay_in_their_orders(self):
+        data = [{"customer": self.customer.id, "status": "New",
+                 "products": [self.products[0].id, self.unavailable.id]}]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['errors']['products'],
+                         [f'Product "{self.unavailable.id}" is not available.'])
+
+        holding, other = [Order.objects.create(customer=self.customer, status='New') for _ in range(2)]
+        holding.products.add(self.unavailable)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, [
+                {"id": holding.id, "products": [self.unavailable.id, self.products[0].id]},
+                {"id": other.id, "products": [self.unavailable.id]},
+            ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertEqual(response.data['results'][0]['total_order_price'], 11.0)
+        self.assertFalse(response.data['results'][0]['is_order_fulfilled'])
+        self.assertFalse(other.products.exists())
+        # The lines of all the orders are read at once.
+        link_reads = [query for query in queries if query['sql'].startswith(
+            'SELECT "SEapp_order_products"."order_id", "SEapp_order_products"."product_id"')]
+        self.assertEqual(len(link_reads), 1)
+
+    def test_bulk_create_orders_reports_unknown_ids(self):
+        data = [
+            {"customer": 999, "status": "New", "products": [self.products[0].id]},
+            {"customer": self.customer.id, "status": "New", "products": [998, self.products[0].id]},
+            {"customer": self.customer.id, "status": "Lost", "products": []},
+            {"customer": self.customer.id, "status": "New", "products": []},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(set(errors), {0, 1, 2})
+        self.assertIn('customer', errors[0])
+        self.assertIn('998', errors[1]['products'][0])
+        self.assertIn('status', errors[2])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_atomic_bulk_create_orders(self):
+        data = self.order_payload(3) + [{"customer": 999, "status": "New", "products": []}]
+        response = self.client.post(self.url + '?atomic=1', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_bulk_update_orders(self):
+        orders = [Order.objects.create(customer=self.customer, status='New') for _ in range(2)]
+        orders[0].products.add(self.products[0])
+        data = [
+            {"id": orders[0].id, "status": "Sent"},
+            {"id": orders[1].id, "products": [self.products[1].id, self.products[2].id]},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {order['id']: order for order in response.data['results']}
+        self.assertEqual(results[orders[0].id]['status'], 'Sent')
+        self.assertEqual(len(results[orders[0].id]['products']), 1)
+        self.assertEqual(results[orders[1].id]['total_order_price'], 5.0)
+
+        orders[1].refresh_from_db()
+        self.assertEqual(orders[1].total_price, 5.0)
+        self.assertEqual(set(orders[1].products.values_list('id', flat=True)),
+                         {self.products[1].id, self.products[2].id})
+
+    def test_bulk_update_rejects_repeated_ids(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        data = [{"id": order.id, "products": [self.products[0].id]}, {"id": order.id, "products": [self.products[1].id]}]
+        response = self.client.patch(self.url + '?atomic=1', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(order.products.values_list('id', flat=True)), [self.products[0].id])
+
+    def test_bulk_delete_orders(self):
+        orders = [Order.objects.create(customer=self.customer, status='New') for _ in range(3)]
+        response = self.client.delete(self.url, [orders[0].id, orders[1].id], format='json')
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(list(Order.objects.values_list('id', flat=True)), [orders[2].id])
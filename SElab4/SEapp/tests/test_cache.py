@@ -0,0 +1,113 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.cache import get_model_version
+from SEapp.models import Product, Customer
+
+
+class CachedReadTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = Product.objects.create(name='Temporary product', price=1.99, available=True)
+        self.product_list_url = reverse('product-list')
+        self.product_detail_url = reverse('product-detail', kwargs={'pk': self.product.id})
+        self.regular_user = User.objects.create_user(username='testuser', password='testpassword')
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_read_returns_validators(self):
+        self.authenticate_user(self.regular_user)
+        response = self.client.get(self.product_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_if_none_match_returns_not_modified(self):
+        self.authenticate_user(self.regular_user)
+        etag = self.client.get(self.product_list_url)['ETag']
+        response = self.client.get(self.product_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_not_modified(self):
+        self.authenticate_user(self.regular_user)
+        last_modified = self.client.get(self.product_list_url)['Last-Modified']
+        response = self.client.get(self.product_list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cache_hit_does_not_query_products(self):
+        self.authenticate_user(self.regular_user)
+        first = self.client.get(self.product_list_url)
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(self.product_list_url)
+        self.assertEqual(second.content, first.content)
+        self.assertFalse(any('SEapp_product' in query['sql'] for query in context.captured_queries))
+
+    def test_query_parameters_are_cached_separately(self):
+        Product.objects.create(name='Shampoo', price=10.49)
+        self.authenticate_user(self.regular_user)
+        everything = self.client.get(self.product_list_url)
+        searched = self.client.get(self.product_list_url, {'search': 'shampoo'})
+        self.assertNotEqual(everything['ETag'], searched['ETag'])
+        self.assertEqual(len(searched.json()['results']), 1)
+
+    @override_settings(ALLOWED_HOSTS=['api.example.com', 'internal'])
+    def test_links_are_cached_per_host(self):
+        Product.objects.create(name='Shampoo', price=10.49)
+        self.authenticate_user(self.regular_user)
+        public = self.client.get(self.product_list_url, {'page_size': 1}, HTTP_HOST='api.example.com')
+        internal = self.client.get(self.product_list_url, {'page_size': 1}, HTTP_HOST='internal')
+        self.assertTrue(public.json()['next'].startswith('http://api.example.com/'))
+        self.assertTrue(internal.json()['next'].startswith('http://internal/'))
+        self.assertNotEqual(public['ETag'], internal['ETag'])
+
+    def test_write_invalidates_cached_reads(self):
+        self.authenticate_user(self.admin)
+        etag = self.client.get(self.product_detail_url)['ETag']
+        version = get_model_version(Product)
+
+        self.client.patch(self.product_detail_url, {'name': 'Modified Product'}, format='json')
+        self.assertGreater(get_model_version(Product), version)
+
+        response = self.client.get(self.product_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['name'], 'Modified Product')
+
+    def test_delete_invalidates_cached_list(self):
+        self.authenticate_user(self.admin)
+        self.client.get(self.product_list_url)
+        self.client.delete(self.product_detail_url)
+        response = self.client.get(self.product_list_url)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_customer_reads_are_cached_per_model(self):
+        customer = Customer.objects.create(name='Jane Doe', address='123 Main St')
+        self.authenticate_user(self.regular_user)
+        url = reverse('customer-detail', kwargs={'pk': customer.id})
+        etag = self.client.get(url)['ETag']
+
+        Product.objects.create(name='Shampoo', price=10.49)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        customer.name = 'John Smith'
+        customer.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_unauthenticated_read_is_rejected_before_cache(self):
+        self.authenticate_user(self.regular_user)
+        etag = self.client.get(self.product_list_url)['ETag']
+        self.client.credentials()
+        response = self.client.get(self.product_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,130 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.importer import ProductImporter
+from SEapp.models import Product, Customer, Order, Tombstone
+from SEapp.tests.test_reports import rollup_snapshot
+
+
+@override_settings(CHANGES_FEED_LAG=0)
+class ChangesFeedTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.authenticate_user(self.admin)
+        self.products = [Product.objects.create(name=f"Product {i}", price=1.0 + i) for i in range(5)]
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def changes(self, name, token=None, **params):
+        if token:
+            params['since'] = token
+        response = self.client.get(reverse(f'{name}-changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.data
+
+    def sync(self, name, token=None, **params):
+        # Walks every batch of the window, returns (ids, deleted ids, next token).
+        ids, deleted = [], []
+        while True:
+            data = self.changes(name, token, **params)
+            ids += [row['id'] for row in data['results']]
+            deleted += data['deleted']
+            token = data['token']
+            if not data['more']:
+                return ids, deleted, token
+
+    def test_initial_sync_in_batches(self):
+        data = self.changes('product', page_size=2)
+        self.assertEqual([row['id'] for row in data['results']], [product.pk for product in self.products[:2]])
+        self.assertEqual(data['results'][0], {'id': self.products[0].pk, 'name': "Product 0", 'price': 1.0,
+                                              'available': True})
+        self.assertTrue(data['more'])
+
+        ids, deleted, _ = self.sync('product', page_size=2)
+        self.assertEqual(ids, [product.pk for product in self.products])
+        self.assertEqual(deleted, [])
+
+    def test_only_changes_since_the_token(self):
+        _, _, token = self.sync('product')
+        self.assertEqual(self.sync('product', token)[:2], ([], []))
+
+        created = Product.objects.create(name="New", price=3.0)
+        self.client.patch(reverse('product-detail', kwargs={'pk': self.products[3].pk}), {"name": "Renamed"},
+                          format='json')
+        self.client.delete(reverse('product-detail', kwargs={'pk': self.products[1].pk}))
+        ids, deleted, token = self.sync('product', token, page_size=1)
+        self.assertEqual(ids, [self.products[3].pk, created.pk])
+        self.assertEqual(deleted, [self.products[1].pk])
+        self.assertEqual(self.sync('product', token)[:2], ([], []))
+
+    def test_rows_changed_while_paging_are_not_lost(self):
+        _, _, token = self.sync('product')
+        for product in (self.products[0], self.products[4]):
+            product.save()
+        data = self.changes('product', token, page_size=1)
+        self.assertEqual([row['id'] for row in data['results']], [self.products[0].pk])
+        # Changed again before the client got to it: it moves to the next window.
+        self.products[4].save()
+        ids, _, token = self.sync('product', data['token'], page_size=1)
+        self.assertEqual(ids, [])
+        self.assertEqual(self.sync('product', token)[0], [self.products[4].pk])
+
+    @override_settings(CHANGES_FEED_LAG=60)
+    def test_recent_changes_wait_for_the_lag(self):
+        self.assertEqual(self.changes('product')['results'], [])
+
+    def test_bulk_writes_and_imports_are_reported(self):
+        _, _, token = self.sync('product')
+        self.client.patch(reverse('product-bulk'), [{"id": self.products[0].pk, "price": 4.0}], format='json')
+        ProductImporter(use_copy=False).run(iter([{'id': self.products[2].pk, 'name': "Imported", 'price': 2}]))
+        ids, _, _ = self.sync('product', token)
+        self.assertEqual(ids, [self.products[0].pk, self.products[2].pk])
+
+    def test_reimported_rows_are_not_reported_deleted(self):
+        _, _, token = self.sync('product')
+        pk = self.products[0].pk
+        self.products[0].delete()
+        ProductImporter(use_copy=False).run(iter([{'id': pk, 'name': "Back", 'price': 2}]))
+        self.assertEqual(self.sync('product', token)[:2], ([pk], []))
+
+    def test_orders(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.products[0])
+        data = self.changes('order')
+        self.assertEqual(data['results'][0]['products'][0]['id'], self.products[0].pk)
+        token = data['token']
+
+        # Removing a product changes the totals of its orders.
+        self.client.delete(reverse('product-detail', kwargs={'pk': self.products[0].pk}))
+        ids, _, token = self.sync('order', token)
+        self.assertEqual(ids, [order.pk])
+
+        self.client.delete(reverse('customer-detail', kwargs={'pk': self.customer.pk}))
+        self.assertEqual(self.sync('order', token)[:2], ([], [order.pk]))
+
+    def test_cascaded_deletions_write_their_tombstones_together(self):
+        orders = [Order.objects.create(customer=self.customer, status='New') for _ in range(6)]
+        for order in orders:
+            order.products.add(self.products[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(reverse('customer-detail', kwargs={'pk': self.customer.pk}))
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "SEapp_tombstone"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Tombstone.objects.filter(model='order').count(), len(orders))
+        self.assertEqual(Tombstone.objects.filter(model='customer').count(), 1)
+        self.assertEqual(rollup_snapshot(), {'DailySales': {}, 'ProductSales': {}, 'CustomerSales': {}})
+
+    def test_invalid_token(self):
+        for token in ('nope', 'eyJzIjoxfQ=='):
+            response = self.client.get(reverse('customer-changes'), {'since': token})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {'since': ['Invalid token.']})
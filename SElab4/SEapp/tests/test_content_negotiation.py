@@ -0,0 +1,183 @@
+import gzip
+import inspect
+import io
+import json
+from unittest import skipIf
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers as drf_serializers
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp import serializers
+from SEapp.models import Product, Customer, Order
+from SEapp.parsers import MessagePackParser, msgpack
+from SEapp.renderers import MessagePackRenderer
+
+MSGPACK = 'application/msgpack'
+
+
+def round_trip(data):
+    return MessagePackParser().parse(io.BytesIO(MessagePackRenderer().render(data)))
+
+
+def as_json(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class SerializerRoundTripTest(APITestCase):
+    """
+    Every serializer's output survives MessagePack unchanged (as the same data
+    JSON carries), and what a client sends back validates the same way.
+    """
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.product = Product.objects.create(name="Crème", price=2.5)
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(self.product)
+
+    def assert_round_trip(self, serializer_class, instance, payload, **kwargs):
+        data = serializer_class(instance, **kwargs).data
+        self.assertEqual(round_trip(data), as_json(data))
+
+        sent = serializer_class(data=round_trip(payload), **kwargs)
+        self.assertTrue(sent.is_valid(), sent.errors)
+        expected = serializer_class(data=payload, **kwargs)
+        self.assertTrue(expected.is_valid(), expected.errors)
+        self.assertEqual(sent.validated_data, expected.validated_data)
+
+    def round_trip_ProductSerializer(self):
+        self.assert_round_trip(serializers.ProductSerializer, self.product,
+                               {"name": "Brush", "price": 12.5, "available": False})
+
+    def round_trip_CustomerSerializer(self):
+        self.assert_round_trip(serializers.CustomerSerializer, self.customer,
+                               {"name": "John Doe", "address": "Line 1\nLine 2"})
+
+    def round_trip_OrderSerializer(self):
+        self.assert_round_trip(serializers.OrderSerializer, self.order,
+                               {"customer": self.customer.id, "status": "Sent", "products": [self.product.id]})
+
+    def round_trip_OrderBulkItemSerializer(self):
+        payload = {"id": self.order.id, "customer": self.customer.id, "status": "Sent", "products": [self.product.id]}
+        self.assert_round_trip(serializers.OrderBulkItemSerializer, payload, payload)
+
+    def round_trip_OrderTransitionSerializer(self):
+        payload = {"status": "Sent", "expected": "In Process"}
+        self.assert_round_trip(serializers.OrderTransitionSerializer, payload, payload)
+
+    def round_trip_OrderBatchTransitionSerializer(self):
+        payload = {"ids": [self.order.id], "status": "Sent", "expected": "In Process"}
+        self.assert_round_trip(serializers.OrderBatchTransitionSerializer, payload, payload)
+
+    def round_trip_TimedListSerializer(self):
+        self.assertIsInstance(serializers.ProductSerializer(many=True), serializers.TimedListSerializer)
+        self.assert_round_trip(serializers.ProductSerializer, [self.product], [{"name": "Brush", "price": 12.5}],
+                               many=True)
+
+    def test_every_serializer(self):
+        classes = [
+            name for name, value in inspect.getmembers(serializers, inspect.isclass)
+            if issubclass(value, drf_serializers.BaseSerializer) and value.__module__ == serializers.__name__
+        ]
+        self.assertTrue(classes)
+        for name in classes:
+            with self.subTest(serializer=name):
+                self.assertTrue(hasattr(self, f'round_trip_{name}'), f'No round trip for {name}')
+                getattr(self, f'round_trip_{name}')()
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+
+    def post(self, url, data):
+        return self.client.generic('POST', url, msgpack.packb(data), content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+
+    def test_create_and_list(self):
+        response = self.post(reverse('product-list'), {"name": "Shampoo", "price": 5.0})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], MSGPACK)
+        created = msgpack.unpackb(response.content)
+        self.assertEqual(created['name'], "Shampoo")
+
+        response = self.client.get(reverse('product-list'), HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(msgpack.unpackb(response.content)['results'], [created])
+        self.assertEqual(json.loads(self.client.get(reverse('product-list')).content)['results'], [created])
+
+    def test_orders_carry_dates_as_strings(self):
+        product = Product.objects.create(name="Shampoo", price=5.0)
+        response = self.post(reverse('order-list'), {"customer": self.customer.id, "status": "New",
+                                                     "products": [product.id]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = msgpack.unpackb(response.content)
+        self.assertEqual(order['products'][0]['id'], product.id)
+        json_order = self.client.get(reverse('order-detail', kwargs={'pk': order['id']})).json()
+        self.assertEqual(order, json_order)
+
+    def test_bulk_payload(self):
+        response = self.post(reverse('customer-list'), {"name": "John Doe", "address": "456 Elm St"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.post(reverse('order-bulk'), [{"customer": self.customer.id, "status": "New", "products": []}])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(msgpack.unpackb(response.content)['results']), 1)
+
+    def test_errors_are_negotiated_too(self):
+        response = self.post(reverse('product-list'), {"name": "", "price": -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(msgpack.unpackb(response.content)), {'name', 'price'})
+
+    def test_malformed_body(self):
+        response = self.client.generic('POST', reverse('product-list'), b'\xc1', content_type=MSGPACK)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackParserTest(SimpleTestCase):
+    def test_trailing_data_is_rejected(self):
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(msgpack.packb(1) + msgpack.packb(2)))
+
+
+@override_settings(GZIP_MIN_LENGTH=1024)
+class CompressionTest(APITestCase):
+    def setUp(self):
+        # bulk_create() does not invalidate cached reads.
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_large_responses_are_compressed(self):
+        Customer.objects.bulk_create([Customer(name=f"Customer {i}", address="123 Main St") for i in range(50)])
+        response = self.client.get(reverse('customer-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 50)
+
+    def test_small_responses_are_not(self):
+        response = self.client.get(reverse('customer-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_only_when_accepted(self):
+        Customer.objects.bulk_create([Customer(name=f"Customer {i}", address="123 Main St") for i in range(50)])
+        self.assertFalse(self.client.get(reverse('customer-list')).has_header('Content-Encoding'))
+
+    def test_conditional_requests_with_the_weak_etag(self):
+        Customer.objects.bulk_create([Customer(name=f"Customer {i}", address="123 Main St") for i in range(50)])
+        response = self.client.get(reverse('customer-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get(reverse('customer-list'), HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
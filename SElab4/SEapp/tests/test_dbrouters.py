@@ -0,0 +1,128 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.dbrouters import STICKY_COOKIE, PrimaryReplicaRouter, read_from_replicas
+from SEapp.models import Product, Customer
+
+
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        patcher = mock.patch('SEapp.dbrouters.is_primary', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_reads_go_to_replicas_only_when_enabled(self):
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+        token = read_from_replicas.set(True)
+        try:
+            self.assertIn(self.router.db_for_read(Product), {'replica1', 'replica2'})
+            self.assertEqual(self.router.db_for_write(Product), 'default')
+        finally:
+            read_from_replicas.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_the_database_cache_is_read_from_the_primary(self):
+        token = read_from_replicas.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(DatabaseCache('seapp_cache', {}).cache_model_class), 'default')
+        finally:
+            read_from_replicas.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        token = read_from_replicas.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+        finally:
+            read_from_replicas.reset(token)
+
+    def test_replica_pointing_at_the_primary_is_the_primary(self):
+        with mock.patch('SEapp.dbrouters.is_primary', return_value=True), \
+                override_settings(DATABASE_REPLICAS=['replica1']):
+            token = read_from_replicas.set(True)
+            try:
+                self.assertEqual(self.router.db_for_read(Product), 'default')
+            finally:
+                read_from_replicas.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_only_the_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'SEapp'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'SEapp'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaReadMixinTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.customer = Customer.objects.create(name="John Doe", address="123 Main St")
+        self.routed = []
+
+    def request(self, method, url, *args, **kwargs):
+        # The test database has no replica connection: record where reads
+        # would have gone and run them on the primary.
+        original = PrimaryReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            self.routed.append(original(router, model, **hints))
+            return 'default'
+
+        self.routed = []
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', db_for_read), \
+                mock.patch('SEapp.dbrouters.is_primary', return_value=False):
+            return getattr(self.client, method)(url, *args, **kwargs)
+
+    def test_safe_requests_read_from_replicas(self):
+        for url in (reverse('customer-list'), reverse('order-list'), reverse('async-product-list')):
+            response = self.request('get', url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('replica1', self.routed)
+        self.assertFalse(read_from_replicas.get())
+
+    def test_writes_use_the_primary_and_make_the_client_sticky(self):
+        url = reverse('customer-detail', kwargs={'pk': self.customer.pk})
+        response = self.request('patch', url, {"address": "456 Elm St"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('replica1', self.routed)
+
+        response = self.request('get', url)
+        self.assertEqual(response.data['address'], "456 Elm St")
+        self.assertNotIn('replica1', self.routed)
+
+    def test_stickiness_is_per_client(self):
+        self.request('post', reverse('product-list'), {"name": "Product", "price": 1.0}, format='json')
+        other = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}')
+        self.request('get', reverse('product-list'))
+        self.assertIn('replica1', self.routed)
+
+    def test_stickiness_travels_in_a_cookie(self):
+        url = reverse('customer-detail', kwargs={'pk': self.customer.pk})
+        response = self.request('patch', url, {"address": "456 Elm St"}, format='json')
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        # Another worker, with a cache of its own.
+        cache.clear()
+        self.request('get', url)
+        self.assertNotIn('replica1', self.routed)
+
+        self.client.cookies[STICKY_COOKIE] = 'forged'
+        cache.clear()
+        self.request('get', url)
+        self.assertIn('replica1', self.routed)
+
+    def test_failed_writes_do_not_make_the_client_sticky(self):
+        self.request('post', reverse('product-list'), {"name": "", "price": -1}, format='json')
+        self.request('get', reverse('product-list'))
+        self.assertIn('replica1', self.routed)
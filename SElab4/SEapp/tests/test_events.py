@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp import events
+from SEapp.async_views import OrderEventsView
+from SEapp.events import LocalHub, chunk_payloads, status_event
+from SEapp.importer import OrderImporter
+from SEapp.models import Product, Customer, Order
+
+
+def parse_event(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+class OrderEventsTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.authenticate_user(self.admin)
+        self.product = Product.objects.create(name="Shampoo", price=5.0)
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(self.product)
+        self.url = reverse('order-events', kwargs={'pk': self.order.pk})
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    async def stream(self, url, **headers):
+        # Per request headers replace those of the client in the ASGI scope.
+        headers['authorization'] = f'Bearer {AccessToken.for_user(self.admin)}'
+        return await AsyncClient().get(url, headers=headers)
+
+    def set_status(self, value):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = value
+            self.order.save()
+
+    async def test_stream(self):
+        response = await self.stream(self.url, accept_encoding='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        # Compressing would buffer the events.
+        self.assertFalse(response.has_header('Content-Encoding'))
+        stream = aiter(response.streaming_content)
+        self.assertEqual(parse_event(await anext(stream)), ('status', {'id': self.order.pk, 'status': 'New'}))
+
+        await sync_to_async(self.set_status)('Sent')
+        self.assertEqual(parse_event(await asyncio.wait_for(anext(stream), 5)),
+                         ('status', {'id': self.order.pk, 'status': 'Sent'}))
+
+    async def test_repeated_statuses_and_keepalive(self):
+        hub = LocalHub()
+        subscription = hub.subscribe([self.order.pk])
+        stream = OrderEventsView().stream(self.order.pk, 'New', subscription)
+        await anext(stream)
+        hub.dispatch([status_event(self.order.pk, 'New'), status_event(self.order.pk, 'Sent')])
+        self.assertEqual(parse_event((await anext(stream)).encode())[1]['status'], 'Sent')
+        with mock.patch.object(events, 'KEEPALIVE_INTERVAL', 0.01):
+            self.assertEqual(await anext(stream), ': keepalive\n\n')
+        await stream.aclose()
+        self.assertEqual(hub.subscriptions, {})
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_missing_order(self):
+        response = await self.stream(reverse('order-events', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(events.get_hub().subscriptions.get(999), None)
+
+    async def test_dispatch_reaches_the_subscribers_loop(self):
+        hub = LocalHub()
+        subscription = hub.subscribe([1, 2])
+        other = hub.subscribe([3])
+        # Published from a thread, the way a sync view's commit does.
+        await sync_to_async(hub.dispatch)([status_event(2, 'Sent'), status_event(4, 'New')])
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 5), {'id': 2, 'status': 'Sent'})
+        self.assertTrue(other.queue.empty())
+        subscription.close()
+        other.close()
+        self.assertEqual(hub.subscriptions, {})
+
+    async def test_slow_subscribers_are_dropped(self):
+        hub = LocalHub()
+        subscription = hub.subscribe([1])
+        for _ in range(events.SUBSCRIPTION_QUEUE_SIZE + 1):
+            subscription.put(status_event(1, 'New'))
+        self.assertIsNone(await subscription.get())
+        self.assertEqual(hub.subscriptions, {})
+
+    def test_published_after_commit_on_status_changes_only(self):
+        with mock.patch.object(LocalHub, 'dispatch') as dispatch:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.order.customer = Customer.objects.create(name="John Doe", address="1 Side St")
+                self.order.save()
+                self.order.status = 'Sent'
+                self.order.save()
+            dispatch.assert_not_called()
+            for callback in callbacks:
+                callback()
+        dispatch.assert_called_once_with([{'id': self.order.pk, 'status': 'Sent'}])
+
+    def test_bulk_updates_and_imports_publish(self):
+        other = Order.objects.create(customer=self.customer, status='New')
+        with mock.patch.object(LocalHub, 'dispatch') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(reverse('order-bulk'), [
+                    {"id": self.order.pk, "status": "Sent"}, {"id": other.pk, "status": "New"},
+                ], format='json')
+            dispatch.assert_called_once_with([{'id': self.order.pk, 'status': 'Sent'}])
+            dispatch.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                OrderImporter(use_copy=False).run(iter([
+                    {'id': other.pk, 'customer': self.customer.pk, 'status': 'Completed'},
+                ]))
+            dispatch.assert_called_once_with([{'id': other.pk, 'status': 'Completed'}])
+
+    def test_notify_payloads_fit_the_limit(self):
+        batch = [status_event(order_id, 'Completed') for order_id in range(1000)]
+        payloads = list(chunk_payloads(batch))
+        self.assertGreater(len(payloads), 1)
+        self.assertTrue(all(len(payload) <= events.NOTIFY_PAYLOAD_SIZE for payload in payloads))
+        self.assertEqual([event for payload in payloads for event in json.loads(payload)], batch)
+
+    def test_notifications_of_either_driver(self):
+        payloads = [json.dumps([status_event(1, 'Sent')]), json.dumps([status_event(2, 'New')])]
+
+        class Psycopg3Connection:
+            def notifies(self):
+                return iter(mock.Mock(payload=payload) for payload in payloads)
+
+        psycopg2_connection = mock.Mock(notifies=[])
+        psycopg2_connection.poll.side_effect = lambda: psycopg2_connection.notifies.extend(
+            mock.Mock(payload=payload) for payload in payloads
+        )
+        self.assertEqual(list(events.notifications(Psycopg3Connection())), payloads)
+        with mock.patch.object(events.select, 'select', return_value=([psycopg2_connection], [], [])):
+            self.assertEqual(list(itertools.islice(events.notifications(psycopg2_connection), 2)), payloads)
+
+    def test_listener_reconnects_after_any_failure(self):
+        class Stop(BaseException):
+            pass
+
+        database = mock.Mock(**{'get_connection_params.return_value': {}})
+        database.Database.connect.side_effect = [AttributeError('notifies'), mock.DEFAULT]
+        database.Database.connect.return_value.notifies.side_effect = RuntimeError('connection lost')
+        with mock.patch.object(events, 'connections', {'default': database}), \
+                mock.patch.object(events.time, 'sleep', side_effect=[None, Stop()]), \
+                self.assertLogs('SEapp.events', 'ERROR') as logs:
+            with self.assertRaises(Stop):
+                events.PostgresHub().listen()
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(database.Database.connect.call_count, 2)
+        database.Database.connect.return_value.close.assert_called_once()
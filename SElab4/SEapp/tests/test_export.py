@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.export import CSV_COLUMNS, export_queryset, iter_ndjson
+from SEapp.models import Product, Customer, Order
+
+
+def create_orders(customer, products, count, status='New'):
+    orders = []
+    for i in range(count):
+        order = Order.objects.create(customer=customer, status=status)
+        order.products.add(*products[:i % len(products) + 1])
+        orders.append(order)
+    return orders
+
+
+class OrderExportApiTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St, Springfield")
+        self.products = [Product.objects.create(name=f"Product {i}", price=1.0 + i) for i in range(3)]
+        self.url = reverse('order-export')
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        orders = create_orders(self.customer, self.products, 3)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([record['id'] for record in records], [order.id for order in orders])
+        self.assertEqual(records[2]['customer']['name'], "Jane Doe")
+        self.assertEqual(len(records[2]['products']), 3)
+        self.assertEqual(records[2]['total_price'], 6.0)
+
+    def test_export_csv_has_one_row_per_line(self):
+        create_orders(self.customer, self.products, 2)
+        Order.objects.create(customer=self.customer, status='New')
+        response = self.client.get(self.url, {'output': 'csv'})
+        rows = list(csv.reader(io.StringIO(self.read(response))))
+        self.assertEqual(rows[0], CSV_COLUMNS)
+        self.assertEqual(len(rows), 1 + 1 + 2 + 1)
+        self.assertEqual(rows[-1][CSV_COLUMNS.index('product_id')], '')
+        self.assertEqual(rows[1][CSV_COLUMNS.index('customer_address')], "123 Main St, Springfield")
+
+    def test_export_filters(self):
+        create_orders(self.customer, self.products, 2, status='New')
+        sent = create_orders(self.customer, self.products, 1, status='Sent')
+        old = create_orders(self.customer, self.products, 1, status='Sent')
+        Order.objects.filter(pk=old[0].pk).update(date=timezone.now() - timedelta(days=10))
+
+        response = self.client.get(self.url, {'status': 'Sent'})
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+
+        after = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = self.client.get(self.url, {'status': 'Sent', 'date_after': after})
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([record['id'] for record in records], [sent[0].id])
+
+        before = (timezone.now() - timedelta(days=5)).date().isoformat()
+        response = self.client.get(self.url, {'date_before': before})
+        records = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([record['id'] for record in records], [old[0].id])
+
+    def test_export_rejects_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'output': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'status': 'Lost'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'date_after': '2024-13-45'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderExportTest(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.products = [Product.objects.create(name=f"Product {i}", price=1.0 + i) for i in range(3)]
+
+    def test_export_queries_per_chunk(self):
+        create_orders(self.customer, self.products, 10)
+        with CaptureQueriesContext(connection) as context:
+            lines = list(iter_ndjson(export_queryset(), chunk_size=4))
+        self.assertEqual(len(lines), 10)
+        # One orders query plus one products prefetch per chunk of 4 orders.
+        self.assertLessEqual(len(context.captured_queries), 1 + 3)
+
+    def test_export_command_writes_file(self):
+        create_orders(self.customer, self.products, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.csv')
+            call_command('export_orders', '--format', 'csv', '--output', path)
+            with open(path, newline='') as exported:
+                rows = list(csv.reader(exported))
+        self.assertEqual(len(rows), 1 + 1 + 2)
@@ -0,0 +1,127 @@
+import datetime
+import random
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp import fastpath, renderers
+from SEapp.fastpath import plain_fields
+from SEapp.models import Product, Customer
+from SEapp.renderers import FastJSONRenderer
+from SEapp.serializers import ProductSerializer, CustomerSerializer, OrderSerializer
+
+NAMES = ["Shampoo", "Crème brûlée", 'Quote " and \\ backslash', "Line\nbreak\ttab", "Emoji 🧴",
+         "Separator \u2028 \u2029", "1e5 pack", "", "<script>&amp;</script>"]
+PRICES = [0.01, 1.0, 2.5, 1 / 3, 19.99, 0.00001, 1e16, 12345678.9, 1e-300]
+
+
+class FastListContractTest(APITestCase):
+    """
+    The values() list path must return exactly the bytes of the serializer path.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        for index, name in enumerate(NAMES):
+            Product.objects.create(name=name, price=PRICES[index % len(PRICES)], available=index % 3 != 0)
+            Customer.objects.create(name=name, address=f"{index} Main St\n{name}")
+        # Values save() would round or validation would reject, as imported data may contain.
+        Product.objects.filter(name="").update(price=1e-5)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def fetch(self, url, fast):
+        cache.clear()
+        with override_settings(FAST_LIST_RESPONSES=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.content
+
+    def assert_same_output(self, url):
+        serialized = self.fetch(url, fast=False)
+        self.assertEqual(self.fetch(url, fast=True), serialized)
+        return serialized
+
+    def test_product_list(self):
+        for query in ('', '?page_size=3', '?fields=id,price', '?count=exact', '?search=shampoo'):
+            self.assert_same_output(reverse('product-list') + query)
+
+    def test_customer_list(self):
+        for query in ('', '?page_size=2', '?fields=address'):
+            self.assert_same_output(reverse('customer-list') + query)
+
+    def test_fast_path_is_taken(self):
+        with mock.patch.object(fastpath, 'build_rows', wraps=fastpath.build_rows) as build_rows:
+            self.fetch(reverse('customer-list'), fast=True)
+            self.fetch(reverse('customer-list'), fast=False)
+        self.assertEqual(build_rows.call_count, 1)
+
+    def test_following_pages(self):
+        url = reverse('product-list') + '?page_size=4'
+        while url:
+            content = self.assert_same_output(url)
+            with override_settings(FAST_LIST_RESPONSES=True):
+                url = self.client.get(url).data['next']
+        self.assertTrue(content)
+
+    def test_json_renderer_output(self):
+        url = reverse('product-list')
+        fast = self.fetch(url, fast=True)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(self.fetch(url, fast=False), fast)
+
+    def test_browsable_api_is_still_available(self):
+        response = self.client.get(reverse('product-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+
+class PlainFieldsTest(SimpleTestCase):
+    def test_serializers_with_plain_fields(self):
+        self.assertEqual([name for name, _, _ in plain_fields(ProductSerializer())],
+                         ['id', 'name', 'price', 'available'])
+        self.assertEqual([name for name, _, _ in plain_fields(CustomerSerializer())], ['id', 'name', 'address'])
+
+    def test_other_serializers_keep_the_serializer_path(self):
+        self.assertIsNone(plain_fields(OrderSerializer()))
+
+
+@skipIf(renderers.orjson is None, 'orjson is not installed')
+class FastJSONRendererTest(SimpleTestCase):
+    def assert_renders_like_json_renderer(self, data, **context):
+        self.assertEqual(FastJSONRenderer().render(data, **context), JSONRenderer().render(data, **context))
+
+    def test_plain_data(self):
+        self.assert_renders_like_json_renderer({'results': [{'id': 1, 'name': "é \u2028", 'ok': True, 'x': None}]})
+
+    def test_types_handled_by_the_drf_encoder(self):
+        self.assert_renders_like_json_renderer({
+            'date': datetime.datetime(2024, 3, 1, 10, 0, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 3, 1),
+            'decimal': Decimal('1.10'),
+            'uuid': uuid.UUID(int=1),
+            'big': 2 ** 70,
+        })
+
+    def test_floats(self):
+        rng = random.Random(1)
+        values = [rng.uniform(-1e6, 1e6) for _ in range(500)] + [10 ** rng.uniform(-30, 30) for _ in range(500)]
+        self.assert_renders_like_json_renderer(values + [0.0, -0.0, 1e16, 1e-5, 0.0001])
+
+    def test_uses_orjson(self):
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            FastJSONRenderer().render({'a': 1})
+        self.assertTrue(dumps.called)
+
+    def test_indented_output(self):
+        self.assert_renders_like_json_renderer({'a': [1, 2]}, accepted_media_type='application/json; indent=2')
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.models import Product, Customer, Order
+
+
+class SparseFieldsetTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.product = Product.objects.create(name="Shampoo", price=5.0)
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(self.product)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get(self, url):
+        # Warm the user cache so only the queries of the view itself are captured.
+        self.client.get(reverse('customer-list'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_product_fields(self):
+        response, queries = self.get(reverse('product-list') + '?fields=id,name,price')
+        self.assertEqual(response.data['results'], [{'id': self.product.id, 'name': "Shampoo", 'price': 5.0}])
+        self.assertNotIn('available', queries[-1])
+
+    def test_order_fields_skip_products(self):
+        response, queries = self.get(reverse('order-list') + '?fields=id,status,total_order_price')
+        self.assertEqual(response.data['results'], [{'id': self.order.id, 'status': 'New', 'total_order_price': 5.0}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('customer_id', queries[0])
+
+    def test_order_fields_with_products(self):
+        url = reverse('order-detail', kwargs={'pk': self.order.id}) + '?fields=id,products'
+        response, queries = self.get(url)
+        self.assertEqual(response.data, {'id': self.order.id, 'products': [
+            {'id': self.product.id, 'name': "Shampoo", 'price': 5.0, 'available': True},
+        ]})
+        self.assertEqual(len(queries), 2)
+
+    def test_expand_customer(self):
+        response, queries = self.get(reverse('order-list') + '?fields=id&expand=customer')
+        self.assertEqual(response.data['results'], [
+            {'id': self.order.id, 'customer': {'id': self.customer.id, 'name': "Jane Doe", 'address': "123 Main St"}},
+        ])
+        self.assertEqual(len(queries), 1)
+
+    def test_default_response_is_unchanged(self):
+        response, _ = self.get(reverse('order-detail', kwargs={'pk': self.order.id}))
+        self.assertEqual(set(response.data), {'id', 'customer', 'products', 'date', 'status',
+                                              'total_order_price', 'is_order_fulfilled'})
+        self.assertEqual(response.data['customer'], self.customer.id)
+
+    def test_async_views(self):
+        response, queries = self.get(reverse('async-order-list') + '?fields=id,status')
+        self.assertEqual(response.data['results'], [{'id': self.order.id, 'status': 'New'}])
+        self.assertEqual(len(queries), 1)
+
+    def test_cached_responses_depend_on_fields(self):
+        url = reverse('customer-list')
+        self.assertEqual(set(self.client.get(url + '?fields=name').data['results'][0]), {'name'})
+        self.assertEqual(set(self.client.get(url).data['results'][0]), {'id', 'name', 'address'})
+
+    def test_paging_through_sparse_lists(self):
+        Order.objects.create(customer=self.customer, status='Sent')
+        first = self.client.get(reverse('order-list') + '?fields=status&page_size=1')
+        second = self.client.get(first.data['next'])
+        self.assertEqual([first.data['results'], second.data['results']], [[{'status': 'Sent'}], [{'status': 'New'}]])
+
+    def test_writes_ignore_fields(self):
+        url = reverse('order-detail', kwargs={'pk': self.order.id}) + '?fields=id'
+        response = self.client.patch(url, {"status": "Sent"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('products', response.data)
+
+    def test_invalid_parameters(self):
+        response = self.client.get(reverse('order-list') + '?fields=id,bogus&expand=products')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('bogus', response.data['fields'][0])
+        self.assertIn('products', response.data['expand'][0])
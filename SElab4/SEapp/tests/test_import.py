@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from SEapp.importer import ProductImporter
+from SEapp.models import Product, Customer, Order
+
+
+class ImportDataCommandTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def write_ndjson(self, name, rows):
+        return self.write(name, ''.join(json.dumps(row) + '\n' for row in rows))
+
+    def run_command(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_data', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_products_from_csv(self):
+        path = self.write('products.csv', 'name,price,available\nShampoo,10.499,true\nBrush,19.99,0\n')
+        stdout, _ = self.run_command('products', path)
+        self.assertIn('Imported 2 of 2 products', stdout)
+        self.assertIn('rows/s', stdout)
+        self.assertEqual(Product.objects.get(name='Shampoo').price, 10.5)
+        self.assertFalse(Product.objects.get(name='Brush').available)
+
+    def test_import_upserts_on_id(self):
+        product = Product.objects.create(name='Old name', price=1.0)
+        path = self.write_ndjson('products.ndjson', [
+            {'id': product.id, 'name': 'New name', 'price': 2.0},
+            {'id': product.id + 100, 'name': 'Imported', 'price': 3.0},
+        ])
+        self.run_command('products', path, '--batch-size', '1')
+        product.refresh_from_db()
+        self.assertEqual(product.name, 'New name')
+        self.assertEqual(Product.objects.get(pk=product.id + 100).name, 'Imported')
+        self.assertEqual(Product.objects.count(), 2)
+
+        created = Product.objects.create(name='After import', price=1.0)
+        self.assertGreater(created.id, product.id + 100)
+
+    def test_import_reports_invalid_rows(self):
+        path = self.write_ndjson('products.ndjson', [
+            {'name': 'Valid', 'price': 1.0},
+            {'name': 'Negative', 'price': -1},
+            {'price': 1.0},
+        ])
+        stdout, stderr = self.run_command('products', path)
+        self.assertIn('Imported 1 of 3 products', stdout)
+        self.assertIn('row 2', stderr)
+        self.assertIn('row 3', stderr)
+
+    def test_malformed_rows_are_row_errors(self):
+        path = self.write('products.ndjson', '{"name": "Valid", "price": 1.0}\n{"name": \n[1]\n'
+                                             '{"name": "Also valid", "price": 2.0}\n')
+        stdout, stderr = self.run_command('products', path, '--batch-size', '1')
+        self.assertIn('Imported 2 of 4 products', stdout)
+        self.assertIn('row 2', stderr)
+        self.assertIn('row 3', stderr)
+
+        path = self.write('products.csv', 'name,price\nShort\nBrush,2.5\nLong,1,extra\n')
+        stdout, stderr = self.run_command('products', path)
+        self.assertIn('Imported 1 of 3 products', stdout)
+        self.assertIn('row 1: Expected 2 cells, got 1.', stderr)
+        self.assertIn('row 3', stderr)
+        self.assertFalse(Product.objects.filter(name__in=['Short', 'None']).exists())
+
+    def test_import_customers(self):
+        path = self.write_ndjson('customers.ndjson', [{'id': 7, 'name': 'Jane Doe', 'address': '123 Main St'}])
+        self.run_command('customers', path)
+        self.assertEqual(Customer.objects.get(pk=7).name, 'Jane Doe')
+
+    def test_nulls_and_long_values_are_row_errors(self):
+        path = self.write_ndjson('customers.ndjson', [
+            {'name': None, 'address': None},
+            {'name': 'Jane Doe', 'address': None},
+            {'name': 'J' * 101, 'address': '123 Main St'},
+            {'name': 'J' * 100, 'address': '123 Main St'},
+        ])
+        stdout, stderr = self.run_command('customers', path)
+        self.assertIn('Imported 1 of 4 customers', stdout)
+        self.assertIn('row 3: Name is longer than 100 characters.', stderr)
+        self.assertEqual(list(Customer.objects.values_list('name', flat=True)), ['J' * 100])
+
+        path = self.write_ndjson('products.ndjson', [{'name': None, 'price': 1.0}, {'name': 'P' * 256, 'price': 1.0}])
+        stdout, stderr = self.run_command('products', path)
+        self.assertIn('Imported 0 of 2 products', stdout)
+        self.assertIn('row 1: Name is required.', stderr)
+        self.assertIn('row 2: Name is longer than 255 characters.', stderr)
+
+    def test_import_orders_with_links_dates_and_totals(self):
+        customer = Customer.objects.create(name='Jane Doe', address='123 Main St')
+        products = [Product.objects.create(name=f'Product {i}', price=1.0 + i) for i in range(3)]
+        path = self.write_ndjson('orders.ndjson', [
+            {'id': 50, 'customer': customer.id, 'status': 'Sent', 'date': '2024-01-02T03:04:05Z',
+             'products': [products[0].id, products[1].id]},
+            {'customer': customer.id, 'status': 'New', 'products': [products[2].id]},
+            {'customer': customer.id, 'status': 'New', 'products': [999]},
+            {'customer': 999, 'status': 'New', 'products': []},
+        ])
+        stdout, stderr = self.run_command('orders', path)
+        self.assertIn('Imported 2 of 4 orders', stdout)
+        self.assertIn('999', stderr)
+
+        order = Order.objects.get(pk=50)
+        self.assertEqual(order.date.isoformat(), '2024-01-02T03:04:05+00:00')
+        self.assertEqual(order.total_price, 3.0)
+        self.assertEqual(set(order.products.values_list('id', flat=True)), {products[0].id, products[1].id})
+        other = Order.objects.exclude(pk=50).get()
+        self.assertEqual(other.total_price, 3.0)
+
+    def test_reimporting_orders_replaces_links(self):
+        customer = Customer.objects.create(name='Jane Doe', address='123 Main St')
+        products = [Product.objects.create(name=f'Product {i}', price=1.0 + i) for i in range(2)]
+        self.run_command('orders', self.write('orders.csv', f'id,customer,status,products\n'
+                                                             f'5,{customer.id},New,{products[0].id};{products[1].id}\n'))
+        self.run_command('orders', self.write('again.csv', f'id,customer,status,products\n'
+                                                           f'5,{customer.id},Sent,{products[1].id}\n'))
+        order = Order.objects.get(pk=5)
+        self.assertEqual(order.status, 'Sent')
+        self.assertEqual(list(order.products.values_list('id', flat=True)), [products[1].id])
+        self.assertEqual(order.total_price, 2.0)
+
+    def test_product_upsert_refreshes_orders(self):
+        customer = Customer.objects.create(name='Jane Doe', address='123 Main St')
+        product = Product.objects.create(name='Product', price=1.0)
+        order = Order.objects.create(customer=customer, status='New')
+        order.products.add(product)
+        ProductImporter(use_copy=False).run([{'id': product.id, 'name': 'Product', 'price': 4.0}])
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, 4.0)
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.run_command('products', os.path.join(self.directory.name, 'missing.csv'))
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp import jobs
+from SEapp.management.commands import run_jobs
+from SEapp.jobs import claim_job, enqueue_product_change, run_job, run_pending_jobs
+from SEapp.models import Product, Customer, Order, ProductChangeJob
+from SEapp.rollups import rebuild_rollups
+from SEapp.tests.test_reports import rollup_snapshot
+
+
+@override_settings(PRODUCT_CHANGES_IN_BACKGROUND=True, PRODUCT_CHANGE_DELAY=0)
+class ProductChangeJobTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.authenticate_user(self.admin)
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.shampoo = Product.objects.create(name="Shampoo", price=5.0)
+        self.brush = Product.objects.create(name="Brush", price=12.5)
+        self.orders = []
+        for index in range(5):
+            order = Order.objects.create(customer=self.customer, status='New' if index % 2 else 'Sent')
+            order.products.add(self.shampoo, self.brush)
+            self.orders.append(order)
+        self.url = reverse('product-detail', kwargs={'pk': self.shampoo.pk})
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def order_states(self):
+        return set(Order.objects.values_list('total_price', 'fulfilled'))
+
+    def assert_rollups_are_consistent(self):
+        incremental = rollup_snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_snapshot())
+
+    def test_update_queues_the_order_refresh(self):
+        response = self.client.patch(self.url, {"price": 7.5, "available": False}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.order_states(), {(17.5, True)})
+        self.assertTrue(ProductChangeJob.objects.filter(product=self.shampoo).exists())
+        # The rollups do not wait for the job.
+        self.assert_rollups_are_consistent()
+
+        self.assertEqual(run_pending_jobs(batch_size=2), 1)
+        self.assertEqual(self.order_states(), {(20.0, False)})
+        self.assertFalse(ProductChangeJob.objects.exists())
+
+    def test_changes_coalesce(self):
+        for price in (6.0, 7.0, 8.0):
+            self.client.patch(self.url, {"price": price}, format='json')
+        self.assertEqual(list(ProductChangeJob.objects.values_list('version', flat=True)), [3])
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(self.order_states(), {(20.5, True)})
+        self.assert_rollups_are_consistent()
+
+    def test_unchanged_fields_queue_nothing(self):
+        self.client.patch(self.url, {"name": "Shampoo 2"}, format='json')
+        self.assertFalse(ProductChangeJob.objects.exists())
+
+    @override_settings(PRODUCT_CHANGE_DELAY=60)
+    def test_jobs_wait_for_the_delay(self):
+        self.client.patch(self.url, {"price": 6.0}, format='json')
+        self.assertEqual(run_pending_jobs(), 0)
+        ProductChangeJob.objects.update(run_after=timezone.now())
+        self.assertEqual(run_pending_jobs(), 1)
+
+    def test_change_while_running(self):
+        enqueue_product_change(self.shampoo.pk)
+        job = claim_job()
+
+        def change_again(product_id, batch_size):
+            enqueue_product_change(product_id)
+        with mock.patch.object(jobs, 'refresh_product_orders', change_again):
+            self.assertTrue(run_job(job))
+        job = ProductChangeJob.objects.get()
+        self.assertEqual(job.version, 2)
+        self.assertIsNone(job.locked_until)
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertFalse(ProductChangeJob.objects.exists())
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        enqueue_product_change(self.shampoo.pk)
+        self.assertIsNotNone(claim_job())
+        self.assertIsNone(claim_job())
+        # The lease of a worker that died runs out.
+        ProductChangeJob.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertIsNotNone(claim_job())
+
+    def test_failures_are_retried_later(self):
+        enqueue_product_change(self.shampoo.pk)
+        with mock.patch.object(jobs, 'refresh_product_orders', side_effect=RuntimeError('database is gone')):
+            with self.assertLogs('SEapp.jobs', 'ERROR'):
+                self.assertEqual(run_pending_jobs(), 1)
+        job = ProductChangeJob.objects.get()
+        self.assertEqual((job.attempts, job.last_error, job.locked_until), (1, 'database is gone', None))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(run_pending_jobs(), 0)
+
+    def test_refresh_is_idempotent(self):
+        Order.objects.update(total_price=0, fulfilled=False)
+        jobs.refresh_product_orders(self.shampoo.pk, batch_size=2)
+        jobs.refresh_product_orders(self.shampoo.pk, batch_size=2)
+        self.assertEqual(self.order_states(), {(17.5, True)})
+
+    def test_deleting_the_product_drops_its_job(self):
+        self.client.patch(self.url, {"price": 6.0}, format='json')
+        self.client.delete(self.url)
+        self.assertFalse(ProductChangeJob.objects.exists())
+        self.assertEqual(self.order_states(), {(12.5, True)})
+        self.assert_rollups_are_consistent()
+
+    @override_settings(PRODUCT_CHANGES_IN_BACKGROUND=False)
+    def test_in_the_request_when_turned_off(self):
+        self.client.patch(self.url, {"price": 6.0}, format='json')
+        self.assertFalse(ProductChangeJob.objects.exists())
+        self.assertEqual(self.order_states(), {(18.5, True)})
+
+    def test_command(self):
+        self.client.patch(self.url, {"available": False}, format='json')
+        out = StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        self.assertIn('Ran 1 jobs.', out.getvalue())
+        self.assertEqual(self.order_states(), {(17.5, False)})
+
+    def test_worker_survives_database_errors(self):
+        class Stop(BaseException):
+            pass
+
+        outcomes = [OperationalError('server closed the connection'), OperationalError('still down'), 0]
+        with mock.patch.object(run_jobs, 'run_pending_jobs', side_effect=outcomes), \
+                mock.patch.object(run_jobs, 'close_old_connections') as close_old_connections, \
+                mock.patch.object(run_jobs.time, 'sleep', side_effect=[None, None, Stop()]) as sleep, \
+                self.assertLogs('SEapp.management.commands.run_jobs', 'ERROR') as logs:
+            with self.assertRaises(Stop):
+                call_command('run_jobs', '--poll-interval', '2', stdout=StringIO())
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(close_old_connections.call_count, 3)
+        # Backs off while the database is down, then polls at the normal interval again.
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [2, 4, 2])
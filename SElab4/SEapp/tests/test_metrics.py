@@ -0,0 +1,121 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.metrics import Histogram, RequestTimings, request_metrics
+from SEapp.models import Product, Customer
+
+
+def server_timing(response):
+    metrics = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class TimingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        request_metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        Product.objects.create(name="Shampoo", price=5.0)
+        Customer.objects.create(name="John Doe", address="123 Main St")
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('product-list'))
+        metrics = server_timing(response)
+        self.assertEqual(set(metrics), {'db', 'auth', 'serialize', 'render', 'total'})
+        self.assertEqual(metrics['db']['desc'], f'"{len(queries)} queries"')
+        for name, params in metrics.items():
+            self.assertGreaterEqual(float(params['dur']), 0)
+        self.assertGreaterEqual(float(metrics['total']['dur']), float(metrics['render']['dur']))
+
+    def test_serializer_path(self):
+        response = self.client.get(reverse('product-detail', kwargs={'pk': Product.objects.get().pk}))
+        self.assertIn('serialize', server_timing(response))
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_turned_off(self):
+        response = self.client.get(reverse('product-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertIn('view="ProductViewSet"', request_metrics.expose())
+
+    def test_metrics_by_route(self):
+        self.client.get(reverse('product-list'))
+        self.client.get(reverse('product-list'))
+        self.client.get(reverse('customer-detail', kwargs={'pk': Customer.objects.get().pk}))
+        self.client.get(reverse('async-product-list'))
+        self.client.get('/no/such/page/')
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertIn('seapp_request_duration_seconds_count{view="ProductViewSet",action="list",method="GET"} 2',
+                      text)
+        self.assertIn('seapp_request_db_queries_count{view="CustomerViewSet",action="retrieve",method="GET"} 1',
+                      text)
+        self.assertIn('seapp_request_duration_seconds_count{view="AsyncProductView",action="get",method="GET"} 1',
+                      text)
+        self.assertIn('seapp_request_duration_seconds_count{view="unmatched",action="",method="GET"} 1', text)
+        self.assertRegex(text, r'seapp_request_db_seconds_bucket\{view="ProductViewSet",action="list",'
+                               r'method="GET",le="\+Inf"\} 2')
+
+    def test_async_views_count_their_queries(self):
+        response = self.client.get(reverse('async-product-list'))
+        self.assertNotEqual(server_timing(response)['db']['desc'], '"0 queries"')
+
+    def test_unknown_methods_share_a_label(self):
+        self.client.generic('BREW', reverse('product-list'))
+        self.assertIn('method="OTHER"', request_metrics.expose())
+        self.assertNotIn('BREW', request_metrics.expose())
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+        client.credentials(HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+        client.credentials(HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(client.get(reverse('metrics')).status_code, status.HTTP_200_OK)
+
+
+class HistogramTest(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('latency', 'Latency.', (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(('a',), value)
+        lines = histogram.expose(('view',))
+        self.assertEqual(lines[2:], [
+            'latency_bucket{view="a",le="0.1"} 2',
+            'latency_bucket{view="a",le="1.0"} 3',
+            'latency_bucket{view="a",le="+Inf"} 4',
+            'latency_sum{view="a"} 3.65',
+            'latency_count{view="a"} 4',
+        ])
+
+    def test_label_values_are_escaped(self):
+        histogram = Histogram('latency', 'Latency.', (1,))
+        histogram.observe(('say "hi"\n',), 0)
+        self.assertIn('view="say \\"hi\\"\\n"', histogram.expose(('view',))[2])
+
+    def test_server_timing_lists_db_first(self):
+        timings = RequestTimings()
+        timings.add('render', 0.002)
+        self.assertTrue(re.fullmatch(r'db;dur=0\.000;desc="0 queries", render;dur=2\.000, total;dur=5\.000',
+                                     timings.server_timing(0.005)))
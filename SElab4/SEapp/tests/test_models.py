@@ -121,3 +121,70 @@ class OrderModelTest(TestCase):
         order.products.add(self.product2)
         order.products.add(self.product3)
         self.assertTrue(order.is_order_fulfilled())
+
+    def test_is_order_fulfilled_with_unavailable_product(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.product1)
+        self.product2.available = False
+        self.product2.save()
+        order.products.add(self.product2)
+        self.assertFalse(order.is_order_fulfilled())
+
+
+class OrderTotalsMaintenanceTest(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Valid Customer", address="123 Main St")
+        self.product1 = Product.objects.create(name="Product 1", price=1.5, available=True)
+        self.product2 = Product.objects.create(name="Product 2", price=2.5, available=True)
+        self.order = Order.objects.create(customer=self.customer, status='New')
+        self.order.products.add(self.product1, self.product2)
+
+    def reload(self):
+        return Order.objects.get(pk=self.order.pk)
+
+    def test_totals_are_stored_on_add(self):
+        order = self.reload()
+        self.assertEqual(order.total_price, 4.0)
+        self.assertTrue(order.fulfilled)
+
+    def test_remove_and_clear_update_totals(self):
+        self.order.products.remove(self.product1)
+        self.assertEqual(self.reload().total_price, 2.5)
+
+        self.order.products.clear()
+        self.assertEqual(self.reload().total_price, 0)
+        self.assertTrue(self.reload().fulfilled)
+
+    def test_reverse_add_and_clear_update_totals(self):
+        other = Order.objects.create(customer=self.customer, status='New')
+        product = Product.objects.create(name="Product 3", price=3.0, available=False)
+        product.orders.add(self.order, other)
+        self.assertEqual(self.reload().total_price, 7.0)
+        self.assertFalse(self.reload().fulfilled)
+        self.assertFalse(Order.objects.get(pk=other.pk).fulfilled)
+
+        product.orders.clear()
+        self.assertEqual(self.reload().total_price, 4.0)
+        self.assertTrue(Order.objects.get(pk=other.pk).fulfilled)
+
+    def test_product_price_change_updates_orders(self):
+        self.product1.price = 10.0
+        self.product1.save()
+        self.assertEqual(self.reload().total_price, 12.5)
+
+    def test_product_availability_change_updates_orders(self):
+        self.product2.available = False
+        self.product2.save()
+        self.assertFalse(self.reload().fulfilled)
+
+        self.product2.available = True
+        self.product2.save()
+        self.assertTrue(self.reload().fulfilled)
+
+    def test_unrelated_product_change_does_not_touch_orders(self):
+        self.product1.name = "Renamed"
+        self.assertEqual(self.product1.changed_tracked_fields(), [])
+
+    def test_product_delete_updates_orders(self):
+        self.product2.delete()
+        self.assertEqual(self.reload().total_price, 1.5)
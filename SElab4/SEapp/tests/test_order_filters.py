@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.models import Customer, Order
+
+
+class OrderFilterTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.url = reverse('order-list')
+        self.jane = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.john = Customer.objects.create(name="John Doe", address="456 Elm St")
+        now = timezone.now()
+        self.orders = []
+        for days, customer, order_status in ((10, self.jane, 'New'), (5, self.john, 'New'),
+                                             (3, self.jane, 'Sent'), (0, self.john, 'Completed')):
+            order = Order.objects.create(customer=customer, status=order_status)
+            Order.objects.filter(pk=order.pk).update(date=now - timedelta(days=days))
+            self.orders.append(order)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def ids(self, query, url=None):
+        response = self.client.get((url or self.url) + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [order['id'] for order in response.data['results']]
+
+    def test_filter_by_status(self):
+        self.assertEqual(self.ids('?status=New'), [self.orders[1].id, self.orders[0].id])
+
+    def test_filter_by_customer(self):
+        self.assertEqual(self.ids(f'?customer={self.jane.id}'), [self.orders[2].id, self.orders[0].id])
+
+    def test_filter_by_date_range(self):
+        after = (timezone.now() - timedelta(days=6)).date().isoformat()
+        before = (timezone.now() - timedelta(days=1)).date().isoformat()
+        self.assertEqual(self.ids(f'?date_after={after}&date_before={before}'),
+                         [self.orders[2].id, self.orders[1].id])
+
+    def test_filters_combine_and_paginate(self):
+        first = self.client.get(self.url + f'?customer={self.john.id}&page_size=1')
+        self.assertEqual(first.data['results'][0]['id'], self.orders[3].id)
+        second = self.client.get(first.data['next'])
+        self.assertEqual([order['id'] for order in second.data['results']], [self.orders[1].id])
+        self.assertIsNone(second.data['next'])
+
+    def test_async_view_filters_too(self):
+        self.assertEqual(self.ids('?status=Sent', url=reverse('async-order-list')), [self.orders[2].id])
+
+    def test_invalid_filters(self):
+        response = self.client.get(self.url + '?status=Lost&customer=abc&date_after=yesterday')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'status', 'customer', 'date_after'})
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked on PostgreSQL')
+class OrderFilterPlanTest(APITestCase):
+    def plan(self, queryset):
+        with connection.cursor() as cursor:
+            # The tables are tiny in tests; make sure the planner only falls back
+            # to a sequential scan when no index fits.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assert_uses_index(self, queryset, index):
+        plan = self.plan(queryset.order_by('-date', '-id')[:101])
+        self.assertIn(index, plan)
+        self.assertNotIn('Seq Scan on "SEapp_order"', plan)
+
+    def test_status_filter_uses_index(self):
+        since = timezone.now() - timedelta(days=7)
+        self.assert_uses_index(Order.objects.filter(status='New', date__gte=since), 'order_status_date_id_idx')
+
+    def test_customer_filter_uses_index(self):
+        customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.assert_uses_index(Order.objects.filter(customer=customer), 'order_customer_date_id_idx')
@@ -0,0 +1,112 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.models import Product, Customer, Order, DailySales
+from SEapp.rollups import rebuild_rollups
+
+
+class OrderWriteTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.url = reverse('order-list')
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.products = [Product.objects.create(name=f"Product {i}", price=1.0 + i) for i in range(12)]
+        self.unavailable = Product.objects.create(name="Unavailable", price=10.0, available=False)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def payload(self, *products, order_status='New'):
+        return {"customer": self.customer.id, "status": order_status, "products": [p.id for p in products]}
+
+    def linked_ids(self, order_id):
+        return set(Order.products.through.objects.filter(order_id=order_id).values_list('product_id', flat=True))
+
+    def test_create_order_with_product_ids(self):
+        response = self.client.post(self.url, self.payload(self.products[0], self.products[2]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([p['name'] for p in response.data['products']], ["Product 0", "Product 2"])
+        self.assertEqual(response.data['total_order_price'], 4.0)
+        self.assertTrue(response.data['is_order_fulfilled'])
+        self.assertEqual(self.linked_ids(response.data['id']), {self.products[0].id, self.products[2].id})
+
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual(order.total_price, 4.0)
+        self.assertEqual(DailySales.objects.get(status='New').units, 2)
+
+    def test_create_query_count_does_not_grow_with_products(self):
+        self.client.post(self.url, self.payload(self.products[0]), format='json')
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(self.url, self.payload(self.products[0]), format='json')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(self.url, self.payload(*self.products), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(len(response.data['products']), 12)
+
+    def test_create_reports_every_invalid_id(self):
+        data = {**self.payload(), "products": [998, self.products[0].id, self.unavailable.id, 999]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['products']
+        self.assertEqual(len(errors), 3)
+        self.assertIn('998', errors[0])
+        self.assertIn(str(self.unavailable.id), errors[1])
+        self.assertIn('999', errors[2])
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_rejects_non_integer_ids(self):
+        response = self.client.post(self.url, {**self.payload(), "products": ["abc"]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('products', response.data)
+
+    def test_duplicate_ids_are_linked_once(self):
+        data = {**self.payload(), "products": [self.products[1].id, self.products[1].id]}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['products']), 1)
+
+    def test_update_replaces_products(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.products[0], self.products[1])
+        url = reverse('order-detail', kwargs={'pk': order.id})
+        response = self.client.put(url, self.payload(self.products[1], self.products[3], order_status='Sent'),
+                                   format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_order_price'], 6.0)
+        self.assertEqual(response.data['status'], 'Sent')
+        self.assertEqual(self.linked_ids(order.id), {self.products[1].id, self.products[3].id})
+
+        rollups = list(DailySales.objects.filter(orders__gt=0).values('status', 'orders', 'units', 'revenue'))
+        self.assertEqual(rollups, [{'status': 'Sent', 'orders': 1, 'units': 2, 'revenue': 6.0}])
+        rebuild_rollups()
+        self.assertEqual(list(DailySales.objects.values('status', 'orders', 'units', 'revenue')), rollups)
+
+    def test_update_keeps_lines_that_became_unavailable(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.products[0], self.unavailable)
+        url = reverse('order-detail', kwargs={'pk': order.id})
+        response = self.client.patch(url, {"products": [self.unavailable.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_order_fulfilled'])
+
+        other = Order.objects.create(customer=self.customer, status='New')
+        url = reverse('order-detail', kwargs={'pk': other.id})
+        response = self.client.patch(url, {"products": [self.unavailable.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patch_without_products_keeps_them(self):
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.products[2])
+        response = self.client.patch(reverse('order-detail', kwargs={'pk': order.id}), {"status": "Completed"},
+                                     format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in response.data['products']], [self.products[2].id])
+        self.assertEqual(DailySales.objects.get(status='Completed').revenue, 3.0)
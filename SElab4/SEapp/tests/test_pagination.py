@@ -0,0 +1,117 @@
+import json
+from base64 import b64encode
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.exceptions import NotFound
+from SEapp.models import Product, Customer, Order
+from SEapp.pagination import KeysetPagination
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def cursor(self, values, reverse=False):
+        payload = json.dumps({'v': values, 'r': reverse}).encode()
+        return b64encode(payload, altchars=b'-_').decode()
+
+    def collect_pages(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_product_pages_cover_all_rows_in_id_order(self):
+        products = [Product.objects.create(name=f"Product {i}", price=1.0) for i in range(7)]
+        ids = self.collect_pages(reverse('product-list') + '?page_size=3')
+        self.assertEqual(ids, [product.id for product in products])
+
+    def test_customer_list_is_paginated(self):
+        for i in range(3):
+            Customer.objects.create(name=f"Customer {i}", address="123 Main St")
+        response = self.client.get(reverse('customer-list') + '?page_size=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+        self.assertNotIn('count', response.data)
+
+    def test_orders_are_ordered_by_date_then_id_descending(self):
+        customer = Customer.objects.create(name="Customer", address="123 Main St")
+        orders = [Order.objects.create(customer=customer, status='New') for _ in range(5)]
+        same_date = timezone.now() - timedelta(days=1)
+        Order.objects.filter(pk__in=[orders[1].pk, orders[2].pk]).update(date=same_date)
+
+        ids = self.collect_pages(reverse('order-list') + '?page_size=2')
+        expected = [orders[4].pk, orders[3].pk, orders[0].pk, orders[2].pk, orders[1].pk]
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_the_previous_page(self):
+        for i in range(5):
+            Product.objects.create(name=f"Product {i}", price=1.0)
+        first = self.client.get(reverse('product-list') + '?page_size=2')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNotNone(back.data['next'])
+
+    def test_page_query_count_is_constant_with_depth(self):
+        for i in range(12):
+            Product.objects.create(name=f"Product {i}", price=1.0)
+        url = reverse('product-list') + '?page_size=2'
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(url)
+        for _ in range(4):
+            response = self.client.get(response.data['next'])
+        with CaptureQueriesContext(connection) as deep_page:
+            self.client.get(response.data['next'])
+        self.assertEqual(len(first_page), len(deep_page))
+        self.assertNotIn('OFFSET', deep_page.captured_queries[-1]['sql'].upper())
+
+    def test_count_is_opt_in(self):
+        for i in range(3):
+            Product.objects.create(name=f"Product {i}", price=1.0)
+        response = self.client.get(reverse('product-list') + '?count=exact')
+        self.assertEqual(response.data['count'], 3)
+
+        # Falls back to an exact count outside PostgreSQL.
+        response = self.client.get(reverse('product-list') + '?count=estimate')
+        self.assertIsInstance(response.data['count'], int)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('product-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        for url, values in ((reverse('product-list'), [None]),
+                            (reverse('product-list'), ["x"]),
+                            (reverse('product-list'), [[1]]),
+                            (reverse('order-list'), ["yesterday", 1]),
+                            (reverse('order-list'), [timezone.now().isoformat(), None])):
+            with self.subTest(url=url, values=values):
+                response = self.client.get(url + '?cursor=' + self.cursor(values))
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_rank_cursor(self):
+        paginator = KeysetPagination()
+        paginator.ordering = ('-search_rank', 'id')
+        self.assertEqual(paginator.convert_cursor_values(Product, [0.5, "3"]), [0.5, 3])
+        for values in (["high", 3], [None, 3], [[0.5], 3], ["nan", 3]):
+            with self.subTest(values=values), self.assertRaises(NotFound):
+                paginator.convert_cursor_values(Product, values)
@@ -0,0 +1,105 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from SEapp import datagen
+from SEapp.models import Product, Customer, Order
+from SEapp.rollups import rebuild_rollups
+from SEapp.tests.test_reports import rollup_snapshot
+
+
+class PopulateSampleDataTest(TestCase):
+    def populate(self, *args):
+        call_command('populate_sample_data', *args, stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('pk').values_list('name', 'price', 'available')),
+            list(Customer.objects.order_by('pk').values_list('name', 'address')),
+            list(Order.objects.order_by('pk').values_list('customer_id', 'status', 'date', 'total_price')),
+            list(Order.products.through.objects.order_by('order_id', 'product_id').values_list('order_id', 'product_id')),
+        )
+
+    def test_default_creates_fixed_sample(self):
+        self.populate()
+        self.assertEqual(Product.objects.count(), 3)
+        self.assertEqual(Customer.objects.count(), 3)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_scale_options(self):
+        self.populate('--products', '40', '--customers', '15', '--orders', '120',
+                      '--avg-lines', '2.5', '--batch-size', '25')
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(Customer.objects.count(), 15)
+        self.assertEqual(Order.objects.count(), 120)
+        lines = Order.products.through.objects.count()
+        self.assertTrue(120 <= lines <= 120 * 6)
+
+        order = Order.objects.exclude(products=None).first()
+        self.assertAlmostEqual(order.total_price, sum(product.price for product in order.products.all()))
+
+    def test_same_seed_gives_same_dataset(self):
+        options = ['--products', '20', '--customers', '10', '--orders', '50', '--batch-size', '7',
+                   '--seed', '42', '--end-date', '2024-06-30']
+        self.populate(*options)
+        first = self.snapshot()
+        self.populate(*options)
+        self.assertEqual(self.snapshot(), first)
+
+        self.populate(*options, '--workers', '2')
+        self.assertEqual(self.snapshot(), first)
+
+        self.populate(*options[:-4], '--seed', '43', '--end-date', '2024-06-30')
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_running_again_replaces_the_rollups(self):
+        options = ['--products', '20', '--customers', '10', '--orders', '50', '--seed', '1']
+        self.populate(*options)
+        self.populate(*options)
+        incremental = rollup_snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_snapshot())
+        self.assertEqual(sum(row['orders'] for row in incremental['DailySales'].values()), 50)
+
+    def test_orders_need_products_and_customers(self):
+        with self.assertRaises(CommandError):
+            self.populate('--orders', '10')
+
+
+STATUSES = [value for value, _ in Order.STATUS_CHOICES]
+
+
+class DataGeneratorTest(TestCase):
+    def test_runs_in_spawned_workers(self):
+        # Spawned processes have no Django set up: the generators must not need it.
+        end = datagen.end_of_day(date(2024, 6, 30))
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            orders = pool.submit(datagen.generate_orders, 1, 0, 10, 20, 5, 2.0, 30, end, STATUSES).result()
+        self.assertEqual(orders, datagen.generate_orders(1, 0, 10, 20, 5, 2.0, 30, end, STATUSES))
+
+    def test_batches_do_not_depend_on_each_other(self):
+        end = datagen.end_of_day(date(2024, 6, 30))
+        first = datagen.generate_orders(1, 3, 50, 100, 20, 3.0, 90, end, STATUSES)
+        again = datagen.generate_orders(1, 3, 50, 100, 20, 3.0, 90, end, STATUSES)
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, datagen.generate_orders(1, 4, 50, 100, 20, 3.0, 90, end, STATUSES))
+
+    def test_order_status_follows_age(self):
+        end = datagen.end_of_day(date(2024, 6, 30))
+        orders = datagen.generate_orders(7, 0, 2000, 100, 20, 3.0, 365, end, STATUSES)
+        old = [order['status'] for order in orders if (end - order['date']).days > 30]
+        self.assertGreater(old.count('Completed') / len(old), 0.8)
+        self.assertTrue(all(order['date'] < end for order in orders))
+
+    def test_product_popularity_is_skewed(self):
+        end = datagen.end_of_day(date(2024, 6, 30))
+        orders = datagen.generate_orders(7, 0, 2000, 100, 20, 1.0, 30, end, STATUSES)
+        counts = [0] * 100
+        for order in orders:
+            for position in order['products']:
+                counts[position] += 1
+        self.assertGreater(counts[0], counts[50] * 5)
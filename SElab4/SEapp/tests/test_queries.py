@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.authentication import user_cache
+from SEapp.models import Product, Customer, Order
+
+
+class OrderQueryCountTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.customer = Customer.objects.create(name="Valid Customer", address="123 Main St")
+        self.available = Product.objects.create(name="Product 1", price=1.99, available=True)
+        self.unavailable = Product.objects.create(name="Product 2", price=2.99, available=False)
+        self.order_list_url = reverse('order-list')
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def create_orders(self, count):
+        for i in range(count):
+            order = Order.objects.create(customer=self.customer, status='New')
+            if i % 2:
+                order.products.add(self.available, self.unavailable)
+            else:
+                order.products.add(self.available)
+
+    def count_queries(self, url):
+        # Count the user lookup on every request, not only on the first.
+        user_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_order_list_query_count_does_not_grow_with_rows(self):
+        self.authenticate_user(self.user)
+        self.create_orders(2)
+        few, _ = self.count_queries(self.order_list_url)
+
+        self.create_orders(20)
+        many, response = self.count_queries(self.order_list_url)
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.data['results']), 22)
+
+    def test_order_detail_query_count_does_not_grow_with_products(self):
+        self.authenticate_user(self.user)
+        order = Order.objects.create(customer=self.customer, status='New')
+        order.products.add(self.available)
+        url = reverse('order-detail', kwargs={'pk': order.id})
+        few, _ = self.count_queries(url)
+
+        order.products.add(*[Product.objects.create(name=f"Extra {i}", price=1.0) for i in range(10)])
+        many, _ = self.count_queries(url)
+        self.assertEqual(few, many)
+
+    def test_order_list_returns_stored_totals(self):
+        self.authenticate_user(self.user)
+        self.create_orders(2)
+        _, response = self.count_queries(self.order_list_url)
+
+        by_products = {len(order['products']): order for order in response.data['results']}
+        self.assertAlmostEqual(by_products[1]['total_order_price'], 1.99)
+        self.assertTrue(by_products[1]['is_order_fulfilled'])
+        self.assertAlmostEqual(by_products[2]['total_order_price'], 1.99 + 2.99)
+        self.assertFalse(by_products[2]['is_order_fulfilled'])
+
+    def test_order_without_products_has_zero_total(self):
+        self.authenticate_user(self.user)
+        Order.objects.create(customer=self.customer, status='New')
+        _, response = self.count_queries(self.order_list_url)
+        self.assertEqual(response.data['results'][0]['total_order_price'], 0)
+        self.assertTrue(response.data['results'][0]['is_order_fulfilled'])
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.fieldsets import SparseFieldsetMixin
+from SEapp.models import Product, Customer, Order
+from SEapp.querycheck import QueryCheckError, allow_repeated_queries, checking_queries, fingerprint
+
+
+def without_prefetching(self, queryset):
+    return queryset.prefetch_related(None)
+
+
+class QueryCheckRequestTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        customer = Customer.objects.create(name="John Doe", address="123 Main St")
+        product = Product.objects.create(name="Shampoo", price=5.0)
+        for _ in range(6):
+            Order.objects.create(customer=customer, status='New').products.add(product)
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_the_test_runner_raises(self):
+        self.assertEqual(settings.QUERY_CHECK, 'raise')
+
+    def test_prefetched_order_list_passes(self):
+        self.assertEqual(self.client.get(reverse('order-list')).status_code, status.HTTP_200_OK)
+
+    def test_query_per_row_fails_the_request(self):
+        with mock.patch.object(SparseFieldsetMixin, 'narrow_queryset', without_prefetching):
+            with self.assertRaisesRegex(QueryCheckError, r'GET /api/orders/:\n6 similar queries at SEapp/'):
+                self.client.get(reverse('order-list'))
+
+    @override_settings(QUERY_CHECK_SLOW_MS=0)
+    def test_slow_queries(self):
+        for name in ('product-list', 'async-product-list'):
+            with self.subTest(view=name), self.assertRaisesMessage(QueryCheckError, 'Slow query'):
+                self.client.get(reverse(name))
+
+    @override_settings(QUERY_CHECK='log')
+    def test_development_logs(self):
+        with mock.patch.object(SparseFieldsetMixin, 'narrow_queryset', without_prefetching):
+            with self.assertLogs('SEapp.querycheck', 'WARNING') as logs:
+                response = self.client.get(reverse('order-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('GET /api/orders/: 6 similar queries', logs.output[0])
+
+    @override_settings(QUERY_CHECK='')
+    def test_turned_off(self):
+        with mock.patch.object(SparseFieldsetMixin, 'narrow_queryset', without_prefetching):
+            self.assertEqual(self.client.get(reverse('order-list')).status_code, status.HTTP_200_OK)
+
+
+class CheckingQueriesTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Shampoo", price=5.0)
+
+    def load_repeatedly(self):
+        for _ in range(settings.QUERY_CHECK_REPEATS):
+            Product.objects.get(pk=self.product.pk)
+
+    def test_repeated_statement(self):
+        with self.assertRaisesMessage(QueryCheckError, 'in load_repeatedly'):
+            with checking_queries('loop'):
+                self.load_repeatedly()
+
+    def test_below_the_threshold(self):
+        with checking_queries('loop') as check:
+            Product.objects.get(pk=self.product.pk)
+        self.assertEqual(check.violations(), [])
+
+    def test_allowed_repetition(self):
+        with checking_queries('loop') as check:
+            with allow_repeated_queries():
+                self.load_repeatedly()
+        self.assertEqual(check.violations(), [])
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_in_lists_and_literals(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+                         fingerprint('SELECT * FROM t WHERE id IN (%s)  LIMIT 41'))
+        self.assertEqual(fingerprint("SELECT 'it''s' FROM t2"), "SELECT ? FROM t2")
+
+    def test_different_statements(self):
+        self.assertNotEqual(fingerprint('SELECT a FROM t WHERE id = %s'), fingerprint('SELECT b FROM t WHERE id = %s'))
@@ -0,0 +1,200 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.importer import OrderImporter, read_rows
+from SEapp.models import Product, Customer, Order, DailySales, ProductSales, CustomerSales
+from SEapp.rollups import rebuild_rollups
+
+
+def rollup_snapshot():
+    snapshot = {}
+    for model, keys in ((DailySales, ('day', 'status')), (ProductSales, ('product_id', 'status')),
+                        (CustomerSales, ('customer_id', 'status'))):
+        rows = {}
+        for row in model.objects.values():
+            values = {name: value for name, value in row.items() if name not in keys and name != 'id'}
+            if any(values.values()):
+                rows[tuple(row[key] for key in keys)] = {
+                    name: round(value, 6) if isinstance(value, float) else value for name, value in values.items()
+                }
+        snapshot[model.__name__] = rows
+    return snapshot
+
+
+class RollupTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(username='testadmin', password='testpassword')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.jane = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.john = Customer.objects.create(name="John Doe", address="456 Elm St")
+        self.shampoo = Product.objects.create(name="Shampoo", price=5.0)
+        self.brush = Product.objects.create(name="Brush", price=12.5)
+        self.comb = Product.objects.create(name="Comb", price=2.25, available=False)
+
+    def create_order(self, customer, *products, order_status='New'):
+        order = Order.objects.create(customer=customer, status=order_status)
+        order.products.add(*products)
+        return order
+
+    def assert_rollups_are_consistent(self):
+        incremental = rollup_snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_snapshot())
+        return incremental
+
+
+class IncrementalRollupTest(RollupTestCase):
+    def test_order_lifecycle(self):
+        order = self.create_order(self.jane, self.shampoo, self.brush)
+        rollups = self.assert_rollups_are_consistent()
+        day = timezone.localdate()
+        self.assertEqual(rollups['DailySales'][(day, 'New')], {'orders': 1, 'units': 2, 'revenue': 17.5})
+        self.assertEqual(rollups['ProductSales'][(self.brush.pk, 'New')], {'units': 1, 'revenue': 12.5})
+
+        order.status = 'Sent'
+        order.save()
+        order.products.remove(self.shampoo)
+        rollups = self.assert_rollups_are_consistent()
+        self.assertNotIn((day, 'New'), rollups['DailySales'])
+        self.assertEqual(rollups['CustomerSales'][(self.jane.pk, 'Sent')], {'orders': 1, 'units': 1, 'revenue': 12.5})
+
+        order.products.clear()
+        self.assert_rollups_are_consistent()
+        order.delete()
+        self.assertEqual(self.assert_rollups_are_consistent(),
+                         {'DailySales': {}, 'ProductSales': {}, 'CustomerSales': {}})
+
+    def test_product_changes(self):
+        self.create_order(self.jane, self.shampoo, self.brush)
+        self.create_order(self.john, self.shampoo, order_status='Completed')
+        self.shampoo.price = 6.0
+        self.shampoo.save()
+        rollups = self.assert_rollups_are_consistent()
+        self.assertEqual(rollups['ProductSales'][(self.shampoo.pk, 'Completed')], {'units': 1, 'revenue': 6.0})
+
+        self.comb.orders.add(*Order.objects.all())
+        self.brush.orders.clear()
+        self.assert_rollups_are_consistent()
+        self.shampoo.delete()
+        self.assert_rollups_are_consistent()
+
+    def test_products_deleted_together(self):
+        order = self.create_order(self.jane, self.shampoo, self.brush, self.comb)
+        self.create_order(self.john, self.brush)
+        Product.objects.filter(pk__in=[self.shampoo.pk, self.brush.pk]).delete()
+        rollups = self.assert_rollups_are_consistent()
+        self.assertEqual(rollups['DailySales'][(timezone.localdate(), 'New')],
+                         {'orders': 2, 'units': 1, 'revenue': 2.25})
+        self.assertEqual(Order.objects.get(pk=order.pk).total_price, 2.25)
+
+    def test_customer_deletion(self):
+        self.create_order(self.jane, self.shampoo)
+        self.create_order(self.john, self.brush)
+        self.jane.delete()
+        rollups = self.assert_rollups_are_consistent()
+        self.assertEqual(list(rollups['CustomerSales']), [(self.john.pk, 'New')])
+
+    def test_api_writes(self):
+        order = self.create_order(self.jane, self.shampoo)
+        self.client.patch(reverse('order-detail', kwargs={'pk': order.pk}), {"status": "In Process"}, format='json')
+        self.client.patch(reverse('product-detail', kwargs={'pk': self.shampoo.pk}), {"price": 7.5}, format='json')
+        self.assert_rollups_are_consistent()
+
+        response = self.client.post(reverse('order-bulk'), [
+            {"customer": self.jane.pk, "status": "New", "products": [self.shampoo.pk, self.brush.pk]},
+            {"customer": self.john.pk, "status": "Sent", "products": [self.brush.pk]},
+        ], format='json')
+        created = [item['id'] for item in response.data['results']]
+        self.assert_rollups_are_consistent()
+
+        self.client.patch(reverse('order-bulk'), [
+            {"id": created[0], "status": "Completed"},
+            {"id": created[1], "products": [self.shampoo.pk]},
+        ], format='json')
+        self.client.patch(reverse('product-bulk'), [{"id": self.brush.pk, "price": 10.0}], format='json')
+        self.assert_rollups_are_consistent()
+
+        self.client.delete(reverse('order-bulk'), [created[0]], format='json')
+        self.client.delete(reverse('product-bulk'), [self.brush.pk], format='json')
+        self.assert_rollups_are_consistent()
+
+    def test_import(self):
+        existing = self.create_order(self.jane, self.shampoo)
+        rows = [
+            {"id": existing.pk, "customer": self.john.pk, "status": "Sent", "products": [self.brush.pk],
+             "date": "2024-03-01T10:00:00+00:00"},
+            {"customer": self.jane.pk, "status": "New", "products": [self.shampoo.pk, self.comb.pk],
+             "date": "2024-03-02T10:00:00+00:00"},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.ndjson')
+            with open(path, 'w') as source:
+                source.write('\n'.join(json.dumps(row) for row in rows))
+            OrderImporter(use_copy=False).run(read_rows(path, 'ndjson'))
+        rollups = self.assert_rollups_are_consistent()
+        self.assertEqual(len(rollups['DailySales']), 2)
+
+    def test_rebuild_command(self):
+        self.create_order(self.jane, self.shampoo)
+        DailySales.objects.all().delete()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(DailySales.objects.get().orders, 1)
+
+
+class ReportApiTest(RollupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_order(self.jane, self.shampoo, self.brush)
+        self.create_order(self.jane, self.shampoo, order_status='Completed')
+        old = self.create_order(self.john, self.comb, order_status='Completed')
+        Order.objects.filter(pk=old.pk).update(date=timezone.now() - timedelta(days=3))
+        rebuild_rollups()
+
+    def test_daily(self):
+        response = self.client.get(reverse('report-daily'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today, earlier = timezone.localdate(), timezone.localdate() - timedelta(days=3)
+        self.assertEqual(response.json(), [
+            {'day': earlier.isoformat(), 'orders': 1, 'units': 1, 'revenue': 2.25},
+            {'day': today.isoformat(), 'orders': 2, 'units': 3, 'revenue': 22.5},
+        ])
+        response = self.client.get(reverse('report-daily') + f'?date_after={today}&status=Completed')
+        self.assertEqual(response.json(), [{'day': today.isoformat(), 'orders': 1, 'units': 1, 'revenue': 5.0}])
+
+    def test_products(self):
+        response = self.client.get(reverse('report-products') + '?limit=2')
+        self.assertEqual(response.json(), [
+            {'product': self.brush.pk, 'name': "Brush", 'units': 1, 'revenue': 12.5},
+            {'product': self.shampoo.pk, 'name': "Shampoo", 'units': 2, 'revenue': 10.0},
+        ])
+
+    def test_customers(self):
+        response = self.client.get(reverse('report-customers') + '?status=Completed')
+        self.assertEqual(response.json(), [
+            {'customer': self.jane.pk, 'name': "Jane Doe", 'orders': 1, 'units': 1, 'revenue': 5.0},
+            {'customer': self.john.pk, 'name': "John Doe", 'orders': 1, 'units': 1, 'revenue': 2.25},
+        ])
+
+    def test_reports_do_not_touch_orders(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('report-daily'))
+            self.client.get(reverse('report-customers'))
+        self.assertFalse([query for query in context.captured_queries if 'SEapp_order' in query['sql']])
+
+    def test_invalid_parameters(self):
+        response = self.client.get(reverse('report-daily') + '?status=Lost&date_after=soon')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'status', 'date_after'})
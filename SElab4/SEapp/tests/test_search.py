@@ -0,0 +1,61 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.models import Product
+
+
+class ProductSearchTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.shampoo = Product.objects.create(name='Shampoo', price=10.49)
+        self.dry_shampoo = Product.objects.create(name='Dry Shampoo', price=12.99)
+        self.brush = Product.objects.create(name='Hair Brush', price=19.99)
+        self.product_list_url = reverse('product-list')
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def search(self, term, **params):
+        response = self.client.get(self.product_list_url, {'search': term, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_search_matches_words(self):
+        self.assertEqual(set(self.search('shampoo')), {self.shampoo.id, self.dry_shampoo.id})
+        self.assertEqual(self.search('brush'), [self.brush.id])
+
+    def test_search_ranks_best_match_first(self):
+        self.assertEqual(self.search('shampoo')[0], self.shampoo.id)
+
+    def test_search_without_matches(self):
+        self.assertEqual(self.search('conditioner'), [])
+
+    def test_search_results_are_paginated_by_rank(self):
+        first = self.client.get(self.product_list_url, {'search': 'shampoo', 'page_size': 1})
+        self.assertEqual(first.data['results'][0]['id'], self.shampoo.id)
+        second = self.client.get(first.data['next'])
+        self.assertEqual([item['id'] for item in second.data['results']], [self.dry_shampoo.id])
+        self.assertIsNone(second.data['next'])
+
+    def test_search_results_do_not_expose_search_vector(self):
+        response = self.client.get(self.product_list_url, {'search': 'brush'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'price', 'available'})
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text and trigram search need PostgreSQL')
+    def test_search_matches_prefixes_and_typos(self):
+        self.assertIn(self.shampoo.id, self.search('sham'))
+        self.assertIn(self.brush.id, self.search('brsh'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text and trigram search need PostgreSQL')
+    def test_search_vector_follows_name_changes(self):
+        self.brush.name = 'Comb'
+        self.brush.save()
+        self.assertEqual(self.search('comb'), [self.brush.id])
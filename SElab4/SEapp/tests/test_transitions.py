@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from SEapp.events import LocalHub
+from SEapp.models import Product, Customer, Order
+from SEapp.rollups import rebuild_rollups
+from SEapp.tests.test_reports import rollup_snapshot
+from SEapp.transitions import transition_orders
+
+
+class OrderTransitionTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.authenticate_user(self.user)
+        self.customer = Customer.objects.create(name="Jane Doe", address="123 Main St")
+        self.products = [Product.objects.create(name=f"Product {i}", price=2.0 + i) for i in range(2)]
+        self.orders = []
+        for index in range(4):
+            order = Order.objects.create(customer=self.customer, status='New' if index < 3 else 'Sent')
+            order.products.add(*self.products[:index % 2 + 1])
+            self.orders.append(order)
+        self.order = self.orders[0]
+        self.url = reverse('order-transition', kwargs={'pk': self.order.pk})
+        self.batch_url = reverse('order-transition-batch')
+
+    def authenticate_user(self, user):
+        token = str(AccessToken.for_user(user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def assert_rollups_are_consistent(self):
+        incremental = rollup_snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_snapshot())
+
+    def test_transition(self):
+        before = Order.objects.get(pk=self.order.pk).updated_at
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"status": "In Process", "expected": "New"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': self.order.pk, 'status': 'In Process'})
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.status, 'In Process')
+        self.assertGreater(order.updated_at, before)
+        # The order is not read before it is written.
+        updates = [index for index, query in enumerate(queries) if query['sql'].startswith('UPDATE "SEapp_order"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse([query for query in queries[:updates[0]] if 'FROM "SEapp_order"' in query['sql']])
+        self.assert_rollups_are_consistent()
+
+    def test_expected_defaults_to_the_previous_status(self):
+        response = self.client.post(self.url, {"status": "In Process"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_conflict(self):
+        Order.objects.filter(pk=self.order.pk).update(status='In Process')
+        response = self.client.post(self.url, {"status": "In Process", "expected": "New"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['status'], 'In Process')
+
+    def test_concurrent_transitions_move_the_order_once(self):
+        payload = {"status": "In Process", "expected": "New"}
+        responses = [self.client.post(self.url, payload, format='json') for _ in range(2)]
+        self.assertEqual([response.status_code for response in responses],
+                         [status.HTTP_200_OK, status.HTTP_409_CONFLICT])
+        self.assert_rollups_are_consistent()
+
+    def test_moves_outside_the_graph_are_rejected(self):
+        for payload, field in (({"status": "Sent", "expected": "New"}, 'status'),
+                               ({"status": "New", "expected": "Completed"}, 'status'),
+                               ({"status": "New"}, 'expected'),
+                               ({"status": "Lost"}, 'status')):
+            response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, response.data)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'New')
+
+    def test_missing_order(self):
+        for pk in (999, 'x'):
+            response = self.client.post(reverse('order-transition', kwargs={'pk': pk}), {"status": "In Process"},
+                                        format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch(self):
+        ids = [order.pk for order in self.orders] + [999]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.batch_url, {"ids": ids, "status": "In Process"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'transitioned': [order.pk for order in self.orders[:3]],
+            'conflicts': [{'id': self.orders[3].pk, 'status': 'Sent'}],
+            'missing': [999],
+        })
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "SEapp_order"')]), 1)
+        self.assertEqual(Order.objects.filter(status='In Process').count(), 3)
+        self.assert_rollups_are_consistent()
+
+    def test_batch_size_is_limited(self):
+        response = self.client.post(self.batch_url, {"ids": list(range(1, 502)), "status": "In Process"},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.data)
+
+    def test_changes_are_published(self):
+        with mock.patch.object(LocalHub, 'dispatch') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                transition_orders([self.order.pk, self.orders[3].pk], 'New', 'In Process')
+        dispatch.assert_called_once_with([{'id': self.order.pk, 'status': 'In Process'}])
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.post(self.url, {"status": "In Process"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -23,12 +23,12 @@ class ProductApiTest(APITestCase):
         self.authenticate_user(self.regular_user)
         response = self.client.get(self.product_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
         self.authenticate_user(self.admin)
         response = self.client.get(self.product_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_get_single_product(self):
         self.authenticate_user(self.regular_user)
@@ -0,0 +1,79 @@
+from django.db import connection, transaction
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import status as http_status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .events import publish_order_status
+from .models import Order
+from .rollups import RollupDelta
+from .serializers import OrderTransitionSerializer, OrderBatchTransitionSerializer
+
+
+def transition_orders(order_ids, expected, status):
+    # A single UPDATE ... WHERE status = expected RETURNING id: the orders
+    # still in expected move, the others are left alone, without reading or
+    # locking them first. Returns the ids of the orders that moved.
+    order_ids = list(dict.fromkeys(order_ids))
+    status_field = Order._meta.get_field('status')
+    updated_at = Order._meta.get_field('updated_at')
+    quote = connection.ops.quote_name
+    pk = quote(Order._meta.pk.column)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {quote(Order._meta.db_table)} '
+                f'SET {quote(status_field.column)} = %s, {quote(updated_at.column)} = %s '
+                f'WHERE {pk} IN ({", ".join(["%s"] * len(order_ids))}) AND {quote(status_field.column)} = %s '
+                f'RETURNING {pk}',
+                [status, updated_at.get_db_prep_value(timezone.now(), connection), *order_ids, expected],
+            )
+            moved = sorted(row[0] for row in cursor.fetchall())
+        # update() sends no signals: the rollups and subscribers are told here.
+        RollupDelta().restatus(moved, expected).apply()
+        publish_order_status([(order_id, status) for order_id in moved])
+    return moved
+
+
+class OrderTransitionMixin:
+    """
+    Adds POST /orders/<id>/transition/ and POST /orders/transition/ (with
+    ``ids``), moving orders along Order.STATUS_TRANSITIONS with a conditional
+    UPDATE instead of a read-modify-write of the whole row. An order that is
+    no longer in the ``expected`` status is a conflict: 409 for a single
+    order, listed under ``conflicts`` with its current status for a batch.
+    """
+
+    @action(detail=True, methods=['post'], url_path='transition', url_name='transition')
+    def transition(self, request, pk=None):
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        expected, status = serializer.validated_data['expected'], serializer.validated_data['status']
+        try:
+            order_id = int(pk)
+        except ValueError:
+            raise Http404
+        if transition_orders([order_id], expected, status):
+            return Response({'id': order_id, 'status': status})
+        current = Order.objects.filter(pk=order_id).values_list('status', flat=True).first()
+        if current is None:
+            raise Http404
+        return Response(
+            {'detail': f'The order is "{current}", not "{expected}".', 'status': current},
+            status=http_status.HTTP_409_CONFLICT,
+        )
+
+    @action(detail=False, methods=['post'], url_path='transition', url_name='transition-batch')
+    def transition_batch(self, request):
+        serializer = OrderBatchTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        moved = transition_orders(data['ids'], data['expected'], data['status'])
+        rest = set(data['ids']).difference(moved)
+        current = dict(Order.objects.filter(pk__in=rest).values_list('pk', 'status')) if rest else {}
+        return Response({
+            'transitioned': moved,
+            'conflicts': [{'id': pk, 'status': current[pk]} for pk in sorted(current)],
+            'missing': sorted(rest.difference(current)),
+        })
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, CustomerViewSet, OrderViewSet
+from .views import ProductViewSet, CustomerViewSet, OrderViewSet, ReportViewSet, metrics
+from .async_views import AsyncProductView, AsyncCustomerView, AsyncOrderView, OrderEventsView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
@@ -10,6 +11,7 @@ router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'customers', CustomerViewSet, basename='customer')
 router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'reports', ReportViewSet, basename='report')
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -23,8 +25,16 @@ schema_view = get_schema_view(
 )
 urlpatterns = [
     path('api/', include(router.urls)),
+    path('api/async/products/', AsyncProductView.as_view(), name='async-product-list'),
+    path('api/async/products/<int:pk>/', AsyncProductView.as_view(), name='async-product-detail'),
+    path('api/async/customers/', AsyncCustomerView.as_view(), name='async-customer-list'),
+    path('api/async/customers/<int:pk>/', AsyncCustomerView.as_view(), name='async-customer-detail'),
+    path('api/async/orders/', AsyncOrderView.as_view(), name='async-order-list'),
+    path('api/async/orders/<int:pk>/', AsyncOrderView.as_view(), name='async-order-detail'),
+    path('api/async/orders/<int:pk>/events/', OrderEventsView.as_view(), name='order-events'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics', metrics, name='metrics'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
 
@@ -1,29 +1,160 @@
-from .models import Product, Customer, Order
+from django.conf import settings
+from .models import Product, Customer, Order, DailySales, ProductSales, CustomerSales
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from .serializers import ProductSerializer, CustomerSerializer, OrderSerializer
 from rest_framework.permissions import IsAuthenticated
 from .permissions import IsAdminOrReadOnly
-from rest_framework.filters import SearchFilter
+from .filters import ProductSearchFilter, OrderFilterBackend, parse_order_filters
+from .bulk import ProductBulkMixin, OrderBulkMixin
+from .cache import CachedReadMixin
+from .changes import ChangesFeedMixin
+from .dbrouters import ReplicaReadMixin
+from .fastpath import FastListMixin
+from .fieldsets import SparseFieldsetMixin
+from .jobs import deferred_product_fanout
+from .export import EXPORT_FORMATS, export_queryset, iter_export
+from .metrics import request_metrics
+from .pagination import ProductPagination, CustomerPagination, OrderPagination
+from .rollups import RollupDelta, manual_rollups
+from .transitions import OrderTransitionMixin
 
 permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+class ProductViewSet(ReplicaReadMixin, SparseFieldsetMixin, CachedReadMixin, FastListMixin, ChangesFeedMixin,
+                     ProductBulkMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.defer('search_vector')
     serializer_class = ProductSerializer
-    filter_backends = (SearchFilter,)
+    pagination_class = ProductPagination
+    filter_backends = (ProductSearchFilter,)
     search_fields = ['name']
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk']:
             permission_classes = [IsAdminOrReadOnly]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
-class CustomerViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        # The orders containing the product are refreshed by the run_jobs worker.
+        with deferred_product_fanout():
+            super().perform_update(serializer)
+
+class CustomerViewSet(ReplicaReadMixin, SparseFieldsetMixin, CachedReadMixin, FastListMixin, ChangesFeedMixin,
+                      viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    pagination_class = CustomerPagination
+
+    def perform_destroy(self, instance):
+        # The rollups of all the orders the deletion cascades to, in one pass.
+        rollups = RollupDelta().subtract(instance.orders.values_list('pk', flat=True))
+        with manual_rollups():
+            super().perform_destroy(instance)
+        rollups.apply()
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ReplicaReadMixin, SparseFieldsetMixin, ChangesFeedMixin, OrderBulkMixin, OrderTransitionMixin,
+                   viewsets.ModelViewSet):
     queryset = Order.objects.all()
-    serializer_class = OrderSerializer
\ No newline at end of file
+    serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+    filter_backends = (OrderFilterBackend,)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        # ?output= instead of ?format=, which DRF reserves for renderer selection.
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'output': [f'Choose one of: {", ".join(sorted(EXPORT_FORMATS))}.']})
+        queryset = export_queryset(parse_order_filters(request.query_params))
+        response = StreamingHttpResponse(
+            iter_export(export_format, queryset), content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+        return response
+
+class ReportViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    Sales aggregates read from the rollup tables maintained by SEapp.rollups,
+    so their cost does not depend on the number of orders. ?status= limits
+    every report to one order status.
+    """
+    default_limit = 100
+    max_limit = 1000
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        filters = self.get_filters(request, ('date_after', 'day__gte'), ('date_before', 'day__lte'))
+        rows = DailySales.objects.filter(**filters).values('day').annotate(
+            orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue'),
+        ).filter(orders__gt=0).order_by('day')
+        return Response([{**row, 'revenue': round(row['revenue'], 2)} for row in rows])
+
+    @action(detail=False, methods=['get'])
+    def products(self, request):
+        rows = ProductSales.objects.filter(**self.get_filters(request)).values('product_id').annotate(
+            units=Sum('units'), revenue=Sum('revenue'),
+        ).filter(units__gt=0).order_by('-revenue', 'product_id')[:self.get_limit(request)]
+        rows = list(rows)
+        names = dict(Product.objects.filter(pk__in=[row['product_id'] for row in rows]).values_list('pk', 'name'))
+        return Response([
+            {'product': row['product_id'], 'name': names.get(row['product_id']), 'units': row['units'],
+             'revenue': round(row['revenue'], 2)}
+            for row in rows
+        ])
+
+    @action(detail=False, methods=['get'])
+    def customers(self, request):
+        rows = CustomerSales.objects.filter(**self.get_filters(request)).values('customer_id').annotate(
+            orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue'),
+        ).filter(orders__gt=0).order_by('-revenue', 'customer_id')[:self.get_limit(request)]
+        rows = list(rows)
+        names = dict(Customer.objects.filter(pk__in=[row['customer_id'] for row in rows]).values_list('pk', 'name'))
+        return Response([
+            {'customer': row['customer_id'], 'name': names.get(row['customer_id']), 'orders': row['orders'],
+             'units': row['units'], 'revenue': round(row['revenue'], 2)}
+            for row in rows
+        ])
+
+    def get_filters(self, request, *dates):
+        filters, errors = {}, {}
+        status = request.query_params.get('status')
+        if status:
+            if status not in dict(Order.STATUS_CHOICES):
+                errors['status'] = [f'"{status}" is not a valid choice.']
+            filters['status'] = status
+        for name, lookup in dates:
+            value = request.query_params.get(name)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:
+                    day = None
+                if day is None:
+                    errors[name] = ['Enter a valid date.']
+                filters[lookup] = day
+        if errors:
+            raise ValidationError(errors)
+        return filters
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        return max(1, min(limit, self.max_limit))
+
+
+def metrics(request):
+    # Prometheus text exposition of SEapp.metrics.request_metrics.
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(request_metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
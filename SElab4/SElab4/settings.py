@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,13 +41,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'SEapp',
     'rest_framework',
     'drf_yasg',
 ]
 
 MIDDLEWARE = [
+    'SEapp.middleware.TimingMiddleware',
+    'SEapp.middleware.QueryCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'SEapp.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,24 +85,147 @@ WSGI_APPLICATION = 'SElab4.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+def database_settings(**overrides):
+    engine = os.environ.get('DATABASE_ENGINE', 'postgresql')
+    database = {
+        'ENGINE': f'django.db.backends.{engine}',
+        'NAME': os.environ.get('DATABASE_NAME', 'django_db'),
+        'USER': os.environ.get('DATABASE_USER', 'user'),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', 'password'),
+        'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+        'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        # Keep connections open between requests instead of reconnecting every time.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if os.environ.get('DATABASE_POOL', '').lower() in ('1', 'true', 'yes'):
+        # psycopg 3 connection pool; persistent connections must be off with it.
+        database['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', '10')),
+        }
+        database['CONN_MAX_AGE'] = 0
+    database.update(overrides)
+    return database
+
+
+# DATABASE_REPLICAS is a comma separated list of replica hosts (host or
+# host:port) on Postgres, or of database files on SQLite.
+DATABASE_REPLICAS = []
+DATABASES = {'default': database_settings()}
+for number, replica in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        location = {'NAME': replica}
+    else:
+        host, _, port = replica.partition(':')
+        location = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[alias] = database_settings(TEST={'MIRROR': 'default'}, **location)
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['SEapp.dbrouters.PrimaryReplicaRouter']
+# Seconds a client keeps reading from the primary after a write, which should
+# cover the replication lag. Carried in a signed cookie, and in the cache for
+# clients that drop cookies, which needs a shared CACHE_BACKEND.
+DATABASE_REPLICA_STICKY_SECONDS = float(os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', '5'))
+
+# The cache holds the response cache versions (SEapp.cache) and the replica
+# stickiness of clients (SEapp.dbrouters), so with several worker processes
+# it has to be one they share: CACHE_BACKEND=db (run createcachetable) or
+# redis (needs the redis package). locmem, the default, is per process and
+# only right for a single process and the tests.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'seapp_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND must be one of: {", ".join(CACHE_BACKENDS)}.')
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'django_db',
-        'USER': 'user',
-        'PASSWORD': 'password',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
     }
 }
+
 REST_FRAMEWORK = {
 'DEFAULT_AUTHENTICATION_CLASSES': [
-'rest_framework_simplejwt.authentication.JWTAuthentication',
+'SEapp.authentication.CachedJWTAuthentication',
 ],
 'DEFAULT_PERMISSION_CLASSES': [
 'rest_framework.permissions.IsAuthenticated',
 ],
+'DEFAULT_RENDERER_CLASSES': [
+'SEapp.renderers.FastJSONRenderer',
+'rest_framework.renderers.BrowsableAPIRenderer',
+],
+'DEFAULT_PARSER_CLASSES': [
+'rest_framework.parsers.JSONParser',
+'rest_framework.parsers.FormParser',
+'rest_framework.parsers.MultiPartParser',
+],
+}
+
+# MessagePack (Accept / Content-Type: application/msgpack) is offered when the
+# optional msgpack package is installed.
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'SEapp.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'SEapp.parsers.MessagePackParser')
+
+# Responses shorter than this many bytes are sent uncompressed.
+GZIP_MIN_LENGTH = int(os.environ.get('GZIP_MIN_LENGTH', '1024'))
+
+# Request timings go out as a Server-Timing header unless this is off.
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'true').lower() in ('1', 'true', 'yes')
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Requests that run one statement QUERY_CHECK_REPEATS times (an N+1 pattern)
+# or a statement slower than QUERY_CHECK_SLOW_MS are logged with the code that
+# ran them ('log'), or fail ('raise'); '' turns the check off. The test runner
+# raises on repeated statements only. See SEapp.querycheck.
+QUERY_CHECK = os.environ.get('QUERY_CHECK', 'log' if DEBUG else '')
+QUERY_CHECK_REPEATS = int(os.environ.get('QUERY_CHECK_REPEATS', '5'))
+QUERY_CHECK_SLOW_MS = float(os.environ.get('QUERY_CHECK_SLOW_MS', '100'))
+TEST_RUNNER = 'SEapp.testrunner.QueryCheckRunner'
+
+# Product updates through the API leave the recomputation of the affected
+# orders to a queued job, run by "manage.py run_jobs". Changes to a product
+# less than PRODUCT_CHANGE_DELAY seconds apart are handled by one job.
+PRODUCT_CHANGES_IN_BACKGROUND = os.environ.get('PRODUCT_CHANGES_IN_BACKGROUND', 'true').lower() in ('1', 'true', 'yes')
+PRODUCT_CHANGE_DELAY = float(os.environ.get('PRODUCT_CHANGE_DELAY', '2'))
+
+# Hub that pushes order status changes to /api/async/orders/<id>/events/
+# streams: 'local' reaches the streams of this process only, 'postgres' those
+# of every process, through LISTEN/NOTIFY.
+ORDER_EVENTS_BACKEND = os.environ.get('ORDER_EVENTS_BACKEND', 'local')
+
+# The /changes/ feeds only return rows changed at least this many seconds
+# ago; keep it above the longest write transaction and the replica lag.
+CHANGES_FEED_LAG = float(os.environ.get('CHANGES_FEED_LAG', '5'))
+
+# List endpoints whose serializer has only plain fields build their pages
+# from values() rows instead of serializer instances, see SEapp.fastpath.
+FAST_LIST_RESPONSES = True
+
+SIMPLE_JWT = {
+    # Tokens carry a hash of the password, so changing it revokes them.
+    'CHECK_REVOKE_TOKEN': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'SEapp.authentication.TokenObtainPairSerializer',
 }
+# Tokens issued before CHECK_REVOKE_TOKEN was turned on have no password hash
+# claim. They are accepted (and cannot be revoked) while this is on, so the
+# deploy does not log every client out; turn it off once REFRESH_TOKEN_LIFETIME
+# (one day) has passed since, after which such tokens are rejected.
+AUTH_LEGACY_TOKENS = os.environ.get('AUTH_LEGACY_TOKENS', 'true').lower() in ('1', 'true', 'yes')
+
+# Resolved JWT users are cached per process for this many seconds.
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_SIZE = 1024
+# Trust the is_staff claim of tokens from /api/token/ instead of loading the user.
+AUTH_STATELESS_TOKENS = False
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators